@@ -3,7 +3,17 @@
 
 import sqlite3
 import os
+import re
+import csv
+import json
 import sys
+import time
+import heapq
+import random
+import datetime
+import functools
+import itertools
+import argparse
 
 DB_FILE = "library.db"
 
@@ -11,6 +21,7 @@ def initialize_database():
     """Initialize the library database with schema and sample data"""
     # Check if database already exists
     if os.path.exists(DB_FILE):
+        print("To upgrade it in place and keep its data, run: python initialize-db.py --migrate")
         confirm = input(f"Database file {DB_FILE} already exists. Overwrite? (y/n): ")
         if confirm.lower() != 'y':
             print("Database initialization cancelled.")
@@ -34,13 +45,26 @@ def initialize_database():
         with open('schema.sql', 'r') as schema_file:
             schema_sql = schema_file.read()
             cursor.executescript(schema_sql)
-        
+        cursor.executescript(FINE_POLICY_SQL)
+        cursor.executescript(CATALOG_SQL)
+        cursor.executescript(CATALOG_IMPORT_GATE_SQL)
+        cursor.executescript(INDEX_SQL)
+
+        # Build the full-text search index if this SQLite has FTS5
+        if fts5_available(cursor):
+            print("Creating full-text search index...")
+            cursor.executescript(SEARCH_INDEX_SQL)
+        else:
+            print("FTS5 is not available in this SQLite build; search will use LIKE matching.")
+
         # Execute sample data SQL
         print("Loading sample data...")
         with open('sample_data.sql', 'r') as data_file:
             data_sql = data_file.read()
             cursor.executescript(data_sql)
         
+        # A fresh build already contains every migration
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
         conn.commit()
         print("Database initialization completed successfully!")
         
@@ -80,6 +104,888 @@ def initialize_database():
             os.remove(DB_FILE)
         return False
 
+def fts5_available(cursor):
+    """Check whether the SQLite library was compiled with FTS5"""
+    try:
+        cursor.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+        cursor.execute("DROP TABLE temp.fts5_probe")
+        return True
+    except sqlite3.Error:
+        return False
+
+def rebuild_catalog():
+    """Rebuild CatalogEntry and the search index from the base tables"""
+    if not os.path.exists(DB_FILE):
+        print(f"Database file {DB_FILE} not found.")
+        return False
+        
+    conn = sqlite3.connect(DB_FILE)
+    cursor = conn.cursor()
+    
+    try:
+        print("Rebuilding catalog...")
+        # Dropping CatalogEntry also drops the search triggers defined on it
+        cursor.executescript("""
+        BEGIN IMMEDIATE;
+        DROP TABLE IF EXISTS ItemSearch;
+        DROP TABLE IF EXISTS CatalogEntry;
+        DROP TRIGGER IF EXISTS catalog_item_insert;
+        DROP TRIGGER IF EXISTS catalog_item_update_title;
+        DROP TRIGGER IF EXISTS catalog_item_update_status;
+        DROP TRIGGER IF EXISTS catalog_item_delete;
+        DROP TRIGGER IF EXISTS catalog_book_insert;
+        DROP TRIGGER IF EXISTS catalog_book_update;
+        DROP TRIGGER IF EXISTS catalog_book_delete;
+        DROP TRIGGER IF EXISTS catalog_ebook_insert;
+        DROP TRIGGER IF EXISTS catalog_ebook_update;
+        DROP TRIGGER IF EXISTS catalog_ebook_delete;
+        DROP TRIGGER IF EXISTS catalog_magazine_insert;
+        DROP TRIGGER IF EXISTS catalog_magazine_update;
+        DROP TRIGGER IF EXISTS catalog_magazine_delete;
+        DROP TRIGGER IF EXISTS catalog_journal_insert;
+        DROP TRIGGER IF EXISTS catalog_journal_update;
+        DROP TRIGGER IF EXISTS catalog_journal_delete;
+        DROP TRIGGER IF EXISTS catalog_media_insert;
+        DROP TRIGGER IF EXISTS catalog_media_update;
+        DROP TRIGGER IF EXISTS catalog_media_delete;
+        """ + CATALOG_SQL + CATALOG_IMPORT_GATE_SQL + POPULATE_CATALOG_SQL)
+        
+        if fts5_available(cursor):
+            cursor.executescript(SEARCH_INDEX_SQL)
+            cursor.execute("INSERT INTO ItemSearch (ItemSearch) VALUES ('rebuild')")
+            
+        conn.commit()
+        
+        cursor.execute("SELECT COUNT(*) FROM CatalogEntry")
+        print(f"Catalog rebuilt with {cursor.fetchone()[0]} items.")
+        conn.close()
+        return True
+        
+    except sqlite3.Error as e:
+        print(f"Error rebuilding catalog: {e}")
+        conn.rollback()
+        conn.close()
+        return False
+
+def import_items(paths, rejects_path, batch_rows=None):
+    """Bulk-load library items from CSV or JSON Lines files
+
+    Rows are streamed, validated against the LibraryItem and subtype
+    constraints and loaded batch_rows at a time, each batch in one
+    transaction: the LibraryItem rows with one executemany, then one
+    executemany per item type for the subtype rows, then CatalogEntry and
+    the search index for the whole batch in one set-based pass. Rejected
+    rows and unreadable files are written to rejects_path as JSON Lines.
+    """
+    if not os.path.exists(DB_FILE):
+        print(f"Database file {DB_FILE} not found.")
+        return False
+        
+    # Autocommit mode, so each batch controls its own transaction
+    conn = sqlite3.connect(DB_FILE, isolation_level=None)
+    conn.execute("PRAGMA busy_timeout = 5000")
+    cursor = conn.cursor()
+    
+    if not table_exists(cursor, 'CatalogImport'):
+        print("The database has no CatalogImport table; run initialize-db.py --migrate first.")
+        conn.close()
+        return False
+        
+    batch_rows = batch_rows or IMPORT_BATCH_ROWS
+    today = datetime.date.today().isoformat()
+    imported = dict.fromkeys(IMPORT_SUBTYPE_COLUMNS, 0)
+    counts = {'read': 0, 'rejected': 0}
+    started = time.perf_counter()
+    
+    try:
+        with open(rejects_path, 'w', encoding='utf-8') as rejects:
+            def reject(source, line, row, reason):
+                counts['rejected'] += 1
+                rejects.write(json.dumps({'file': source, 'line': line, 'reason': reason, 'row': row}) + "\n")
+                
+            seen_isbns = set()
+            for path in paths:
+                batch = []
+                line = 0
+                try:
+                    for line, row in read_import_rows(path):
+                        counts['read'] += 1
+                        try:
+                            item = validate_import_row(row, today, seen_isbns)
+                        except ValueError as e:
+                            reject(path, line, row, str(e))
+                            continue
+                        batch.append((path, line, row) + item)
+                        if len(batch) >= batch_rows:
+                            load_import_batch(cursor, batch, imported, reject)
+                            batch = []
+                except (OSError, UnicodeDecodeError, csv.Error) as e:
+                    # The rows read so far are still loaded; the rest of the file is skipped
+                    print(f"Error reading {path} after line {line}: {e}")
+                    reject(path, line + 1, None, f"file unreadable from here: {e}")
+                if batch:
+                    load_import_batch(cursor, batch, imported, reject)
+    except OSError as e:
+        print(f"Error writing {rejects_path}: {e}")
+    finally:
+        if conn.in_transaction:  # Interrupted mid-batch
+            cursor.execute("ROLLBACK")
+        conn.close()
+        
+    total = sum(imported.values())
+    elapsed = time.perf_counter() - started
+    print(f"Imported {total} of {counts['read']} rows in {elapsed:.1f}s "
+          f"({total / max(elapsed, 1e-9):,.0f} rows/s, including the catalog and search index).")
+    for item_type, count in imported.items():
+        if count:
+            print(f"- {item_type}: {count}")
+    if counts['rejected']:
+        print(f"Rejected {counts['rejected']} rows or files; see {rejects_path}.")
+    elif os.path.exists(rejects_path):
+        os.remove(rejects_path)
+    return True
+
+def read_import_rows(path):
+    """Yield (line number, row) from a CSV file with a header or a JSON Lines file
+
+    A JSON line that is not an object is yielded as the raw text, which
+    validation rejects. Lines are decoded one at a time, so every row before
+    a line that is not UTF-8 is yielded before UnicodeDecodeError is raised.
+    """
+    with open(path, 'rb') as f:
+        lines = (raw.decode('utf-8-sig' if number == 1 else 'utf-8') for number, raw in enumerate(f, 1))
+        if path.lower().endswith('.csv'):
+            reader = csv.DictReader(lines)
+            for row in reader:
+                yield reader.line_num, row
+            return
+        for line_number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = line.rstrip("\n")
+            yield line_number, row
+
+def normalize_isbn(isbn):
+    """An ISBN as the catalog stores it: no hyphens or spaces, upper-case check digit X; None if blank"""
+    return re.sub(r"[\s-]", "", str(isbn)).upper() or None
+
+def validate_import_row(row, today, seen_isbns):
+    """Check one import row against the LibraryItem and subtype constraints
+
+    Column names are matched case-insensitively, blank values become NULL
+    and ISBNs are normalized before the duplicate check. Returns (item type,
+    LibraryItem values, subtype values), or raises ValueError naming the
+    first problem.
+    """
+    if not isinstance(row, dict):
+        raise ValueError("not a JSON object")
+    values = {}
+    for key, value in row.items():
+        if key is None:
+            raise ValueError("more fields than the header has columns")
+        if isinstance(value, str):
+            value = value.strip()
+        values[IMPORT_COLUMN_NAMES.get(key.strip().lower(), key)] = None if value in ("", None) else value
+    if values.get('ISBN') is not None:
+        values['ISBN'] = normalize_isbn(values['ISBN'])
+        
+    item_type = values.get('ItemType')
+    if item_type not in IMPORT_SUBTYPE_COLUMNS:
+        raise ValueError(f"ItemType must be one of {', '.join(IMPORT_SUBTYPE_COLUMNS)}")
+    if not values.get('Title'):
+        raise ValueError("Title is required")
+    status = values.get('Status') or 'Available'
+    if status not in IMPORT_STATUSES:
+        raise ValueError(f"Status must be one of {', '.join(IMPORT_STATUSES)}")
+        
+    dates = {}
+    for column in ('PublicationDate', 'AcquisitionDate'):
+        try:
+            dates[column] = values.get(column) and datetime.date.fromisoformat(str(values[column])).isoformat()
+        except ValueError:
+            raise ValueError(f"{column} must be a YYYY-MM-DD date")
+            
+    subtype_values = []
+    for column in IMPORT_SUBTYPE_COLUMNS[item_type]:
+        value = values.get(column)
+        if value is None:
+            if column in IMPORT_REQUIRED_COLUMNS.get(item_type, ()):
+                raise ValueError(f"{column} is required for a {item_type}")
+        elif column in IMPORT_INTEGER_COLUMNS:
+            try:
+                value = int(value)
+            except ValueError:
+                raise ValueError(f"{column} must be a whole number")
+        elif column in IMPORT_BOOLEAN_COLUMNS:
+            if str(value).lower() not in IMPORT_BOOLEAN_VALUES:
+                raise ValueError(f"{column} must be true or false")
+            value = IMPORT_BOOLEAN_VALUES[str(value).lower()]
+        else:
+            value = str(value)
+            choices = IMPORT_COLUMN_CHOICES.get((item_type, column))
+            if choices and value not in choices:
+                raise ValueError(f"{column} must be one of {', '.join(choices)}")
+        subtype_values.append(value)
+        
+    isbn = values.get('ISBN') if 'ISBN' in IMPORT_SUBTYPE_COLUMNS[item_type] else None
+    if isbn is not None:
+        if (item_type, str(isbn)) in seen_isbns:
+            raise ValueError(f"duplicate ISBN {isbn} in the import")
+        seen_isbns.add((item_type, str(isbn)))
+        
+    item_values = (values['Title'], dates['PublicationDate'], status,
+                   dates['AcquisitionDate'] or today, values.get('Location'), item_type)
+    return item_type, item_values, tuple(subtype_values)
+
+def next_item_id(cursor):
+    """The ItemID AUTOINCREMENT would hand out next"""
+    cursor.execute("""
+    SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'LibraryItem'), 0),
+               COALESCE((SELECT MAX(ItemID) FROM LibraryItem), 0)) + 1
+    """)
+    return cursor.fetchone()[0]
+
+def load_import_batch(cursor, batch, imported, reject):
+    """Insert a batch of validated import rows in one transaction
+
+    Rows whose ISBN is already in the catalog are rejected first. ItemIDs are
+    assigned up front, so the subtype rows need no lastrowid round trips.
+    The per-row catalog insert triggers are gated off by a CatalogImport row
+    that only this transaction ever sees. If the batch still fails, it is
+    retried row by row to isolate the bad rows. imported is only updated
+    once the batch has committed.
+    """
+    loaded = {}
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        cursor.execute("INSERT INTO CatalogImport DEFAULT VALUES")
+        for item_type in ('Book', 'Ebook'):
+            isbns = [subtype[0] for _, _, _, kind, _, subtype in batch if kind == item_type and subtype[0]]
+            if not isbns:
+                continue
+            cursor.execute(f"SELECT ISBN FROM {item_type} WHERE ISBN IN (SELECT value FROM json_each(?))",
+                           (json.dumps(isbns),))
+            taken = {isbn for (isbn,) in cursor.fetchall()}
+            for entry in [entry for entry in batch if entry[3] == item_type and entry[5][0] in taken]:
+                reject(entry[0], entry[1], entry[2], f"ISBN {entry[5][0]} is already in the catalog")
+                batch.remove(entry)
+                
+        # Grouped by item type, so each subtype table gets one executemany
+        batch.sort(key=lambda entry: entry[3])
+        first_id = next_item_id(cursor)
+        cursor.executemany(
+            "INSERT INTO LibraryItem (ItemID, Title, PublicationDate, Status, AcquisitionDate, Location, ItemType) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            ((first_id + offset,) + entry[4] for offset, entry in enumerate(batch))
+        )
+        for item_type, group in itertools.groupby(enumerate(batch), key=lambda pair: pair[1][3]):
+            group = list(group)
+            columns = IMPORT_SUBTYPE_COLUMNS[item_type]
+            cursor.executemany(
+                f"INSERT INTO {item_type} (ItemID, {', '.join(columns)}) "
+                f"VALUES (?, {', '.join('?' for _ in columns)})",
+                ((first_id + offset,) + entry[5] for offset, entry in group)
+            )
+            loaded[item_type] = len(group)
+        # The catalog entries (and through them the search index) for the batch
+        cursor.execute(IMPORT_CATALOG_SQL, (first_id,))
+        cursor.execute("DELETE FROM CatalogImport")
+        cursor.execute("COMMIT")
+    except sqlite3.Error as e:
+        cursor.execute("ROLLBACK")
+        if len(batch) == 1:
+            reject(*batch[0][:3], str(e))
+            return
+        for entry in batch:
+            load_import_batch(cursor, [entry], imported, reject)
+        return
+    for item_type, count in loaded.items():
+        imported[item_type] += count
+
+def migrate_database():
+    """Bring an existing database up to SCHEMA_VERSION without losing its data"""
+    if not os.path.exists(DB_FILE):
+        print(f"Database file {DB_FILE} not found.")
+        return False
+        
+    # Autocommit mode, so each migration controls its own transactions
+    conn = sqlite3.connect(DB_FILE, isolation_level=None)
+    conn.execute("PRAGMA busy_timeout = 5000")
+    cursor = conn.cursor()
+    
+    version = cursor.execute("PRAGMA user_version").fetchone()[0]
+    pending = [migration for migration in MIGRATIONS if migration[0] > version]
+    
+    if not pending:
+        print(f"Database is up to date (schema version {version}).")
+        conn.close()
+        return True
+        
+    print(f"Migrating {DB_FILE} from schema version {version} to {SCHEMA_VERSION}...")
+    
+    for number, description, migration, online in pending:
+        start = time.perf_counter()
+        try:
+            if online:
+                # Each index build commits on its own, so WAL readers are never
+                # blocked and writers only wait for one index at a time
+                migration(cursor)
+                cursor.execute(f"PRAGMA user_version = {number}")
+            else:
+                cursor.execute("BEGIN IMMEDIATE")
+                migration(cursor)
+                cursor.execute(f"PRAGMA user_version = {number}")
+                cursor.execute("COMMIT")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                cursor.execute("ROLLBACK")
+            print(f"Migration {number} ({description}) failed: {e}")
+            print(f"Database left at schema version {number - 1}.")
+            conn.close()
+            return False
+            
+        print(f"- {number}: {description} ({time.perf_counter() - start:.2f}s)")
+        
+    print("Migration completed successfully!")
+    conn.close()
+    return True
+
+def execute_statements(cursor, sql):
+    """Execute a script one statement at a time, without executescript's implicit COMMIT"""
+    statement = ""
+    for line in sql.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            cursor.execute(statement)
+            statement = ""
+    if statement.strip():
+        cursor.execute(statement)
+
+def schema_statement(name):
+    """Return the CREATE statement for a named table, index or trigger in SCHEMA_SQL"""
+    match = re.search(rf"^CREATE (?:TABLE|INDEX|TRIGGER) {name}\b", SCHEMA_SQL, re.MULTILINE)
+    if not match:
+        raise KeyError(name)
+    if "TRIGGER" in match.group(0):
+        terminator = "\nEND;"
+    elif "TABLE" in match.group(0):
+        terminator = "\n);"
+    else:
+        terminator = ";"
+    end = SCHEMA_SQL.index(terminator, match.end()) + len(terminator)
+    return SCHEMA_SQL[match.start():end]
+
+def table_exists(cursor, name):
+    """Check whether a table (or virtual table) exists"""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,))
+    return cursor.fetchone() is not None
+
+def migrate_catalog(cursor):
+    """Add the trigger-maintained CatalogEntry table"""
+    if not table_exists(cursor, 'CatalogEntry'):
+        execute_statements(cursor, MIGRATION_SQL[1])
+
+def migrate_search_index(cursor):
+    """Add the FTS5 search index over CatalogEntry, where FTS5 is available"""
+    if not table_exists(cursor, 'ItemSearch') and fts5_available(cursor):
+        execute_statements(cursor, MIGRATION_SQL[2])
+        cursor.execute("INSERT INTO ItemSearch (ItemSearch) VALUES ('rebuild')")
+
+def migrate_fine_trigger(cursor):
+    """Make the late-fine trigger the single, upserting source of fines"""
+    execute_statements(cursor, MIGRATION_SQL[3])
+
+def migrate_event_counters(cursor):
+    """Add Event.RegisteredCount and the triggers that maintain it"""
+    cursor.execute("PRAGMA table_info(Event)")
+    if 'RegisteredCount' not in [column[1] for column in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE Event ADD COLUMN RegisteredCount INTEGER NOT NULL DEFAULT 0")
+    cursor.execute("""
+    UPDATE Event
+    SET RegisteredCount = (
+        SELECT COUNT(*) FROM EventAttendance a
+        WHERE a.EventID = Event.EventID AND a.AttendanceStatus != 'Cancelled'
+    )
+    """)
+    execute_statements(cursor, MIGRATION_SQL[4])
+
+def migrate_listing_indexes(cursor):
+    """Add the sort-key indexes used by the paged staff listings"""
+    execute_statements(cursor, MIGRATION_SQL[5])
+
+def migrate_query_indexes(cursor):
+    """Add the composite and partial indexes for the hot query shapes"""
+    execute_statements(cursor, MIGRATION_SQL[6])
+
+def migrate_fine_accrual(cursor):
+    """Add the FineAccrualRun log used as the accrual watermark"""
+    execute_statements(cursor, MIGRATION_SQL[7])
+
+def migrate_accrual_index(cursor):
+    """Add the open-loan due-date index the accrual pass scans"""
+    execute_statements(cursor, MIGRATION_SQL[8])
+
+def migrate_repricing_index(cursor):
+    """Add the late-return index that fine re-pricing scans"""
+    execute_statements(cursor, MIGRATION_SQL[10])
+
+def migrate_fine_policy(cursor):
+    """Add the fine policy and holiday tables and price the late-fine trigger from them"""
+    execute_statements(cursor, MIGRATION_SQL[9])
+
+def migrate_staff_passwords(cursor):
+    """Add Staff.Password; existing staff cannot log in until one is set"""
+    cursor.execute("PRAGMA table_info(Staff)")
+    if 'Password' not in [column[1] for column in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE Staff ADD COLUMN Password TEXT")
+
+def migrate_catalog_import_gate(cursor):
+    """Gate the catalog insert triggers on CatalogImport, and catalog any item left without an entry"""
+    execute_statements(cursor, MIGRATION_SQL[12])
+
+def generate_database(volumes, seed):
+    """Build a new database with the sample data plus seeded synthetic volumes
+
+    Bulk rows go in with executemany in large transactions under load-time
+    PRAGMAs. CHECK constraints and the borrowing/attendance triggers stay
+    active; fines are written with the late-return trigger's formula, and the
+    catalog, search index and query indexes are built set-based at the end.
+    """
+    if os.path.exists(DB_FILE):
+        print(f"Database file {DB_FILE} already exists. Remove it or choose another path with --db.")
+        return False
+        
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    started = time.perf_counter()
+    print(f"Generating {DB_FILE} (seed {seed})...")
+    
+    conn = sqlite3.connect(DB_FILE)
+    cursor = conn.cursor()
+    
+    try:
+        # Load-time settings: no rollback journal or fsyncs, a large page cache
+        cursor.execute("PRAGMA journal_mode = OFF")
+        cursor.execute("PRAGMA synchronous = OFF")
+        cursor.execute(f"PRAGMA cache_size = -{GENERATOR_CACHE_KIB}")
+        cursor.execute("PRAGMA temp_store = MEMORY")
+        cursor.execute("PRAGMA locking_mode = EXCLUSIVE")
+        
+        cursor.executescript(SCHEMA_SQL)
+        cursor.executescript(FINE_POLICY_SQL)
+        cursor.executescript(SAMPLE_DATA_SQL)
+        
+        # Secondary indexes are cheaper to build once after the load than to
+        # maintain row by row; constraints and triggers stay in place
+        deferred_indexes = re.findall(r"^CREATE INDEX (\w+)", SCHEMA_SQL, re.MULTILINE)
+        for index in deferred_indexes:
+            cursor.execute(f"DROP INDEX {index}")
+        
+        ids = {
+            table: cursor.execute(f"SELECT COALESCE(MAX({key}), 0) FROM {table}").fetchone()[0]
+            for table, key in (('Member', 'MemberID'), ('Staff', 'StaffID'), ('LibraryItem', 'ItemID'),
+                               ('Event', 'EventID'), ('Room', 'RoomID'))
+        }
+        member_count = ids['Member'] + volumes['members']
+        staff_count = ids['Staff'] + volumes['members'] // 5000
+        item_count = ids['LibraryItem'] + volumes['items']
+        
+        def timed_insert(label, table, columns, rows):
+            start = time.perf_counter()
+            count = insert_batches(conn, table, columns, rows)
+            elapsed = time.perf_counter() - start
+            print(f"- {label}: {count} rows ({elapsed:.1f}s, {count / max(elapsed, 1e-9):,.0f} rows/s)")
+            
+        timed_insert(
+            "Members", "Member",
+            "MemberID, FirstName, LastName, Email, Phone, Address, MembershipDate, Password",
+            generate_members(rng, ids['Member'] + 1, member_count, today)
+        )
+        
+        timed_insert(
+            "Staff", "Staff",
+            "StaffID, FirstName, LastName, Position, Department, Email, Phone, HireDate, "
+            "Salary, Schedule",
+            generate_staff(rng, ids['Staff'] + 1, staff_count, today)
+        )
+        
+        item_types = generate_item_types(rng, ids['LibraryItem'] + 1, item_count)
+        timed_insert(
+            "Library items", "LibraryItem",
+            "ItemID, Title, PublicationDate, Status, AcquisitionDate, Location, ItemType",
+            generate_items(rng, item_types, today)
+        )
+        
+        for item_type, (columns, generate) in SUBTYPE_GENERATORS.items():
+            timed_insert(f"{item_type} details", item_type, columns, generate(
+                rng, (item_id for item_id, kind in item_types.items() if kind == item_type)
+            ))
+            
+        fine_count = [0]
+        timed_insert(
+            "Borrowings", "Borrowing",
+            "BorrowID, MemberID, ItemID, BorrowDate, DueDate, ReturnDate, StaffID",
+            generate_borrowings(rng, volumes['borrowings'], member_count, staff_count,
+                                item_count, today, conn, fine_count)
+        )
+        print(f"- Fines: {fine_count[0]} rows (loaded with the borrowings)")
+        
+        events = list(generate_events(rng, ids['Event'] + 1, volumes['events'], staff_count,
+                                      ids['Room'], today))
+        timed_insert(
+            "Events", "Event",
+            "EventID, Title, Description, EventDate, StartTime, EndTime, MaxAttendees, "
+            "EventType, TargetAudience, StaffID, RoomID",
+            events
+        )
+        
+        timed_insert(
+            "Event attendance", "EventAttendance",
+            "EventID, MemberID, RegistrationDate, AttendanceStatus",
+            generate_attendance(rng, events, member_count, today)
+        )
+        
+        timed_insert(
+            "Volunteers", "Volunteer",
+            "MemberID, SkillsInterests, AvailabilityHours, StartDate, Status",
+            generate_volunteers(rng, volumes['members'] // 100, ids['Member'] + 1, member_count, today)
+        )
+        
+        timed_insert(
+            "Help requests", "HelpRequest",
+            "MemberID, StaffID, RequestDate, Description, Status, Resolution, ClosedDate",
+            generate_help_requests(rng, volumes['members'] // 20, member_count, staff_count, today)
+        )
+        
+        timed_insert(
+            "Acquisition requests", "AcquisitionRequest",
+            "Title, AuthorCreator, PublicationType, RequestDate, Status, MemberID, StaffID, Notes",
+            generate_acquisitions(rng, volumes['members'] // 50, member_count, staff_count, today)
+        )
+        
+        print("Building catalog, search and query indexes...")
+        start = time.perf_counter()
+        for index in deferred_indexes:
+            cursor.execute(schema_statement(index))
+        cursor.executescript(CATALOG_SQL + CATALOG_IMPORT_GATE_SQL + POPULATE_CATALOG_SQL)
+        cursor.executescript(INDEX_SQL)
+        if fts5_available(cursor):
+            cursor.executescript(SEARCH_INDEX_SQL)
+            cursor.execute("INSERT INTO ItemSearch (ItemSearch) VALUES ('rebuild')")
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+        cursor.execute("ANALYZE")
+        print(f"- Indexes built ({time.perf_counter() - start:.1f}s)")
+        
+        # Leave the file in the mode the application uses
+        cursor.execute("PRAGMA locking_mode = NORMAL")
+        cursor.execute("PRAGMA journal_mode = WAL")
+        conn.close()
+        
+    except sqlite3.Error as e:
+        print(f"Error generating database: {e}")
+        conn.close()
+        if os.path.exists(DB_FILE):
+            os.remove(DB_FILE)
+        return False
+        
+    print(f"Database generated in {time.perf_counter() - started:.1f}s.")
+    return True
+
+def insert_batches(conn, table, columns, rows):
+    """Load rows into a table in GENERATOR_BATCH_ROWS chunks
+
+    Each chunk is written to a constraint-free temp table with executemany
+    and then moved with a single INSERT ... SELECT, so AUTOINCREMENT
+    bookkeeping happens once per chunk while CHECK constraints and row
+    triggers still apply to every row. Commits every GENERATOR_COMMIT_ROWS
+    rows. Returns the number of rows inserted.
+    """
+    placeholders = ", ".join("?" for _ in columns.split(","))
+    # One stage table per target, so a generator can load another table mid-stream
+    stage = f"temp.generator_stage_{table.lower()}"
+    conn.execute(f"CREATE TABLE {stage} AS SELECT {columns} FROM {table} WHERE 0")
+    
+    count = 0
+    since_commit = 0
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, GENERATOR_BATCH_ROWS))
+        if not batch:
+            break
+        conn.executemany(f"INSERT INTO {stage} VALUES ({placeholders})", batch)
+        conn.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {stage}")
+        conn.execute(f"DELETE FROM {stage}")
+        count += len(batch)
+        since_commit += len(batch)
+        if since_commit >= GENERATOR_COMMIT_ROWS:
+            conn.commit()
+            since_commit = 0
+    conn.commit()
+    conn.execute(f"DROP TABLE {stage}")
+    return count
+
+@functools.lru_cache(maxsize=None)
+def day(today, offset):
+    """ISO date string offset days from today (cached; generators call this per row)"""
+    return (today + datetime.timedelta(days=offset)).isoformat()
+
+def person_name(rng):
+    return rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+
+def phone_number(rng):
+    return f"555-{rng.randrange(100, 1000)}-{rng.randrange(1000, 10000)}"
+
+def item_title(rng):
+    return f"{rng.choice(TITLE_STARTS)} {rng.choice(TITLE_ADJECTIVES)} {rng.choice(TITLE_NOUNS)}"
+
+def generate_members(rng, first_id, last_id, today):
+    for member_id in range(first_id, last_id + 1):
+        first, last = person_name(rng)
+        yield (
+            member_id, first, last,
+            f"{first.lower()}.{last.lower()}.{member_id}@example.org",
+            phone_number(rng),
+            f"{rng.randrange(1, 9999)} {rng.choice(LAST_NAMES)} {rng.choice(STREET_TYPES)}",
+            day(today, -rng.randrange(1, 10 * 365)),
+            "password"
+        )
+
+def generate_staff(rng, first_id, last_id, today):
+    for staff_id in range(first_id, last_id + 1):
+        first, last = person_name(rng)
+        position, department = rng.choice(STAFF_ROLES)
+        yield (
+            staff_id, first, last, position, department,
+            f"{first.lower()}.{last.lower()}.{staff_id}@library.org",
+            phone_number(rng),
+            day(today, -rng.randrange(30, 20 * 365)),
+            round(rng.uniform(35000, 80000), 2),
+            rng.choice(STAFF_SCHEDULES)
+        )
+
+def generate_item_types(rng, first_id, last_id):
+    """Assign an item type to every new ItemID using ITEM_TYPE_WEIGHTS"""
+    item_ids = range(first_id, last_id + 1)
+    types = rng.choices(list(ITEM_TYPE_WEIGHTS), list(ITEM_TYPE_WEIGHTS.values()), k=len(item_ids))
+    return dict(zip(item_ids, types))
+
+def generate_items(rng, item_types, today):
+    for item_id, item_type in item_types.items():
+        # Borrowed is set by the borrowing trigger when open loans are loaded
+        status = 'Available' if rng.random() < 0.98 else rng.choice(('Reserved', 'Maintenance'))
+        yield (
+            item_id, item_title(rng),
+            day(today, -rng.randrange(30, 60 * 365)),
+            status,
+            day(today, -rng.randrange(1, 15 * 365)),
+            f"{ITEM_LOCATIONS[item_type]} {rng.randrange(1, 40)}",
+            item_type
+        )
+
+def generate_books(rng, item_ids):
+    for item_id in item_ids:
+        yield (item_id, f"978{item_id:010d}", " ".join(person_name(rng)), rng.choice(PUBLISHERS),
+               rng.choice(GENRES), rng.randrange(80, 1200), rng.choice(('Hardcover', 'Paperback', 'Other')))
+
+def generate_ebooks(rng, item_ids):
+    for item_id in item_ids:
+        yield (item_id, f"979{item_id:010d}", " ".join(person_name(rng)), rng.choice(PUBLISHERS),
+               rng.choice(GENRES), rng.choice(('EPUB', 'PDF', 'MOBI')), f"{rng.uniform(0.5, 25):.1f} MB")
+
+def generate_magazines(rng, item_ids):
+    for item_id in item_ids:
+        yield (item_id, str(rng.randrange(1, 400)), rng.choice(PUBLISHERS), rng.choice(MAGAZINE_CATEGORIES),
+               rng.choice(('Weekly', 'Monthly', 'Quarterly')))
+
+def generate_journals(rng, item_ids):
+    for item_id in item_ids:
+        yield (item_id, str(rng.randrange(1, 120)), str(rng.randrange(1, 12)), rng.choice(PUBLISHERS),
+               rng.choice(JOURNAL_FIELDS), rng.random() < 0.8)
+
+def generate_media(rng, item_ids):
+    for item_id in item_ids:
+        yield (item_id, rng.choice(('CD', 'DVD', 'Record', 'Other')), " ".join(person_name(rng)),
+               f"{rng.randrange(30, 200)} min", rng.choice(('Standard', 'Blu-ray', 'Vinyl', 'Digital')))
+
+def sorted_days(rng, count, low, high):
+    """Yield count uniform random day offsets from [low, high) in ascending order
+
+    Walks the order statistics from the largest down, each one the previous
+    times U ** (1 / remaining), so no list of draws is kept or sorted.
+    """
+    span = high - low
+    top = 1.0
+    for remaining in range(count, 0, -1):
+        top *= rng.random() ** (1 / remaining)
+        yield low + min(int((1 - top) * span), span - 1)
+
+def generate_borrowings(rng, count, member_count, staff_count, item_count, today, conn, fine_count):
+    """Yield Borrowing rows: a history of returned loans plus a few open ones
+
+    About 3% of loans are still open, on distinct items that are currently
+    available; a quarter of those are overdue. Returned loans come back
+    early or on time 85% of the time and otherwise late with a long tail.
+    Loans of one item never overlap: history loans are handed out in date
+    order to items that are back on the shelf, and end before the item's
+    open loan or its loans in the sample data. Each late return gets the
+    fine the create_fine_for_late_return trigger would have issued; fines
+    are written to the Fine table every GENERATOR_BATCH_ROWS, and their
+    number is added to fine_count[0].
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT COALESCE(MAX(BorrowID), 0) FROM Borrowing")
+    borrow_id = cursor.fetchone()[0]
+    cursor.execute("SELECT ItemID FROM LibraryItem WHERE Status = 'Available'")
+    available = [row[0] for row in cursor.fetchall()]
+    
+    open_count = min(int(count * 0.03), len(available))
+    open_items = rng.sample(available, open_count)
+    del available
+    
+    # Dates are handled as day offsets from today until they are written
+    history_days = 5 * 365
+    
+    # The first day each item is taken by a loan that is already in the
+    # database or is one of the open loans; its history loans end before it
+    reserved = {}
+    cursor.execute("SELECT ItemID, MIN(BorrowDate) FROM Borrowing GROUP BY ItemID")
+    for item_id, borrowed in cursor.fetchall():
+        reserved[item_id] = (datetime.date.fromisoformat(borrowed[:10]) - today).days
+    open_loans = []
+    for item_id in open_items:
+        # Open loan: most are within the loan period, a quarter are overdue
+        if rng.random() < 0.75:
+            borrowed = -rng.randrange(0, LOAN_PERIOD_DAYS)
+        else:
+            borrowed = -rng.randrange(LOAN_PERIOD_DAYS + 1, LOAN_PERIOD_DAYS + 90)
+        open_loans.append((borrowed, item_id))
+        reserved[item_id] = min(borrowed, reserved.get(item_id, borrowed))
+        
+    shelf = list(range(1, item_count + 1))  # Items free to lend
+    out = []  # Heap of (return day, item) for history loans in progress
+    fines = []
+    
+    def write_fines():
+        fine_count[0] += insert_batches(conn, "Fine", "BorrowID, Amount, Status, IssuedDate, PaidDate", fines)
+        fines.clear()
+        
+    for borrowed in sorted_days(rng, count - open_count, 1 - history_days, -LOAN_PERIOD_DAYS):
+        while out and out[0][0] < borrowed:
+            shelf.append(heapq.heappop(out)[1])
+        item_id = None
+        while item_id is None and (shelf or out):
+            if not shelf:
+                # Every item is out: the loan waits for the first one back
+                back, item_id = heapq.heappop(out)
+                borrowed = max(borrowed, back + 1)
+                shelf.append(item_id)
+            index = rng.randrange(len(shelf))
+            shelf[index], shelf[-1] = shelf[-1], shelf[index]
+            item_id = shelf.pop()
+            if reserved.get(item_id, 1) <= borrowed:
+                item_id = None  # Lent out for good from here on
+        if item_id is None or borrowed > 0:
+            break  # Too few items for this many loans
+            
+        borrow_id += 1
+        member_id = rng.randint(1, member_count)
+        staff_id = rng.randint(1, staff_count) if rng.random() < 0.7 else None
+        due = borrowed + LOAN_PERIOD_DAYS
+        if rng.random() < 0.85:
+            returned = min(borrowed + rng.randint(1, LOAN_PERIOD_DAYS), 0)
+        else:
+            returned = min(due + 1 + int(rng.expovariate(1 / 8)), 0)
+        returned = min(returned, reserved.get(item_id, 1) - 1)
+        heapq.heappush(out, (returned, item_id))
+        
+        if returned > due:
+            # Same amount the create_fine_for_late_return trigger charges under
+            # the default FINE_POLICY_SQL
+            amount = (returned - due) * 0.50
+            if rng.random() < 0.7:
+                paid = min(returned + rng.randrange(0, 60), 0)
+                fines.append((borrow_id, amount, 'Paid', day(today, returned), day(today, paid)))
+            else:
+                fines.append((borrow_id, amount, 'Unpaid', day(today, returned), None))
+            if len(fines) >= GENERATOR_BATCH_ROWS:
+                write_fines()
+                
+        yield (borrow_id, member_id, item_id, day(today, borrowed),
+               day(today, due), day(today, returned), staff_id)
+    write_fines()
+        
+    for borrowed, item_id in sorted(open_loans):
+        borrow_id += 1
+        member_id = rng.randint(1, member_count)
+        staff_id = rng.randint(1, staff_count) if rng.random() < 0.7 else None
+        yield (borrow_id, member_id, item_id, day(today, borrowed),
+               day(today, borrowed + LOAN_PERIOD_DAYS), None, staff_id)
+
+def generate_events(rng, first_id, count, staff_count, room_count, today):
+    for event_id in range(first_id, first_id + count):
+        event_type = rng.choice(EVENT_TYPES)
+        start = rng.randrange(9, 19)
+        yield (
+            event_id,
+            f"{event_type} {rng.choice(TITLE_ADJECTIVES)} {rng.choice(TITLE_NOUNS)}",
+            f"A {event_type.lower()} session at the library.",
+            day(today, rng.randrange(-2 * 365, 180)),
+            f"{start:02d}:00",
+            f"{start + rng.randrange(1, 4):02d}:00",
+            rng.randrange(10, 101),
+            event_type,
+            rng.choice(('All Ages', 'Adults', 'Teens', 'Children', 'Seniors')),
+            rng.randint(1, staff_count),
+            rng.randint(1, room_count)
+        )
+
+def generate_attendance(rng, events, member_count, today):
+    """Yield registrations that never exceed an event's MaxAttendees"""
+    today_iso = today.isoformat()
+    for event in events:
+        event_id, event_date, max_attendees = event[0], event[3], event[6]
+        registrations = rng.randrange(0, max_attendees + 1)
+        for member_id in rng.sample(range(1, member_count + 1), min(registrations, member_count)):
+            roll = rng.random()
+            if roll < 0.1:
+                status = 'Cancelled'
+            elif event_date < today_iso and roll < 0.8:
+                status = 'Attended'
+            else:
+                status = 'Registered'
+            registered = datetime.date.fromisoformat(event_date) - datetime.timedelta(days=rng.randrange(1, 60))
+            yield (event_id, member_id, registered.isoformat(), status)
+
+def generate_volunteers(rng, count, first_member_id, member_count, today):
+    # Only new members, since MemberID is unique among volunteers
+    members = range(first_member_id, member_count + 1)
+    for member_id in rng.sample(members, min(count, len(members))):
+        yield (member_id, rng.choice(VOLUNTEER_SKILLS), rng.choice(STAFF_SCHEDULES),
+               day(today, -rng.randrange(0, 5 * 365)), 'Active' if rng.random() < 0.8 else 'Inactive')
+
+def generate_help_requests(rng, count, member_count, staff_count, today):
+    for _ in range(count):
+        requested = -rng.randrange(0, 3 * 365)
+        status = rng.choices(('Open', 'InProgress', 'Resolved'), (1, 1, 8))[0]
+        staff_id = None if status == 'Open' else rng.randint(1, staff_count)
+        resolution, closed = None, None
+        if status == 'Resolved':
+            resolution = "Assisted the member."
+            closed = day(today, min(requested + rng.randrange(0, 14), 0))
+        yield (rng.randint(1, member_count), staff_id, day(today, requested),
+               rng.choice(HELP_TOPICS), status, resolution, closed)
+
+def generate_acquisitions(rng, count, member_count, staff_count, today):
+    for _ in range(count):
+        status = rng.choices(('Pending', 'Approved', 'Rejected'), (3, 5, 2))[0]
+        yield (item_title(rng), " ".join(person_name(rng)), rng.choice(list(ITEM_TYPE_WEIGHTS)),
+               day(today, -rng.randrange(0, 2 * 365)), status, rng.randint(1, member_count),
+               None if status == 'Pending' else rng.randint(1, staff_count), None)
+
 def extract_schema_sql():
     """Extract schema to SQL file"""
     print("Extracting schema SQL file...")
@@ -124,7 +1030,8 @@ CREATE TABLE Staff (
     Phone TEXT,
     HireDate DATE NOT NULL,
     Salary DECIMAL(10,2),
-    Schedule TEXT
+    Schedule TEXT,
+    Password TEXT  -- Salted hash; NULL means no password set yet (no login outside demo mode)
 );
 
 -- Room table for library spaces
@@ -150,6 +1057,8 @@ CREATE TABLE Event (
     TargetAudience TEXT,
     StaffID INTEGER,
     RoomID INTEGER,
+    -- Active (non-cancelled) registrations, maintained by the event_attendance_* triggers
+    RegisteredCount INTEGER NOT NULL DEFAULT 0,
     FOREIGN KEY (StaffID) REFERENCES Staff(StaffID),
     FOREIGN KEY (RoomID) REFERENCES Room(RoomID),
     CHECK (EndTime > StartTime)
@@ -248,6 +1157,33 @@ CREATE TABLE Fine (
     CHECK (PaidDate IS NULL OR PaidDate >= IssuedDate)
 );
 
+-- FinePolicy prices late returns for each item type: DailyRate for every
+-- day late after GraceDays, not counting LibraryHoliday dates, up to MaxFine
+-- (no cap when NULL). Rows are seeded from FINE_POLICY_SQL.
+CREATE TABLE FinePolicy (
+    ItemType TEXT PRIMARY KEY CHECK (ItemType IN ('Book', 'Ebook', 'Magazine', 'Journal', 'Media')),
+    DailyRate DECIMAL(10,2) NOT NULL CHECK (DailyRate >= 0),
+    GraceDays INTEGER NOT NULL DEFAULT 0 CHECK (GraceDays >= 0),
+    MaxFine DECIMAL(10,2) CHECK (MaxFine IS NULL OR MaxFine >= 0)
+);
+
+-- Days the library is closed; they never count as days late
+CREATE TABLE LibraryHoliday (
+    HolidayDate DATE PRIMARY KEY,
+    Name TEXT
+);
+
+-- FineAccrualRun logs each overdue-fine accrual pass; the latest AsOfDate
+-- is the watermark the next run checks
+CREATE TABLE FineAccrualRun (
+    RunID INTEGER PRIMARY KEY AUTOINCREMENT,
+    AsOfDate DATE NOT NULL,
+    StartedAt DATETIME NOT NULL,
+    FinishedAt DATETIME NOT NULL,
+    FinesAdded INTEGER NOT NULL DEFAULT 0,
+    FinesUpdated INTEGER NOT NULL DEFAULT 0
+);
+
 -- AcquisitionRequest table for requested items
 CREATE TABLE AcquisitionRequest (
     RequestID INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -322,32 +1258,55 @@ BEGIN
     WHERE ItemID = NEW.ItemID;
 END;
 
--- Create fine when item is returned late
+-- Create fine when item is returned late (the single source of truth for fines)
 CREATE TRIGGER create_fine_for_late_return
 AFTER UPDATE ON Borrowing
-WHEN NEW.ReturnDate IS NOT NULL AND NEW.ReturnDate > NEW.DueDate
+WHEN NEW.ReturnDate IS NOT NULL AND OLD.ReturnDate IS NULL AND NEW.ReturnDate > NEW.DueDate
 BEGIN
     INSERT INTO Fine (BorrowID, Amount, Status, IssuedDate)
-    VALUES (
-        NEW.BorrowID,
-        -- $0.50 per day late
-        (julianday(NEW.ReturnDate) - julianday(NEW.DueDate)) * 0.50,
-        'Unpaid',
-        NEW.ReturnDate
-    );
+    SELECT NEW.BorrowID, charge.Amount, 'Unpaid', NEW.ReturnDate
+    FROM (
+        -- Priced by the item type's FinePolicy; the same formula as FinePolicy.amounts
+        SELECT ROUND(MIN(
+            MAX(julianday(NEW.ReturnDate) - julianday(NEW.DueDate)
+                - (SELECT COUNT(*) FROM LibraryHoliday h
+                   WHERE h.HolidayDate > NEW.DueDate AND h.HolidayDate <= NEW.ReturnDate)
+                - p.GraceDays, 0) * p.DailyRate,
+            COALESCE(p.MaxFine, 1e9)
+        ), 2) AS Amount
+        FROM LibraryItem i
+        JOIN FinePolicy p ON p.ItemType = i.ItemType
+        WHERE i.ItemID = NEW.ItemID
+    ) charge
+    WHERE charge.Amount > 0
+    ON CONFLICT (BorrowID) DO UPDATE
+    SET Amount = excluded.Amount, IssuedDate = excluded.IssuedDate
+    WHERE Fine.Status = 'Unpaid';
 END;
 
 -- Check event capacity before registration
 CREATE TRIGGER check_event_capacity
 BEFORE INSERT ON EventAttendance
+WHEN NEW.AttendanceStatus IS NULL OR NEW.AttendanceStatus != 'Cancelled'
+BEGIN
+    SELECT CASE
+        WHEN (
+            SELECT RegisteredCount >= MaxAttendees
+            FROM Event 
+            WHERE EventID = NEW.EventID
+        )
+        THEN RAISE(ABORT, 'Event has reached maximum capacity')
+    END;
+END;
+
+-- Check event capacity before a cancelled registration is reactivated
+CREATE TRIGGER check_event_capacity_reregister
+BEFORE UPDATE OF AttendanceStatus ON EventAttendance
+WHEN OLD.AttendanceStatus = 'Cancelled' AND NEW.AttendanceStatus != 'Cancelled'
 BEGIN
     SELECT CASE
         WHEN (
-            SELECT COUNT(*) 
-            FROM EventAttendance 
-            WHERE EventID = NEW.EventID AND AttendanceStatus != 'Cancelled'
-        ) >= (
-            SELECT MaxAttendees 
+            SELECT RegisteredCount >= MaxAttendees
             FROM Event 
             WHERE EventID = NEW.EventID
         )
@@ -355,15 +1314,344 @@ BEGIN
     END;
 END;
 
+-- Keep Event.RegisteredCount in step with active registrations
+CREATE TRIGGER event_attendance_insert
+AFTER INSERT ON EventAttendance
+WHEN NEW.AttendanceStatus != 'Cancelled'
+BEGIN
+    UPDATE Event SET RegisteredCount = RegisteredCount + 1 WHERE EventID = NEW.EventID;
+END;
+
+CREATE TRIGGER event_attendance_update
+AFTER UPDATE OF EventID, AttendanceStatus ON EventAttendance
+BEGIN
+    UPDATE Event SET RegisteredCount = RegisteredCount - 1
+    WHERE EventID = OLD.EventID AND OLD.AttendanceStatus != 'Cancelled';
+    UPDATE Event SET RegisteredCount = RegisteredCount + 1
+    WHERE EventID = NEW.EventID AND NEW.AttendanceStatus != 'Cancelled';
+END;
+
+CREATE TRIGGER event_attendance_delete
+AFTER DELETE ON EventAttendance
+WHEN OLD.AttendanceStatus != 'Cancelled'
+BEGIN
+    UPDATE Event SET RegisteredCount = RegisteredCount - 1 WHERE EventID = OLD.EventID;
+END;
+
 -- Indices for performance
 CREATE INDEX idx_libraryitem_status ON LibraryItem(Status);
 CREATE INDEX idx_borrowing_member ON Borrowing(MemberID);
 CREATE INDEX idx_borrowing_item ON Borrowing(ItemID);
 CREATE INDEX idx_borrowing_dates ON Borrowing(BorrowDate, DueDate, ReturnDate);
 CREATE INDEX idx_event_date ON Event(EventDate);
+CREATE INDEX idx_attendance_event ON EventAttendance(EventID, AttendanceStatus);
+
+-- Sort keys for the paged staff listings (the rowid completes each key)
+CREATE INDEX idx_fine_issued ON Fine(IssuedDate);
+CREATE INDEX idx_fine_status_issued ON Fine(Status, IssuedDate);
+CREATE INDEX idx_helprequest_date ON HelpRequest(RequestDate);
+CREATE INDEX idx_helprequest_status_date ON HelpRequest(Status, RequestDate);
+CREATE INDEX idx_acquisition_date ON AcquisitionRequest(RequestDate);
+CREATE INDEX idx_acquisition_status_date ON AcquisitionRequest(Status, RequestDate);
+CREATE INDEX idx_volunteer_start ON Volunteer(StartDate);
 CREATE INDEX idx_fine_status ON Fine(Status);
 """
 
+# Denormalized catalog kept in sync with LibraryItem and its subtypes
+CATALOG_SQL = """-- Unified catalog of all library items
+
+-- One row per LibraryItem with the subtype's creator and genre/category folded in
+CREATE TABLE CatalogEntry (
+    ItemID INTEGER PRIMARY KEY,
+    Title TEXT NOT NULL,
+    ItemType TEXT NOT NULL,
+    Status TEXT,
+    Location TEXT,
+    Creator TEXT,
+    Genre TEXT
+);
+
+CREATE INDEX idx_catalog_type_title ON CatalogEntry(ItemType, Title);
+CREATE INDEX idx_catalog_title ON CatalogEntry(Title);
+
+-- Keep the catalog in sync with LibraryItem
+CREATE TRIGGER catalog_item_insert
+AFTER INSERT ON LibraryItem
+BEGIN
+    INSERT INTO CatalogEntry (ItemID, Title, ItemType, Status, Location)
+    VALUES (NEW.ItemID, NEW.Title, NEW.ItemType, NEW.Status, NEW.Location);
+END;
+
+CREATE TRIGGER catalog_item_update_title
+AFTER UPDATE OF Title, ItemType ON LibraryItem
+BEGIN
+    UPDATE CatalogEntry
+    SET Title = NEW.Title, ItemType = NEW.ItemType
+    WHERE ItemID = NEW.ItemID;
+END;
+
+CREATE TRIGGER catalog_item_update_status
+AFTER UPDATE OF Status, Location ON LibraryItem
+BEGIN
+    UPDATE CatalogEntry
+    SET Status = NEW.Status, Location = NEW.Location
+    WHERE ItemID = NEW.ItemID;
+END;
+
+CREATE TRIGGER catalog_item_delete
+AFTER DELETE ON LibraryItem
+BEGIN
+    DELETE FROM CatalogEntry WHERE ItemID = OLD.ItemID;
+END;
+
+-- Keep creator and genre/category in sync with each subtype
+CREATE TRIGGER catalog_book_insert
+AFTER INSERT ON Book
+BEGIN
+    UPDATE CatalogEntry SET Creator = NEW.Author, Genre = NEW.Genre WHERE ItemID = NEW.ItemID;
+END;
+
+CREATE TRIGGER catalog_book_update
+AFTER UPDATE OF Author, Genre ON Book
+BEGIN
+    UPDATE CatalogEntry SET Creator = NEW.Author, Genre = NEW.Genre WHERE ItemID = NEW.ItemID;
+END;
+
+CREATE TRIGGER catalog_book_delete
+AFTER DELETE ON Book
+BEGIN
+    UPDATE CatalogEntry SET Creator = NULL, Genre = NULL WHERE ItemID = OLD.ItemID;
+END;
+
+CREATE TRIGGER catalog_ebook_insert
+AFTER INSERT ON Ebook
+BEGIN
+    UPDATE CatalogEntry SET Creator = NEW.Author, Genre = NEW.Genre WHERE ItemID = NEW.ItemID;
+END;
+
+CREATE TRIGGER catalog_ebook_update
+AFTER UPDATE OF Author, Genre ON Ebook
+BEGIN
+    UPDATE CatalogEntry SET Creator = NEW.Author, Genre = NEW.Genre WHERE ItemID = NEW.ItemID;
+END;
+
+CREATE TRIGGER catalog_ebook_delete
+AFTER DELETE ON Ebook
+BEGIN
+    UPDATE CatalogEntry SET Creator = NULL, Genre = NULL WHERE ItemID = OLD.ItemID;
+END;
+
+CREATE TRIGGER catalog_magazine_insert
+AFTER INSERT ON Magazine
+BEGIN
+    UPDATE CatalogEntry SET Creator = NEW.Publisher, Genre = NEW.Category WHERE ItemID = NEW.ItemID;
+END;
+
+CREATE TRIGGER catalog_magazine_update
+AFTER UPDATE OF Publisher, Category ON Magazine
+BEGIN
+    UPDATE CatalogEntry SET Creator = NEW.Publisher, Genre = NEW.Category WHERE ItemID = NEW.ItemID;
+END;
+
+CREATE TRIGGER catalog_magazine_delete
+AFTER DELETE ON Magazine
+BEGIN
+    UPDATE CatalogEntry SET Creator = NULL, Genre = NULL WHERE ItemID = OLD.ItemID;
+END;
+
+CREATE TRIGGER catalog_journal_insert
+AFTER INSERT ON Journal
+BEGIN
+    UPDATE CatalogEntry SET Creator = NEW.Publisher, Genre = NEW.Field WHERE ItemID = NEW.ItemID;
+END;
+
+CREATE TRIGGER catalog_journal_update
+AFTER UPDATE OF Publisher, Field ON Journal
+BEGIN
+    UPDATE CatalogEntry SET Creator = NEW.Publisher, Genre = NEW.Field WHERE ItemID = NEW.ItemID;
+END;
+
+CREATE TRIGGER catalog_journal_delete
+AFTER DELETE ON Journal
+BEGIN
+    UPDATE CatalogEntry SET Creator = NULL, Genre = NULL WHERE ItemID = OLD.ItemID;
+END;
+
+CREATE TRIGGER catalog_media_insert
+AFTER INSERT ON Media
+BEGIN
+    UPDATE CatalogEntry SET Creator = NEW.Artist, Genre = NEW.MediaType WHERE ItemID = NEW.ItemID;
+END;
+
+CREATE TRIGGER catalog_media_update
+AFTER UPDATE OF Artist, MediaType ON Media
+BEGIN
+    UPDATE CatalogEntry SET Creator = NEW.Artist, Genre = NEW.MediaType WHERE ItemID = NEW.ItemID;
+END;
+
+CREATE TRIGGER catalog_media_delete
+AFTER DELETE ON Media
+BEGIN
+    UPDATE CatalogEntry SET Creator = NULL, Genre = NULL WHERE ItemID = OLD.ItemID;
+END;
+"""
+
+# Repopulate CatalogEntry from the base tables (used to recover from drift)
+POPULATE_CATALOG_SQL = """
+INSERT INTO CatalogEntry (ItemID, Title, ItemType, Status, Location, Creator, Genre)
+SELECT i.ItemID, i.Title, i.ItemType, i.Status, i.Location,
+       CASE
+           WHEN i.ItemType = 'Book' THEN b.Author
+           WHEN i.ItemType = 'Ebook' THEN e.Author
+           WHEN i.ItemType = 'Magazine' THEN m.Publisher
+           WHEN i.ItemType = 'Journal' THEN j.Publisher
+           WHEN i.ItemType = 'Media' THEN md.Artist
+       END,
+       CASE
+           WHEN i.ItemType = 'Book' THEN b.Genre
+           WHEN i.ItemType = 'Ebook' THEN e.Genre
+           WHEN i.ItemType = 'Magazine' THEN m.Category
+           WHEN i.ItemType = 'Journal' THEN j.Field
+           WHEN i.ItemType = 'Media' THEN md.MediaType
+       END
+FROM LibraryItem i
+LEFT JOIN Book b ON i.ItemID = b.ItemID
+LEFT JOIN Ebook e ON i.ItemID = e.ItemID
+LEFT JOIN Magazine m ON i.ItemID = m.ItemID
+LEFT JOIN Journal j ON i.ItemID = j.ItemID
+LEFT JOIN Media md ON i.ItemID = md.ItemID;
+"""
+
+# Catalog entries for items added with the catalog insert triggers gated off:
+# every item from the given ItemID on that has no entry yet
+IMPORT_CATALOG_SQL = POPULATE_CATALOG_SQL.rstrip().rstrip(";") + """
+WHERE i.ItemID >= ? AND NOT EXISTS (SELECT 1 FROM CatalogEntry c WHERE c.ItemID = i.ItemID);
+"""
+
+# Lets import_items skip the per-row catalog insert triggers. An import
+# inserts a CatalogImport row at the start of each batch transaction and
+# deletes it before COMMIT, so other connections never see it and the
+# triggers keep running for every other writer.
+CATALOG_IMPORT_GATE_SQL = """
+CREATE TABLE IF NOT EXISTS CatalogImport (
+    ImportID INTEGER PRIMARY KEY
+);
+
+DROP TRIGGER IF EXISTS catalog_item_insert;
+CREATE TRIGGER catalog_item_insert
+AFTER INSERT ON LibraryItem
+WHEN NOT EXISTS (SELECT 1 FROM CatalogImport)
+BEGIN
+    INSERT INTO CatalogEntry (ItemID, Title, ItemType, Status, Location)
+    VALUES (NEW.ItemID, NEW.Title, NEW.ItemType, NEW.Status, NEW.Location);
+END;
+
+DROP TRIGGER IF EXISTS catalog_book_insert;
+CREATE TRIGGER catalog_book_insert
+AFTER INSERT ON Book
+WHEN NOT EXISTS (SELECT 1 FROM CatalogImport)
+BEGIN
+    UPDATE CatalogEntry SET Creator = NEW.Author, Genre = NEW.Genre WHERE ItemID = NEW.ItemID;
+END;
+
+DROP TRIGGER IF EXISTS catalog_ebook_insert;
+CREATE TRIGGER catalog_ebook_insert
+AFTER INSERT ON Ebook
+WHEN NOT EXISTS (SELECT 1 FROM CatalogImport)
+BEGIN
+    UPDATE CatalogEntry SET Creator = NEW.Author, Genre = NEW.Genre WHERE ItemID = NEW.ItemID;
+END;
+
+DROP TRIGGER IF EXISTS catalog_magazine_insert;
+CREATE TRIGGER catalog_magazine_insert
+AFTER INSERT ON Magazine
+WHEN NOT EXISTS (SELECT 1 FROM CatalogImport)
+BEGIN
+    UPDATE CatalogEntry SET Creator = NEW.Publisher, Genre = NEW.Category WHERE ItemID = NEW.ItemID;
+END;
+
+DROP TRIGGER IF EXISTS catalog_journal_insert;
+CREATE TRIGGER catalog_journal_insert
+AFTER INSERT ON Journal
+WHEN NOT EXISTS (SELECT 1 FROM CatalogImport)
+BEGIN
+    UPDATE CatalogEntry SET Creator = NEW.Publisher, Genre = NEW.Field WHERE ItemID = NEW.ItemID;
+END;
+
+DROP TRIGGER IF EXISTS catalog_media_insert;
+CREATE TRIGGER catalog_media_insert
+AFTER INSERT ON Media
+WHEN NOT EXISTS (SELECT 1 FROM CatalogImport)
+BEGIN
+    UPDATE CatalogEntry SET Creator = NEW.Artist, Genre = NEW.MediaType WHERE ItemID = NEW.ItemID;
+END;
+"""
+
+# Full-text search index (requires FTS5, so it is created separately from SCHEMA_SQL)
+SEARCH_INDEX_SQL = """-- Full-text search index over item titles and creators
+
+-- External-content index over CatalogEntry, keyed by ItemID
+CREATE VIRTUAL TABLE ItemSearch USING fts5(
+    Title, Creator,
+    content = 'CatalogEntry', content_rowid = 'ItemID',
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+-- Keep the index in sync with CatalogEntry
+CREATE TRIGGER item_search_insert
+AFTER INSERT ON CatalogEntry
+BEGIN
+    INSERT INTO ItemSearch (rowid, Title, Creator) VALUES (NEW.ItemID, NEW.Title, NEW.Creator);
+END;
+
+CREATE TRIGGER item_search_update
+AFTER UPDATE OF Title, Creator ON CatalogEntry
+WHEN OLD.Title IS NOT NEW.Title OR OLD.Creator IS NOT NEW.Creator
+BEGIN
+    INSERT INTO ItemSearch (ItemSearch, rowid, Title, Creator) VALUES ('delete', OLD.ItemID, OLD.Title, OLD.Creator);
+    INSERT INTO ItemSearch (rowid, Title, Creator) VALUES (NEW.ItemID, NEW.Title, NEW.Creator);
+END;
+
+CREATE TRIGGER item_search_delete
+AFTER DELETE ON CatalogEntry
+BEGIN
+    INSERT INTO ItemSearch (ItemSearch, rowid, Title, Creator) VALUES ('delete', OLD.ItemID, OLD.Title, OLD.Creator);
+END;
+"""
+
+# Default fine policy: $0.50 per day late for every item type, no grace
+# period and no cap. Existing rows are kept, so this is safe to re-run.
+FINE_POLICY_SQL = """INSERT OR IGNORE INTO FinePolicy (ItemType, DailyRate, GraceDays, MaxFine) VALUES
+    ('Book', 0.50, 0, NULL),
+    ('Ebook', 0.50, 0, NULL),
+    ('Magazine', 0.50, 0, NULL),
+    ('Journal', 0.50, 0, NULL),
+    ('Media', 0.50, 0, NULL);
+"""
+
+# Composite and partial indexes for the hot query shapes reported by
+# library-app.py --advise-indexes
+INDEX_SQL = """-- Open loans, by member in due-date order and by item
+CREATE INDEX IF NOT EXISTS idx_borrowing_member_open ON Borrowing(MemberID, DueDate)
+    WHERE ReturnDate IS NULL;
+CREATE INDEX IF NOT EXISTS idx_borrowing_item_open ON Borrowing(ItemID)
+    WHERE ReturnDate IS NULL;
+-- Open loans by due date, for the overdue-fine accrual pass
+CREATE INDEX IF NOT EXISTS idx_borrowing_open_due ON Borrowing(DueDate)
+    WHERE ReturnDate IS NULL;
+-- Late returns by return date, for re-pricing fines after a policy change
+CREATE INDEX IF NOT EXISTS idx_borrowing_late_return ON Borrowing(ReturnDate, DueDate, ItemID)
+    WHERE ReturnDate > DueDate;
+
+-- A member's registrations and help requests filtered by status
+CREATE INDEX IF NOT EXISTS idx_attendance_member ON EventAttendance(MemberID, AttendanceStatus);
+CREATE INDEX IF NOT EXISTS idx_helprequest_member ON HelpRequest(MemberID, Status);
+
+-- Event listings ordered by date and start time, optionally by type
+CREATE INDEX IF NOT EXISTS idx_event_date_time ON Event(EventDate, StartTime);
+CREATE INDEX IF NOT EXISTS idx_event_type_date ON Event(EventType, EventDate, StartTime);
+"""
+
 # Sample data SQL (from sample-data.sql)
 SAMPLE_DATA_SQL = """-- Sample data for Library Database
 
@@ -621,8 +1909,582 @@ INSERT INTO HelpRequest (MemberID, StaffID, RequestDate, Description, Status, Re
     (8, 3, '2025-05-28', 'Need assistance with citation formatting for research paper', 'InProgress', NULL, NULL);
 """
 
+# Synthetic data generator settings and vocabulary (initialize-db.py --generate)
+GENERATOR_BATCH_ROWS = 50000
+GENERATOR_COMMIT_ROWS = 2000000
+GENERATOR_CACHE_KIB = 256 * 1024
+LOAN_PERIOD_DAYS = 14
+
+ITEM_TYPE_WEIGHTS = {'Book': 50, 'Ebook': 15, 'Magazine': 10, 'Journal': 10, 'Media': 15}
+ITEM_LOCATIONS = {
+    'Book': 'Shelf', 'Ebook': 'Digital Collection', 'Magazine': 'Periodicals Rack',
+    'Journal': 'Reference Section', 'Media': 'Media Shelf'
+}
+EVENT_TYPES = ('BookClub', 'ArtShow', 'Screening', 'Workshop', 'Other')
+FIRST_NAMES = ('James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda', 'David',
+               'Elizabeth', 'William', 'Barbara', 'Aisha', 'Wei', 'Priya', 'Carlos', 'Fatima', 'Yuki',
+               'Olga', 'Kwame', 'Sofia', 'Mateo', 'Noor', 'Liam')
+LAST_NAMES = ('Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Martinez',
+              'Lopez', 'Wilson', 'Anderson', 'Taylor', 'Thomas', 'Moore', 'Jackson', 'Nguyen', 'Patel',
+              'Kim', 'Chen', 'Okafor', 'Silva', 'Kowalski', 'Haddad')
+STREET_TYPES = ('Street', 'Avenue', 'Road', 'Lane', 'Drive', 'Court')
+TITLE_STARTS = ('The', 'A', 'Beyond the', 'Under the', 'Letters from the', 'Return of the')
+TITLE_ADJECTIVES = ('Silent', 'Hidden', 'Golden', 'Broken', 'Distant', 'Crimson', 'Quiet', 'Endless',
+                    'Forgotten', 'Northern', 'Electric', 'Midnight')
+TITLE_NOUNS = ('River', 'Garden', 'Empire', 'Library', 'Harbor', 'Mountain', 'Letter', 'Machine',
+               'Forest', 'Kingdom', 'Archive', 'Voyage', 'Orchard', 'Signal')
+PUBLISHERS = ('Penguin', 'HarperCollins', 'Macmillan', 'Hachette', 'Simon & Schuster', 'Elsevier',
+              'Springer', 'Wiley', 'Oxford University Press', 'Conde Nast')
+GENRES = ('Fiction', 'Mystery', 'Science Fiction', 'Fantasy', 'Biography', 'History', 'Romance',
+          'Thriller', 'Poetry', 'Science', 'Self-Help', 'Young Adult')
+MAGAZINE_CATEGORIES = ('News', 'Science', 'Fashion', 'Technology', 'Travel', 'Sports', 'Food')
+JOURNAL_FIELDS = ('Medicine', 'Physics', 'Economics', 'Psychology', 'Computer Science', 'Biology')
+STAFF_ROLES = (('Assistant Librarian', 'Reference'), ('Library Technician', 'Circulation'),
+               ('Cataloging Specialist', 'Technical Services'), ('Youth Services Librarian', 'Children'),
+               ('Events Coordinator', 'Programs'))
+STAFF_SCHEDULES = ('Mon-Fri 9AM-5PM', 'Tue-Sat 10AM-6PM', 'Weekends 10AM-4PM', 'Evenings 4PM-9PM')
+VOLUNTEER_SKILLS = ('Shelving and organizing', 'Reading to children', 'Event setup',
+                    'Technology help for seniors', 'Book repair', 'Language tutoring')
+HELP_TOPICS = ('Need help finding a book on local history', 'Cannot access my ebook loan',
+               'Question about a fine on my account', 'Help using the printer',
+               'Request for research assistance', 'Trouble logging in to the catalog')
+
+SUBTYPE_GENERATORS = {
+    'Book': ("ItemID, ISBN, Author, Publisher, Genre, PageCount, Format", generate_books),
+    'Ebook': ("ItemID, ISBN, Author, Publisher, Genre, FileFormat, FileSize", generate_ebooks),
+    'Magazine': ("ItemID, IssueNumber, Publisher, Category, Frequency", generate_magazines),
+    'Journal': ("ItemID, Volume, Issue, Publisher, Field, PeerReviewed", generate_journals),
+    'Media': ("ItemID, MediaType, Artist, Runtime, Format", generate_media),
+}
+
+# Bulk item import (initialize-db.py --import-items): rows per transaction
+# and the values the LibraryItem and subtype constraints accept
+IMPORT_BATCH_ROWS = 5000
+IMPORT_SUBTYPE_COLUMNS = {
+    item_type: tuple(columns.split(", ")[1:]) for item_type, (columns, _) in SUBTYPE_GENERATORS.items()
+}
+IMPORT_COLUMN_NAMES = {
+    column.lower(): column
+    for column in ('Title', 'PublicationDate', 'Status', 'AcquisitionDate', 'Location', 'ItemType')
+    + tuple(column for columns in IMPORT_SUBTYPE_COLUMNS.values() for column in columns)
+}
+IMPORT_STATUSES = ('Available', 'Reserved', 'Maintenance')  # Borrowed is only set by checkouts
+IMPORT_REQUIRED_COLUMNS = {'Book': ('Author',), 'Ebook': ('Author',)}
+IMPORT_COLUMN_CHOICES = {
+    ('Book', 'Format'): ('Hardcover', 'Paperback', 'Other'),
+    ('Media', 'MediaType'): ('CD', 'DVD', 'Record', 'Other'),
+}
+IMPORT_INTEGER_COLUMNS = ('PageCount',)
+IMPORT_BOOLEAN_COLUMNS = ('PeerReviewed',)
+IMPORT_BOOLEAN_VALUES = {'1': 1, 'true': 1, 'yes': 1, 'y': 1, '0': 0, 'false': 0, 'no': 0, 'n': 0}
+
+# Frozen DDL of each migration, as it stood when that version was released.
+# Migrations run these rather than the current SCHEMA_SQL, so a database
+# stopped at any version has a schema that version's code works with.
+# Never edit an entry; change the schema with a new migration instead.
+MIGRATION_SQL = {
+    1: """-- Unified catalog of all library items
+
+-- One row per LibraryItem with the subtype's creator and genre/category folded in
+CREATE TABLE CatalogEntry (
+    ItemID INTEGER PRIMARY KEY,
+    Title TEXT NOT NULL,
+    ItemType TEXT NOT NULL,
+    Status TEXT,
+    Location TEXT,
+    Creator TEXT,
+    Genre TEXT
+);
+
+CREATE INDEX idx_catalog_type_title ON CatalogEntry(ItemType, Title);
+CREATE INDEX idx_catalog_title ON CatalogEntry(Title);
+
+-- Keep the catalog in sync with LibraryItem
+CREATE TRIGGER catalog_item_insert
+AFTER INSERT ON LibraryItem
+BEGIN
+    INSERT INTO CatalogEntry (ItemID, Title, ItemType, Status, Location)
+    VALUES (NEW.ItemID, NEW.Title, NEW.ItemType, NEW.Status, NEW.Location);
+END;
+
+CREATE TRIGGER catalog_item_update_title
+AFTER UPDATE OF Title, ItemType ON LibraryItem
+BEGIN
+    UPDATE CatalogEntry
+    SET Title = NEW.Title, ItemType = NEW.ItemType
+    WHERE ItemID = NEW.ItemID;
+END;
+
+CREATE TRIGGER catalog_item_update_status
+AFTER UPDATE OF Status, Location ON LibraryItem
+BEGIN
+    UPDATE CatalogEntry
+    SET Status = NEW.Status, Location = NEW.Location
+    WHERE ItemID = NEW.ItemID;
+END;
+
+CREATE TRIGGER catalog_item_delete
+AFTER DELETE ON LibraryItem
+BEGIN
+    DELETE FROM CatalogEntry WHERE ItemID = OLD.ItemID;
+END;
+
+-- Keep creator and genre/category in sync with each subtype
+CREATE TRIGGER catalog_book_insert
+AFTER INSERT ON Book
+BEGIN
+    UPDATE CatalogEntry SET Creator = NEW.Author, Genre = NEW.Genre WHERE ItemID = NEW.ItemID;
+END;
+
+CREATE TRIGGER catalog_book_update
+AFTER UPDATE OF Author, Genre ON Book
+BEGIN
+    UPDATE CatalogEntry SET Creator = NEW.Author, Genre = NEW.Genre WHERE ItemID = NEW.ItemID;
+END;
+
+CREATE TRIGGER catalog_book_delete
+AFTER DELETE ON Book
+BEGIN
+    UPDATE CatalogEntry SET Creator = NULL, Genre = NULL WHERE ItemID = OLD.ItemID;
+END;
+
+CREATE TRIGGER catalog_ebook_insert
+AFTER INSERT ON Ebook
+BEGIN
+    UPDATE CatalogEntry SET Creator = NEW.Author, Genre = NEW.Genre WHERE ItemID = NEW.ItemID;
+END;
+
+CREATE TRIGGER catalog_ebook_update
+AFTER UPDATE OF Author, Genre ON Ebook
+BEGIN
+    UPDATE CatalogEntry SET Creator = NEW.Author, Genre = NEW.Genre WHERE ItemID = NEW.ItemID;
+END;
+
+CREATE TRIGGER catalog_ebook_delete
+AFTER DELETE ON Ebook
+BEGIN
+    UPDATE CatalogEntry SET Creator = NULL, Genre = NULL WHERE ItemID = OLD.ItemID;
+END;
+
+CREATE TRIGGER catalog_magazine_insert
+AFTER INSERT ON Magazine
+BEGIN
+    UPDATE CatalogEntry SET Creator = NEW.Publisher, Genre = NEW.Category WHERE ItemID = NEW.ItemID;
+END;
+
+CREATE TRIGGER catalog_magazine_update
+AFTER UPDATE OF Publisher, Category ON Magazine
+BEGIN
+    UPDATE CatalogEntry SET Creator = NEW.Publisher, Genre = NEW.Category WHERE ItemID = NEW.ItemID;
+END;
+
+CREATE TRIGGER catalog_magazine_delete
+AFTER DELETE ON Magazine
+BEGIN
+    UPDATE CatalogEntry SET Creator = NULL, Genre = NULL WHERE ItemID = OLD.ItemID;
+END;
+
+CREATE TRIGGER catalog_journal_insert
+AFTER INSERT ON Journal
+BEGIN
+    UPDATE CatalogEntry SET Creator = NEW.Publisher, Genre = NEW.Field WHERE ItemID = NEW.ItemID;
+END;
+
+CREATE TRIGGER catalog_journal_update
+AFTER UPDATE OF Publisher, Field ON Journal
+BEGIN
+    UPDATE CatalogEntry SET Creator = NEW.Publisher, Genre = NEW.Field WHERE ItemID = NEW.ItemID;
+END;
+
+CREATE TRIGGER catalog_journal_delete
+AFTER DELETE ON Journal
+BEGIN
+    UPDATE CatalogEntry SET Creator = NULL, Genre = NULL WHERE ItemID = OLD.ItemID;
+END;
+
+CREATE TRIGGER catalog_media_insert
+AFTER INSERT ON Media
+BEGIN
+    UPDATE CatalogEntry SET Creator = NEW.Artist, Genre = NEW.MediaType WHERE ItemID = NEW.ItemID;
+END;
+
+CREATE TRIGGER catalog_media_update
+AFTER UPDATE OF Artist, MediaType ON Media
+BEGIN
+    UPDATE CatalogEntry SET Creator = NEW.Artist, Genre = NEW.MediaType WHERE ItemID = NEW.ItemID;
+END;
+
+CREATE TRIGGER catalog_media_delete
+AFTER DELETE ON Media
+BEGIN
+    UPDATE CatalogEntry SET Creator = NULL, Genre = NULL WHERE ItemID = OLD.ItemID;
+END;
+
+INSERT INTO CatalogEntry (ItemID, Title, ItemType, Status, Location, Creator, Genre)
+SELECT i.ItemID, i.Title, i.ItemType, i.Status, i.Location,
+       CASE
+           WHEN i.ItemType = 'Book' THEN b.Author
+           WHEN i.ItemType = 'Ebook' THEN e.Author
+           WHEN i.ItemType = 'Magazine' THEN m.Publisher
+           WHEN i.ItemType = 'Journal' THEN j.Publisher
+           WHEN i.ItemType = 'Media' THEN md.Artist
+       END,
+       CASE
+           WHEN i.ItemType = 'Book' THEN b.Genre
+           WHEN i.ItemType = 'Ebook' THEN e.Genre
+           WHEN i.ItemType = 'Magazine' THEN m.Category
+           WHEN i.ItemType = 'Journal' THEN j.Field
+           WHEN i.ItemType = 'Media' THEN md.MediaType
+       END
+FROM LibraryItem i
+LEFT JOIN Book b ON i.ItemID = b.ItemID
+LEFT JOIN Ebook e ON i.ItemID = e.ItemID
+LEFT JOIN Magazine m ON i.ItemID = m.ItemID
+LEFT JOIN Journal j ON i.ItemID = j.ItemID
+LEFT JOIN Media md ON i.ItemID = md.ItemID;
+""",
+    2: """-- Full-text search index over item titles and creators
+
+-- External-content index over CatalogEntry, keyed by ItemID
+CREATE VIRTUAL TABLE ItemSearch USING fts5(
+    Title, Creator,
+    content = 'CatalogEntry', content_rowid = 'ItemID',
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+-- Keep the index in sync with CatalogEntry
+CREATE TRIGGER item_search_insert
+AFTER INSERT ON CatalogEntry
+BEGIN
+    INSERT INTO ItemSearch (rowid, Title, Creator) VALUES (NEW.ItemID, NEW.Title, NEW.Creator);
+END;
+
+CREATE TRIGGER item_search_update
+AFTER UPDATE OF Title, Creator ON CatalogEntry
+WHEN OLD.Title IS NOT NEW.Title OR OLD.Creator IS NOT NEW.Creator
+BEGIN
+    INSERT INTO ItemSearch (ItemSearch, rowid, Title, Creator) VALUES ('delete', OLD.ItemID, OLD.Title, OLD.Creator);
+    INSERT INTO ItemSearch (rowid, Title, Creator) VALUES (NEW.ItemID, NEW.Title, NEW.Creator);
+END;
+
+CREATE TRIGGER item_search_delete
+AFTER DELETE ON CatalogEntry
+BEGIN
+    INSERT INTO ItemSearch (ItemSearch, rowid, Title, Creator) VALUES ('delete', OLD.ItemID, OLD.Title, OLD.Creator);
+END;
+""",
+    3: """
+DROP TRIGGER IF EXISTS create_fine_for_late_return;
+CREATE TRIGGER create_fine_for_late_return
+AFTER UPDATE ON Borrowing
+WHEN NEW.ReturnDate IS NOT NULL AND OLD.ReturnDate IS NULL AND NEW.ReturnDate > NEW.DueDate
+BEGIN
+    INSERT INTO Fine (BorrowID, Amount, Status, IssuedDate)
+    VALUES (
+        NEW.BorrowID,
+        -- $0.50 per day late
+        (julianday(NEW.ReturnDate) - julianday(NEW.DueDate)) * 0.50,
+        'Unpaid',
+        NEW.ReturnDate
+    )
+    ON CONFLICT (BorrowID) DO UPDATE
+    SET Amount = excluded.Amount, IssuedDate = excluded.IssuedDate
+    WHERE Fine.Status = 'Unpaid';
+END;
+""",
+    4: """
+DROP TRIGGER IF EXISTS check_event_capacity;
+CREATE TRIGGER check_event_capacity
+BEFORE INSERT ON EventAttendance
+WHEN NEW.AttendanceStatus IS NULL OR NEW.AttendanceStatus != 'Cancelled'
+BEGIN
+    SELECT CASE
+        WHEN (
+            SELECT RegisteredCount >= MaxAttendees
+            FROM Event 
+            WHERE EventID = NEW.EventID
+        )
+        THEN RAISE(ABORT, 'Event has reached maximum capacity')
+    END;
+END;
+
+DROP TRIGGER IF EXISTS check_event_capacity_reregister;
+CREATE TRIGGER check_event_capacity_reregister
+BEFORE UPDATE OF AttendanceStatus ON EventAttendance
+WHEN OLD.AttendanceStatus = 'Cancelled' AND NEW.AttendanceStatus != 'Cancelled'
+BEGIN
+    SELECT CASE
+        WHEN (
+            SELECT RegisteredCount >= MaxAttendees
+            FROM Event 
+            WHERE EventID = NEW.EventID
+        )
+        THEN RAISE(ABORT, 'Event has reached maximum capacity')
+    END;
+END;
+
+DROP TRIGGER IF EXISTS event_attendance_insert;
+CREATE TRIGGER event_attendance_insert
+AFTER INSERT ON EventAttendance
+WHEN NEW.AttendanceStatus != 'Cancelled'
+BEGIN
+    UPDATE Event SET RegisteredCount = RegisteredCount + 1 WHERE EventID = NEW.EventID;
+END;
+
+DROP TRIGGER IF EXISTS event_attendance_update;
+CREATE TRIGGER event_attendance_update
+AFTER UPDATE OF EventID, AttendanceStatus ON EventAttendance
+BEGIN
+    UPDATE Event SET RegisteredCount = RegisteredCount - 1
+    WHERE EventID = OLD.EventID AND OLD.AttendanceStatus != 'Cancelled';
+    UPDATE Event SET RegisteredCount = RegisteredCount + 1
+    WHERE EventID = NEW.EventID AND NEW.AttendanceStatus != 'Cancelled';
+END;
+
+DROP TRIGGER IF EXISTS event_attendance_delete;
+CREATE TRIGGER event_attendance_delete
+AFTER DELETE ON EventAttendance
+WHEN OLD.AttendanceStatus != 'Cancelled'
+BEGIN
+    UPDATE Event SET RegisteredCount = RegisteredCount - 1 WHERE EventID = OLD.EventID;
+END;
+
+CREATE INDEX IF NOT EXISTS idx_attendance_event ON EventAttendance(EventID, AttendanceStatus);
+""",
+    5: """
+CREATE INDEX IF NOT EXISTS idx_fine_issued ON Fine(IssuedDate);
+CREATE INDEX IF NOT EXISTS idx_fine_status_issued ON Fine(Status, IssuedDate);
+CREATE INDEX IF NOT EXISTS idx_helprequest_date ON HelpRequest(RequestDate);
+CREATE INDEX IF NOT EXISTS idx_helprequest_status_date ON HelpRequest(Status, RequestDate);
+CREATE INDEX IF NOT EXISTS idx_acquisition_date ON AcquisitionRequest(RequestDate);
+CREATE INDEX IF NOT EXISTS idx_acquisition_status_date ON AcquisitionRequest(Status, RequestDate);
+CREATE INDEX IF NOT EXISTS idx_volunteer_start ON Volunteer(StartDate);
+""",
+    6: """
+CREATE INDEX IF NOT EXISTS idx_borrowing_member_open ON Borrowing(MemberID, DueDate)
+    WHERE ReturnDate IS NULL;
+CREATE INDEX IF NOT EXISTS idx_borrowing_item_open ON Borrowing(ItemID)
+    WHERE ReturnDate IS NULL;
+CREATE INDEX IF NOT EXISTS idx_attendance_member ON EventAttendance(MemberID, AttendanceStatus);
+CREATE INDEX IF NOT EXISTS idx_helprequest_member ON HelpRequest(MemberID, Status);
+CREATE INDEX IF NOT EXISTS idx_event_date_time ON Event(EventDate, StartTime);
+CREATE INDEX IF NOT EXISTS idx_event_type_date ON Event(EventType, EventDate, StartTime);
+""",
+    7: """
+CREATE TABLE IF NOT EXISTS FineAccrualRun (
+    RunID INTEGER PRIMARY KEY AUTOINCREMENT,
+    AsOfDate DATE NOT NULL,
+    StartedAt DATETIME NOT NULL,
+    FinishedAt DATETIME NOT NULL,
+    FinesAdded INTEGER NOT NULL DEFAULT 0,
+    FinesUpdated INTEGER NOT NULL DEFAULT 0
+);
+""",
+    8: """
+CREATE INDEX IF NOT EXISTS idx_borrowing_open_due ON Borrowing(DueDate)
+    WHERE ReturnDate IS NULL;
+""",
+    9: """
+CREATE TABLE IF NOT EXISTS FinePolicy (
+    ItemType TEXT PRIMARY KEY CHECK (ItemType IN ('Book', 'Ebook', 'Magazine', 'Journal', 'Media')),
+    DailyRate DECIMAL(10,2) NOT NULL CHECK (DailyRate >= 0),
+    GraceDays INTEGER NOT NULL DEFAULT 0 CHECK (GraceDays >= 0),
+    MaxFine DECIMAL(10,2) CHECK (MaxFine IS NULL OR MaxFine >= 0)
+);
+
+CREATE TABLE IF NOT EXISTS LibraryHoliday (
+    HolidayDate DATE PRIMARY KEY,
+    Name TEXT
+);
+
+INSERT OR IGNORE INTO FinePolicy (ItemType, DailyRate, GraceDays, MaxFine) VALUES
+    ('Book', 0.50, 0, NULL),
+    ('Ebook', 0.50, 0, NULL),
+    ('Magazine', 0.50, 0, NULL),
+    ('Journal', 0.50, 0, NULL),
+    ('Media', 0.50, 0, NULL);
+
+DROP TRIGGER IF EXISTS create_fine_for_late_return;
+CREATE TRIGGER create_fine_for_late_return
+AFTER UPDATE ON Borrowing
+WHEN NEW.ReturnDate IS NOT NULL AND OLD.ReturnDate IS NULL AND NEW.ReturnDate > NEW.DueDate
+BEGIN
+    INSERT INTO Fine (BorrowID, Amount, Status, IssuedDate)
+    SELECT NEW.BorrowID, charge.Amount, 'Unpaid', NEW.ReturnDate
+    FROM (
+        -- Priced by the item type's FinePolicy; the same formula as FinePolicy.amounts
+        SELECT ROUND(MIN(
+            MAX(julianday(NEW.ReturnDate) - julianday(NEW.DueDate)
+                - (SELECT COUNT(*) FROM LibraryHoliday h
+                   WHERE h.HolidayDate > NEW.DueDate AND h.HolidayDate <= NEW.ReturnDate)
+                - p.GraceDays, 0) * p.DailyRate,
+            COALESCE(p.MaxFine, 1e9)
+        ), 2) AS Amount
+        FROM LibraryItem i
+        JOIN FinePolicy p ON p.ItemType = i.ItemType
+        WHERE i.ItemID = NEW.ItemID
+    ) charge
+    WHERE charge.Amount > 0
+    ON CONFLICT (BorrowID) DO UPDATE
+    SET Amount = excluded.Amount, IssuedDate = excluded.IssuedDate
+    WHERE Fine.Status = 'Unpaid';
+END;
+""",
+    10: """
+CREATE INDEX IF NOT EXISTS idx_borrowing_late_return ON Borrowing(ReturnDate, DueDate, ItemID)
+    WHERE ReturnDate > DueDate;
+""",
+    12: """
+CREATE TABLE IF NOT EXISTS CatalogImport (
+    ImportID INTEGER PRIMARY KEY
+);
+
+DROP TRIGGER IF EXISTS catalog_item_insert;
+CREATE TRIGGER catalog_item_insert
+AFTER INSERT ON LibraryItem
+WHEN NOT EXISTS (SELECT 1 FROM CatalogImport)
+BEGIN
+    INSERT INTO CatalogEntry (ItemID, Title, ItemType, Status, Location)
+    VALUES (NEW.ItemID, NEW.Title, NEW.ItemType, NEW.Status, NEW.Location);
+END;
+
+DROP TRIGGER IF EXISTS catalog_book_insert;
+CREATE TRIGGER catalog_book_insert
+AFTER INSERT ON Book
+WHEN NOT EXISTS (SELECT 1 FROM CatalogImport)
+BEGIN
+    UPDATE CatalogEntry SET Creator = NEW.Author, Genre = NEW.Genre WHERE ItemID = NEW.ItemID;
+END;
+
+DROP TRIGGER IF EXISTS catalog_ebook_insert;
+CREATE TRIGGER catalog_ebook_insert
+AFTER INSERT ON Ebook
+WHEN NOT EXISTS (SELECT 1 FROM CatalogImport)
+BEGIN
+    UPDATE CatalogEntry SET Creator = NEW.Author, Genre = NEW.Genre WHERE ItemID = NEW.ItemID;
+END;
+
+DROP TRIGGER IF EXISTS catalog_magazine_insert;
+CREATE TRIGGER catalog_magazine_insert
+AFTER INSERT ON Magazine
+WHEN NOT EXISTS (SELECT 1 FROM CatalogImport)
+BEGIN
+    UPDATE CatalogEntry SET Creator = NEW.Publisher, Genre = NEW.Category WHERE ItemID = NEW.ItemID;
+END;
+
+DROP TRIGGER IF EXISTS catalog_journal_insert;
+CREATE TRIGGER catalog_journal_insert
+AFTER INSERT ON Journal
+WHEN NOT EXISTS (SELECT 1 FROM CatalogImport)
+BEGIN
+    UPDATE CatalogEntry SET Creator = NEW.Publisher, Genre = NEW.Field WHERE ItemID = NEW.ItemID;
+END;
+
+DROP TRIGGER IF EXISTS catalog_media_insert;
+CREATE TRIGGER catalog_media_insert
+AFTER INSERT ON Media
+WHEN NOT EXISTS (SELECT 1 FROM CatalogImport)
+BEGIN
+    UPDATE CatalogEntry SET Creator = NEW.Artist, Genre = NEW.MediaType WHERE ItemID = NEW.ItemID;
+END;
+
+-- Earlier importers dropped the catalog insert triggers for the load; one
+-- killed mid-import left them missing and its items out of the catalog
+INSERT INTO CatalogEntry (ItemID, Title, ItemType, Status, Location, Creator, Genre)
+SELECT i.ItemID, i.Title, i.ItemType, i.Status, i.Location,
+       CASE
+           WHEN i.ItemType = 'Book' THEN b.Author
+           WHEN i.ItemType = 'Ebook' THEN e.Author
+           WHEN i.ItemType = 'Magazine' THEN m.Publisher
+           WHEN i.ItemType = 'Journal' THEN j.Publisher
+           WHEN i.ItemType = 'Media' THEN md.Artist
+       END,
+       CASE
+           WHEN i.ItemType = 'Book' THEN b.Genre
+           WHEN i.ItemType = 'Ebook' THEN e.Genre
+           WHEN i.ItemType = 'Magazine' THEN m.Category
+           WHEN i.ItemType = 'Journal' THEN j.Field
+           WHEN i.ItemType = 'Media' THEN md.MediaType
+       END
+FROM LibraryItem i
+LEFT JOIN Book b ON i.ItemID = b.ItemID
+LEFT JOIN Ebook e ON i.ItemID = e.ItemID
+LEFT JOIN Magazine m ON i.ItemID = m.ItemID
+LEFT JOIN Journal j ON i.ItemID = j.ItemID
+LEFT JOIN Media md ON i.ItemID = md.ItemID
+WHERE NOT EXISTS (SELECT 1 FROM CatalogEntry c WHERE c.ItemID = i.ItemID);
+""",
+}
+
+# Ordered schema migrations: (version, description, function, online).
+# Each function is idempotent. Offline migrations run inside one
+# BEGIN IMMEDIATE transaction together with the user_version bump; online
+# ones only build indexes and commit each statement separately.
+MIGRATIONS = [
+    (1, "Unified catalog table", migrate_catalog, False),
+    (2, "Full-text search index", migrate_search_index, False),
+    (3, "Upserting late-fine trigger", migrate_fine_trigger, False),
+    (4, "Event registration counters", migrate_event_counters, False),
+    (5, "Paged listing indexes", migrate_listing_indexes, True),
+    (6, "Composite and partial query indexes", migrate_query_indexes, True),
+    (7, "Overdue-fine accrual log", migrate_fine_accrual, False),
+    (8, "Open-loan due-date index", migrate_accrual_index, True),
+    (9, "Fine policy and holiday calendar", migrate_fine_policy, False),
+    (10, "Late-return index", migrate_repricing_index, True),
+    (11, "Staff passwords", migrate_staff_passwords, False),
+    (12, "Gated catalog insert triggers for bulk imports", migrate_catalog_import_gate, False),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
 def main():
     """Main function"""
+    global DB_FILE
+    parser = argparse.ArgumentParser(description="Initialize or maintain the library database")
+    parser.add_argument("--rebuild-catalog", action="store_true",
+                        help="rebuild CatalogEntry and the search index from the base tables")
+    parser.add_argument("--migrate", action="store_true",
+                        help="upgrade an existing database in place to the current schema version")
+    parser.add_argument("--generate", action="store_true",
+                        help="build a new database with the sample data plus synthetic volumes")
+    parser.add_argument("--db", default=DB_FILE,
+                        help=f"database file to use (default: {DB_FILE})")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for --generate")
+    parser.add_argument("--members", type=int, default=10000, help="members to generate")
+    parser.add_argument("--items", type=int, default=50000, help="library items to generate")
+    parser.add_argument("--borrowings", type=int, default=500000, help="borrowings to generate")
+    parser.add_argument("--events", type=int, default=2000, help="events to generate")
+    parser.add_argument("--import-items", nargs="+", metavar="FILE",
+                        help="bulk-load library items from CSV or JSON Lines files")
+    parser.add_argument("--rejects", default="import-rejects.jsonl",
+                        help="where --import-items writes rejected rows (default: import-rejects.jsonl)")
+    parser.add_argument("--batch-rows", type=int, default=IMPORT_BATCH_ROWS,
+                        help=f"rows per --import-items transaction (default: {IMPORT_BATCH_ROWS})")
+    args = parser.parse_args()
+    
+    DB_FILE = args.db
+    
+    if args.generate:
+        volumes = {
+            'members': args.members,
+            'items': args.items,
+            'borrowings': args.borrowings,
+            'events': args.events
+        }
+        generate_database(volumes, args.seed)
+        return
+    
+    if args.rebuild_catalog:
+        rebuild_catalog()
+        return
+        
+    if args.migrate:
+        migrate_database()
+        return
+        
+    if args.import_items:
+        import_items(args.import_items, args.rejects, args.batch_rows)
+        return
+        
     extract_schema_sql()
     extract_sample_data_sql()
     initialize_database()
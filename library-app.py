@@ -3,57 +3,2409 @@
 
 import sqlite3
 import os
+import argparse
+import json
+import re
 import datetime
 import sys
 import time
+import queue
+import threading
+import functools
+import weakref
+import math
+import hashlib
+import hmac
+import logging
+from logging.handlers import RotatingFileHandler
+from urllib.parse import quote
+from bisect import bisect_right
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from contextlib import contextmanager
 from getpass import getpass
+from typing import NamedTuple, Optional
 from tabulate import tabulate
 
+try:
+    import numpy as np
+except ImportError:  # Optional: FinePolicy.amounts falls back to a per-row loop
+    np = None
+
 # Database configuration
 DB_FILE = "library.db"
 
-class LibrarySystem:
-    def __init__(self, db_file):
-        """Initialize the library system with database connection"""
+# Circulation policy
+LOAN_PERIOD_DAYS = 14
+
+# Late returns repriced per batch by LibraryService.reprice_fines
+REPRICE_CHUNK_ROWS = 50000
+
+# Subtype columns accepted by LibraryService.add_item, in insert order
+ITEM_SUBTYPE_COLUMNS = {
+    'Book': ('Author', 'Publisher', 'Genre', 'PageCount', 'Format'),
+    'Ebook': ('Author', 'Publisher', 'Genre', 'FileFormat'),
+    'Magazine': ('IssueNumber', 'Publisher', 'Category'),
+    'Journal': ('Volume', 'Issue', 'Publisher', 'Field', 'PeerReviewed'),
+    'Media': ('MediaType', 'Artist', 'Runtime', 'Format')
+}
+
+# Connection pool configuration
+POOL_SIZE = 8
+POOL_TIMEOUT_SECONDS = 30  # Longest wait for a free connection before PoolTimeout
+BUSY_TIMEOUT_MS = 5000
+STATEMENT_CACHE_SIZE = 256  # Prepared statements kept per connection
+
+# Group commit: writes that arrive within the window (up to a full batch)
+# share one transaction, so they pay for one commit instead of one each
+GROUP_COMMIT_WINDOW_MS = 2
+GROUP_COMMIT_MAX_BATCH = 64
+GROUP_COMMIT_SYNCHRONOUS = "FULL"  # The writer syncs every group commit to disk
+
+# Reporting mode: long staff reports read a read-only copy of the database,
+# taken with the backup API and refreshed once it is older than this
+REPORT_SNAPSHOT_MAX_AGE = 300  # seconds
+
+# Rows shown per page in the staff listing screens
+PAGE_SIZE = 20
+
+# Member account screen cache: summaries kept per member, evicted least
+# recently used first and reloaded after DASHBOARD_CACHE_TTL seconds, which
+# also bounds how stale a summary can get from another process's writes
+DASHBOARD_CACHE_SIZE = 1024
+DASHBOARD_CACHE_TTL = 30
+
+# Password hashing. scrypt costs about 50 ms per hash at these settings;
+# raise them over time and stored hashes are upgraded at the next login.
+# PBKDF2 is used where hashlib lacks scrypt.
+PASSWORD_KDF = "scrypt" if hasattr(hashlib, "scrypt") else "pbkdf2_sha256"
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+PBKDF2_ITERATIONS = 600000
+PASSWORD_SALT_BYTES = 16
+
+# Successful logins remembered per account, so a desk logging the same
+# account in again within the window skips the KDF
+LOGIN_CACHE_SIZE = 4096
+LOGIN_CACHE_TTL = 15 * 60  # seconds
+
+# Streaming reports read this many rows per fetchmany and size their
+# columns from the first STREAM_SAMPLE_ROWS rows
+STREAM_CHUNK_ROWS = 500
+STREAM_SAMPLE_ROWS = 200
+
+# Query instrumentation (enable by setting LIBRARY_SLOW_QUERY_MS)
+SLOW_QUERY_LOG = "slow_queries.log"
+SLOW_QUERY_LOG_BYTES = 1024 * 1024
+SLOW_QUERY_LOG_BACKUPS = 5
+RECENT_QUERY_HISTORY = 500
+
+# The fine for loan b, due on b.DueDate, as of :as_of under its item type's
+# FinePolicy p: days late less holidays and grace, at the daily rate, capped.
+# The create_fine_for_late_return trigger and FinePolicy.amounts use the
+# same formula.
+FINE_CHARGE_SQL = """ROUND(MIN(
+            MAX(julianday(:as_of) - julianday(b.DueDate)
+                - (SELECT COUNT(*) FROM LibraryHoliday h
+                   WHERE h.HolidayDate > b.DueDate AND h.HolidayDate <= :as_of)
+                - p.GraceDays, 0) * p.DailyRate,
+            COALESCE(p.MaxFine, 1e9)
+        ), 2)"""
+
+# Named registry of the statements issued most often at the desk.
+# Keeping one copy of each SQL string lets every pooled connection
+# parse and plan it once and reuse it from the statement cache.
+STATEMENTS = {
+    'member_login': "SELECT * FROM Member WHERE Email = ?",
+    'staff_by_email': "SELECT * FROM Staff WHERE Email = ?",
+    # Compare-and-set, so a password changed since the login read is kept
+    'rehash_member_password': "UPDATE Member SET Password = ? WHERE MemberID = ? AND Password = ?",
+    'rehash_staff_password': "UPDATE Staff SET Password = ? WHERE StaffID = ? AND Password = ?",
+    'set_staff_password': "UPDATE Staff SET Password = ? WHERE StaffID = ?",
+    'member_by_email': "SELECT MemberID, FirstName, LastName, Email FROM Member WHERE Email = ?",
+    'search_items_fts': """
+        SELECT c.ItemID, c.Title, c.Status, c.ItemType, c.Location, c.Creator
+        FROM ItemSearch s
+        JOIN CatalogEntry c ON c.ItemID = s.rowid
+        WHERE ItemSearch MATCH ?
+        ORDER BY s.rank, c.Title
+        LIMIT ?
+    """,
+    'search_title_like': """
+        SELECT ItemID, Title, Status, ItemType, Location, Creator
+        FROM CatalogEntry
+        WHERE Title LIKE ?
+        ORDER BY Title
+        LIMIT ?
+    """,
+    'search_creator_like': """
+        SELECT ItemID, Title, Status, ItemType, Location, Creator
+        FROM CatalogEntry
+        WHERE Creator LIKE ?
+        ORDER BY Title
+        LIMIT ?
+    """,
+    'catalog_by_type': """
+        SELECT ItemID, Title, Status, ItemType, Location, Creator
+        FROM CatalogEntry
+        WHERE ItemType = ?
+        ORDER BY Title
+        LIMIT ?
+    """,
+    'item_by_id': "SELECT * FROM LibraryItem WHERE ItemID = ?",
+    'insert_library_item': """
+        INSERT INTO LibraryItem (Title, PublicationDate, Status, ItemType)
+        VALUES (?, ?, 'Available', ?)
+    """,
+    'insert_book': """
+        INSERT INTO Book (ItemID, Author, Publisher, Genre, PageCount, Format)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """,
+    'insert_ebook': """
+        INSERT INTO Ebook (ItemID, Author, Publisher, Genre, FileFormat)
+        VALUES (?, ?, ?, ?, ?)
+    """,
+    'insert_magazine': """
+        INSERT INTO Magazine (ItemID, IssueNumber, Publisher, Category)
+        VALUES (?, ?, ?, ?)
+    """,
+    'insert_journal': """
+        INSERT INTO Journal (ItemID, Volume, Issue, Publisher, Field, PeerReviewed)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """,
+    'insert_media': """
+        INSERT INTO Media (ItemID, MediaType, Artist, Runtime, Format)
+        VALUES (?, ?, ?, ?, ?)
+    """,
+    'items_for_checkout': """
+        SELECT i.ItemID, i.Title, i.Status,
+               EXISTS (
+                   SELECT 1 FROM Borrowing b
+                   WHERE b.ItemID = i.ItemID AND b.MemberID = ? AND b.ReturnDate IS NULL
+               ) as AlreadyBorrowed
+        FROM LibraryItem i
+        WHERE i.ItemID IN (SELECT value FROM json_each(?))
+    """,
+    'insert_borrowing': """
+        INSERT INTO Borrowing (MemberID, ItemID, BorrowDate, DueDate)
+        VALUES (?, ?, ?, ?)
+    """,
+    'member_active_borrowings': """
+        SELECT b.BorrowID, i.ItemID, i.Title, i.ItemType, b.BorrowDate, b.DueDate
+        FROM Borrowing b
+        JOIN LibraryItem i ON b.ItemID = i.ItemID
+        WHERE b.MemberID = ? AND b.ReturnDate IS NULL
+        ORDER BY b.DueDate
+    """,
+    'return_borrowing': """
+        UPDATE Borrowing
+        SET ReturnDate = ?, StaffID = COALESCE(?, StaffID)
+        WHERE BorrowID = ? AND ReturnDate IS NULL
+          AND (? IS NULL OR MemberID = ?)
+    """,
+    'return_summary': """
+        SELECT b.MemberID, b.DueDate, b.ReturnDate,
+               CAST(MAX(julianday(b.ReturnDate) - julianday(b.DueDate), 0) AS INTEGER) as DaysLate,
+               f.Amount as FineAmount
+        FROM Borrowing b
+        LEFT JOIN Fine f ON b.BorrowID = f.BorrowID AND f.Status = 'Unpaid'
+        WHERE b.BorrowID = ?
+    """,
+    'upcoming_events': """
+        SELECT e.EventID, e.Title, e.EventType, e.EventDate, e.StartTime, e.EndTime, 
+               e.MaxAttendees, e.TargetAudience, r.RoomName,
+               e.RegisteredCount as RegisteredAttendees
+        FROM Event e
+        JOIN Room r ON e.RoomID = r.RoomID
+        WHERE e.EventDate >= ?
+        ORDER BY e.EventDate, e.StartTime
+    """,
+    'upcoming_events_by_type': """
+        SELECT e.EventID, e.Title, e.EventType, e.EventDate, e.StartTime, e.EndTime, 
+               e.MaxAttendees, e.TargetAudience, r.RoomName,
+               e.RegisteredCount as RegisteredAttendees
+        FROM Event e
+        JOIN Room r ON e.RoomID = r.RoomID
+        WHERE e.EventType = ? AND e.EventDate >= ?
+        ORDER BY e.EventDate, e.StartTime
+    """,
+    'upcoming_events_by_title': """
+        SELECT e.EventID, e.Title, e.EventType, e.EventDate, e.StartTime, e.EndTime, 
+               e.MaxAttendees, e.TargetAudience, r.RoomName,
+               e.RegisteredCount as RegisteredAttendees
+        FROM Event e
+        JOIN Room r ON e.RoomID = r.RoomID
+        WHERE e.Title LIKE ? AND e.EventDate >= ?
+        ORDER BY e.EventDate, e.StartTime
+    """,
+    'events_in_range': """
+        SELECT e.EventID, e.Title, e.EventType, e.EventDate, e.StartTime, e.EndTime, 
+               e.MaxAttendees, e.TargetAudience, r.RoomName,
+               e.RegisteredCount as RegisteredAttendees
+        FROM Event e
+        JOIN Room r ON e.RoomID = r.RoomID
+        WHERE e.EventDate BETWEEN ? AND ?
+        ORDER BY e.EventDate, e.StartTime
+    """,
+    'event_with_count': """
+        SELECT e.*, r.RoomName,
+               e.RegisteredCount as RegisteredAttendees
+        FROM Event e
+        JOIN Room r ON e.RoomID = r.RoomID
+        WHERE e.EventID = ?
+    """,
+    'member_event_attendance': """
+        SELECT * FROM EventAttendance 
+        WHERE EventID = ? AND MemberID = ?
+    """,
+    'reregister_attendance': """
+        UPDATE EventAttendance
+        SET AttendanceStatus = 'Registered', RegistrationDate = ?
+        WHERE EventID = ? AND MemberID = ?
+    """,
+    'insert_attendance': """
+        INSERT INTO EventAttendance (EventID, MemberID, RegistrationDate, AttendanceStatus)
+        VALUES (?, ?, ?, 'Registered')
+    """,
+    'attendance_detail': """
+        SELECT a.*, m.FirstName || ' ' || m.LastName as MemberName
+        FROM EventAttendance a
+        JOIN Member m ON a.MemberID = m.MemberID
+        WHERE a.AttendanceID = ? AND a.EventID = ?
+    """,
+    'set_attendance_status': """
+        UPDATE EventAttendance
+        SET AttendanceStatus = ?
+        WHERE AttendanceID = ?
+    """,
+    'available_rooms': """
+        SELECT r.RoomID, r.RoomName, r.Capacity, r.Location
+        FROM Room r
+        WHERE r.AvailabilityStatus = 'Available'
+        ORDER BY r.RoomName
+    """,
+    'insert_event': """
+        INSERT INTO Event (Title, Description, EventDate, StartTime, EndTime, MaxAttendees, 
+                           EventType, TargetAudience, StaffID, RoomID)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+    'insert_help_request': """
+        INSERT INTO HelpRequest (MemberID, RequestDate, Description, Status)
+        VALUES (?, ?, ?, 'Open')
+    """,
+    'help_request_detail': """
+        SELECT r.*, m.FirstName || ' ' || m.LastName as MemberName,
+               s.FirstName || ' ' || s.LastName as StaffName
+        FROM HelpRequest r
+        JOIN Member m ON r.MemberID = m.MemberID
+        LEFT JOIN Staff s ON r.StaffID = s.StaffID
+        WHERE r.RequestID = ?
+    """,
+    'assign_help_request': """
+        UPDATE HelpRequest
+        SET StaffID = ?, Status = CASE WHEN Status = 'Open' THEN 'InProgress' ELSE Status END
+        WHERE RequestID = ?
+    """,
+    'set_help_request_status': """
+        UPDATE HelpRequest
+        SET Status = ?, ClosedDate = ?
+        WHERE RequestID = ?
+    """,
+    'resolve_help_request': """
+        UPDATE HelpRequest
+        SET Resolution = ?, Status = 'Resolved', ClosedDate = ?
+        WHERE RequestID = ?
+    """,
+    'acquisition_detail': """
+        SELECT r.*, m.FirstName || ' ' || m.LastName as MemberName,
+               s.FirstName || ' ' || s.LastName as StaffName
+        FROM AcquisitionRequest r
+        JOIN Member m ON r.MemberID = m.MemberID
+        LEFT JOIN Staff s ON r.StaffID = s.StaffID
+        WHERE r.RequestID = ?
+    """,
+    'decide_acquisition': """
+        UPDATE AcquisitionRequest
+        SET Status = ?, StaffID = ?, Notes = COALESCE(NULLIF(?, ''), Notes)
+        WHERE RequestID = ? AND Status = 'Pending'
+    """,
+    'append_acquisition_notes': """
+        UPDATE AcquisitionRequest
+        SET Notes = CASE WHEN Notes IS NULL OR Notes = '' THEN ? ELSE Notes || char(10) || ? END
+        WHERE RequestID = ?
+    """,
+    'volunteer_by_member': "SELECT * FROM Volunteer WHERE MemberID = ?",
+    'volunteer_detail': """
+        SELECT v.*, m.FirstName || ' ' || m.LastName as MemberName, m.Email, m.Phone
+        FROM Volunteer v
+        JOIN Member m ON v.MemberID = m.MemberID
+        WHERE v.VolunteerID = ?
+    """,
+    'insert_volunteer': """
+        INSERT INTO Volunteer (MemberID, SkillsInterests, AvailabilityHours, StartDate, Status)
+        VALUES (?, ?, ?, ?, 'Active')
+    """,
+    'reactivate_volunteer': """
+        UPDATE Volunteer
+        SET Status = 'Active', StartDate = ?
+        WHERE VolunteerID = ?
+    """,
+    'update_volunteer': """
+        UPDATE Volunteer
+        SET SkillsInterests = COALESCE(?, SkillsInterests),
+            AvailabilityHours = COALESCE(?, AvailabilityHours),
+            Status = COALESCE(?, Status)
+        WHERE VolunteerID = ?
+    """,
+    'member_open_help_requests_with_staff': """
+        SELECT r.RequestID, r.RequestDate, r.Description, r.Status, 
+               s.FirstName || ' ' || s.LastName as StaffName
+        FROM HelpRequest r
+        LEFT JOIN Staff s ON r.StaffID = s.StaffID
+        WHERE r.MemberID = ? AND r.Status != 'Resolved'
+        ORDER BY r.RequestDate DESC
+    """,
+    'member_active_borrowings_by_email': """
+        SELECT b.BorrowID, m.FirstName || ' ' || m.LastName as MemberName, 
+               i.ItemID, i.Title, i.ItemType, b.BorrowDate, b.DueDate
+        FROM Borrowing b
+        JOIN Member m ON b.MemberID = m.MemberID
+        JOIN LibraryItem i ON b.ItemID = i.ItemID
+        WHERE m.Email = ? AND b.ReturnDate IS NULL
+        ORDER BY b.DueDate
+    """,
+    'open_borrowing_for_item': """
+        SELECT i.ItemID, i.Title, i.Status, b.BorrowID, b.BorrowDate, b.DueDate,
+               m.FirstName || ' ' || m.LastName as MemberName
+        FROM LibraryItem i
+        JOIN Borrowing b ON i.ItemID = b.ItemID AND b.ReturnDate IS NULL
+        JOIN Member m ON b.MemberID = m.MemberID
+        WHERE i.ItemID = ?
+    """,
+    'open_borrowings_for_items': """
+        SELECT b.BorrowID, b.ItemID, b.MemberID, i.Title, b.DueDate,
+               m.FirstName || ' ' || m.LastName as MemberName
+        FROM Borrowing b
+        JOIN LibraryItem i ON b.ItemID = i.ItemID
+        JOIN Member m ON b.MemberID = m.MemberID
+        WHERE b.ItemID IN (SELECT value FROM json_each(?))
+          AND b.ReturnDate IS NULL
+    """,
+    'batch_return_borrowing': """
+        UPDATE Borrowing
+        SET ReturnDate = ?, StaffID = ?
+        WHERE BorrowID = ? AND ReturnDate IS NULL
+    """,
+    'unpaid_fines_for_borrowings': """
+        SELECT BorrowID, Amount
+        FROM Fine
+        WHERE BorrowID IN (SELECT value FROM json_each(?)) AND Status = 'Unpaid'
+    """,
+    # The member account screen: open borrowings, unpaid fines, upcoming
+    # registrations and unresolved help requests in one round trip, each
+    # section a JSON array of row objects in display order
+    'member_dashboard': """
+        SELECT
+            (SELECT json_group_array(json_object(
+                        'BorrowID', BorrowID, 'Title', Title, 'ItemType', ItemType,
+                        'BorrowDate', BorrowDate, 'DueDate', DueDate, 'Status', Status))
+             FROM (
+                SELECT b.BorrowID, i.Title, i.ItemType, b.BorrowDate, b.DueDate,
+                       CASE WHEN b.DueDate < date('now') THEN 'Overdue' ELSE 'On time' END as Status
+                FROM Borrowing b
+                JOIN LibraryItem i ON b.ItemID = i.ItemID
+                WHERE b.MemberID = :member_id AND b.ReturnDate IS NULL
+                ORDER BY b.DueDate
+             )) as Borrowings,
+            (SELECT json_group_array(json_object(
+                        'FineID', FineID, 'Amount', Amount, 'IssuedDate', IssuedDate, 'Title', Title,
+                        'BorrowDate', BorrowDate, 'DueDate', DueDate, 'ReturnDate', ReturnDate))
+             FROM (
+                SELECT f.FineID, f.Amount, f.IssuedDate, i.Title, b.BorrowDate, b.DueDate, b.ReturnDate
+                FROM Fine f
+                JOIN Borrowing b ON f.BorrowID = b.BorrowID
+                JOIN LibraryItem i ON b.ItemID = i.ItemID
+                WHERE b.MemberID = :member_id AND f.Status = 'Unpaid'
+                ORDER BY f.IssuedDate
+             )) as Fines,
+            (SELECT json_group_array(json_object(
+                        'Title', Title, 'EventDate', EventDate, 'StartTime', StartTime,
+                        'EndTime', EndTime, 'RoomName', RoomName))
+             FROM (
+                SELECT e.Title, e.EventDate, e.StartTime, e.EndTime, r.RoomName
+                FROM EventAttendance a
+                JOIN Event e ON a.EventID = e.EventID
+                JOIN Room r ON e.RoomID = r.RoomID
+                WHERE a.MemberID = :member_id AND a.AttendanceStatus = 'Registered'
+                  AND e.EventDate >= date('now')
+                ORDER BY e.EventDate, e.StartTime
+             )) as Events,
+            (SELECT json_group_array(json_object(
+                        'RequestID', RequestID, 'RequestDate', RequestDate,
+                        'Description', Description, 'Status', Status))
+             FROM (
+                SELECT RequestID, RequestDate, Description, Status
+                FROM HelpRequest
+                WHERE MemberID = :member_id AND Status != 'Resolved'
+                ORDER BY RequestDate DESC
+             )) as HelpRequests
+    """,
+    'fine_member': """
+        SELECT b.MemberID FROM Fine f JOIN Borrowing b ON f.BorrowID = b.BorrowID WHERE f.FineID = ?
+    """,
+    'attendance_member': "SELECT MemberID FROM EventAttendance WHERE AttendanceID = ?",
+    'help_request_member': "SELECT MemberID FROM HelpRequest WHERE RequestID = ?",
+    'event_detail': """
+        SELECT e.*, r.RoomName, s.FirstName || ' ' || s.LastName as OrganizerName
+        FROM Event e
+        JOIN Room r ON e.RoomID = r.RoomID
+        LEFT JOIN Staff s ON e.StaffID = s.StaffID
+        WHERE e.EventID = ?
+    """,
+    'event_attendees': """
+        SELECT a.AttendanceID, m.FirstName || ' ' || m.LastName as MemberName,
+               m.Email, a.RegistrationDate, a.AttendanceStatus
+        FROM EventAttendance a
+        JOIN Member m ON a.MemberID = m.MemberID
+        WHERE a.EventID = ?
+        ORDER BY a.RegistrationDate
+    """,
+    'fines_report': """
+        SELECT f.FineID, f.Amount, f.IssuedDate, f.Status, f.PaidDate,
+               m.FirstName || ' ' || m.LastName as MemberName,
+               i.Title
+        FROM Fine f
+        JOIN Borrowing b ON f.BorrowID = b.BorrowID
+        JOIN Member m ON b.MemberID = m.MemberID
+        JOIN LibraryItem i ON b.ItemID = i.ItemID
+        ORDER BY f.IssuedDate DESC, f.FineID DESC
+    """,
+    'unpaid_fines_total': "SELECT COALESCE(SUM(Amount), 0) FROM Fine WHERE Status = 'Unpaid'",
+    'member_fines_by_email': """
+        SELECT f.FineID, f.Amount, f.IssuedDate, f.Status, f.PaidDate,
+               m.FirstName || ' ' || m.LastName as MemberName,
+               i.Title, b.DueDate, b.ReturnDate
+        FROM Fine f
+        JOIN Borrowing b ON f.BorrowID = b.BorrowID
+        JOIN Member m ON b.MemberID = m.MemberID
+        JOIN LibraryItem i ON b.ItemID = i.ItemID
+        WHERE m.Email = ?
+        ORDER BY f.Status, f.IssuedDate DESC
+    """,
+    'fine_detail': """
+        SELECT f.*, m.FirstName || ' ' || m.LastName as MemberName, m.Email,
+               i.Title, b.DueDate, b.ReturnDate
+        FROM Fine f
+        JOIN Borrowing b ON f.BorrowID = b.BorrowID
+        JOIN Member m ON b.MemberID = m.MemberID
+        JOIN LibraryItem i ON b.ItemID = i.ItemID
+        WHERE f.FineID = ?
+    """,
+    'mark_fine_paid': """
+        UPDATE Fine
+        SET Status = 'Paid', PaidDate = ?
+        WHERE FineID = ? AND Status = 'Unpaid'
+          -- A fine on a loan that is still out keeps accruing until the return
+          -- settles it, so it can only be paid once the item is back
+          AND BorrowID IN (SELECT BorrowID FROM Borrowing WHERE ReturnDate IS NOT NULL)
+    """,
+    'fine_accrual_watermark': "SELECT MAX(AsOfDate) FROM FineAccrualRun",
+    'count_unfined_overdue': f"""
+        SELECT COUNT(*) FROM (
+            SELECT {FINE_CHARGE_SQL} AS Amount
+            FROM Borrowing b
+            JOIN LibraryItem i ON b.ItemID = i.ItemID
+            JOIN FinePolicy p ON i.ItemType = p.ItemType
+            WHERE b.ReturnDate IS NULL AND b.DueDate < :as_of
+            AND NOT EXISTS (SELECT 1 FROM Fine f WHERE f.BorrowID = b.BorrowID)
+        )
+        WHERE Amount > 0
+    """,
+    # One pass over the open overdue loans (idx_borrowing_open_due). Loans
+    # whose fine is paid or already at its type's cap can never change, so
+    # they are not priced; fines already at today's amount are not written.
+    # The late-return trigger settles the final amount when the item comes back.
+    'accrue_overdue_fines': f"""
+        INSERT INTO Fine (BorrowID, Amount, Status, IssuedDate)
+        SELECT BorrowID, Amount, 'Unpaid', :as_of
+        FROM (
+            SELECT b.BorrowID, {FINE_CHARGE_SQL} AS Amount
+            FROM Borrowing b
+            JOIN LibraryItem i ON b.ItemID = i.ItemID
+            JOIN FinePolicy p ON i.ItemType = p.ItemType
+            WHERE b.ReturnDate IS NULL AND b.DueDate < :as_of
+            AND NOT EXISTS (
+                SELECT 1 FROM Fine f
+                WHERE f.BorrowID = b.BorrowID
+                AND (f.Status != 'Unpaid' OR f.Amount = ROUND(p.MaxFine, 2))
+            )
+        )
+        WHERE Amount > 0
+        ON CONFLICT (BorrowID) DO UPDATE
+        SET Amount = excluded.Amount
+        WHERE Fine.Status = 'Unpaid' AND Fine.Amount != excluded.Amount
+    """,
+    'insert_fine_accrual_run': """
+        INSERT INTO FineAccrualRun (AsOfDate, StartedAt, FinishedAt, FinesAdded, FinesUpdated)
+        VALUES (?, ?, ?, ?, ?)
+    """,
+    'fine_policy_rules': "SELECT ItemType, DailyRate, GraceDays, MaxFine FROM FinePolicy ORDER BY ItemType",
+    'library_holidays': "SELECT HolidayDate, Name FROM LibraryHoliday ORDER BY HolidayDate",
+    'upsert_fine_rule': """
+        INSERT INTO FinePolicy (ItemType, DailyRate, GraceDays, MaxFine) VALUES (?, ?, ?, ?)
+        ON CONFLICT (ItemType) DO UPDATE
+        SET DailyRate = excluded.DailyRate, GraceDays = excluded.GraceDays, MaxFine = excluded.MaxFine
+    """,
+    'insert_holiday': "INSERT OR REPLACE INTO LibraryHoliday (HolidayDate, Name) VALUES (?, ?)",
+    'delete_holiday': "DELETE FROM LibraryHoliday WHERE HolidayDate = ?",
+    'late_returns_between': """
+        SELECT b.BorrowID, i.ItemType, b.DueDate, b.ReturnDate, f.Amount, f.Status
+        FROM Borrowing b
+        JOIN LibraryItem i ON b.ItemID = i.ItemID
+        LEFT JOIN Fine f ON f.BorrowID = b.BorrowID
+        WHERE b.ReturnDate BETWEEN ? AND ? AND b.ReturnDate > b.DueDate
+    """,
+    'reprice_fine': """
+        INSERT INTO Fine (BorrowID, Amount, Status, IssuedDate) VALUES (?, ?, 'Unpaid', ?)
+        ON CONFLICT (BorrowID) DO UPDATE
+        SET Amount = excluded.Amount
+        WHERE Fine.Status = 'Unpaid' AND Fine.Amount != excluded.Amount
+    """,
+    'clear_unpaid_fine': "DELETE FROM Fine WHERE BorrowID = ? AND Status = 'Unpaid'",
+}
+
+# Staff listing screens, paged with KeysetPaginator. Each query marks where
+# the seek condition goes with {seek}, after any other placeholders, and
+# leaves ORDER BY to the paginator, which sorts on the listed key columns.
+PAGED_LISTINGS = {
+    'upcoming_events_with_organizer': {
+        'query': """
+            SELECT e.EventID, e.Title, e.EventType, e.EventDate, e.StartTime, e.EndTime,
+                   e.MaxAttendees, r.RoomName,
+                   e.RegisteredCount,
+                   s.FirstName || ' ' || s.LastName as OrganizerName
+            FROM Event e
+            JOIN Room r ON e.RoomID = r.RoomID
+            LEFT JOIN Staff s ON e.StaffID = s.StaffID
+            WHERE e.EventDate >= ? AND {seek}
+        """,
+        'keys': ('e.EventDate', 'e.StartTime', 'e.EventID'),
+        'descending': False
+    },
+    'past_events_with_organizer': {
+        'query': """
+            SELECT e.EventID, e.Title, e.EventType, e.EventDate, e.StartTime, e.EndTime,
+                   e.MaxAttendees, r.RoomName,
+                   e.RegisteredCount,
+                   s.FirstName || ' ' || s.LastName as OrganizerName
+            FROM Event e
+            JOIN Room r ON e.RoomID = r.RoomID
+            LEFT JOIN Staff s ON e.StaffID = s.StaffID
+            WHERE e.EventDate < ? AND {seek}
+        """,
+        'keys': ('e.EventDate', 'e.StartTime', 'e.EventID'),
+        'descending': True
+    },
+    'unpaid_fines': {
+        'query': """
+            SELECT f.FineID, f.Amount, f.IssuedDate, f.Status,
+                   m.FirstName || ' ' || m.LastName as MemberName, m.Email,
+                   i.Title, b.DueDate, b.ReturnDate
+            FROM Fine f
+            JOIN Borrowing b ON f.BorrowID = b.BorrowID
+            JOIN Member m ON b.MemberID = m.MemberID
+            JOIN LibraryItem i ON b.ItemID = i.ItemID
+            WHERE f.Status = 'Unpaid' AND {seek}
+        """,
+        'keys': ('f.IssuedDate', 'f.FineID'),
+        'descending': False
+    },
+    'all_fines': {
+        'query': """
+            SELECT f.FineID, f.Amount, f.IssuedDate, f.Status, f.PaidDate,
+                   m.FirstName || ' ' || m.LastName as MemberName,
+                   i.Title, b.DueDate, b.ReturnDate
+            FROM Fine f
+            JOIN Borrowing b ON f.BorrowID = b.BorrowID
+            JOIN Member m ON b.MemberID = m.MemberID
+            JOIN LibraryItem i ON b.ItemID = i.ItemID
+            WHERE {seek}
+        """,
+        'keys': ('f.IssuedDate', 'f.FineID'),
+        'descending': True
+    },
+    'open_help_requests': {
+        'query': """
+            SELECT r.RequestID, r.RequestDate, m.FirstName || ' ' || m.LastName as MemberName,
+                   r.Description, r.Status, s.FirstName || ' ' || s.LastName as StaffName
+            FROM HelpRequest r
+            JOIN Member m ON r.MemberID = m.MemberID
+            LEFT JOIN Staff s ON r.StaffID = s.StaffID
+            WHERE r.Status = 'Open' AND {seek}
+        """,
+        'keys': ('r.RequestDate', 'r.RequestID'),
+        'descending': False
+    },
+    'staff_help_requests': {
+        'query': """
+            SELECT r.RequestID, r.RequestDate, m.FirstName || ' ' || m.LastName as MemberName,
+                   r.Description, r.Status, s.FirstName || ' ' || s.LastName as StaffName
+            FROM HelpRequest r
+            JOIN Member m ON r.MemberID = m.MemberID
+            LEFT JOIN Staff s ON r.StaffID = s.StaffID
+            WHERE r.StaffID = ? AND r.Status != 'Resolved' AND {seek}
+        """,
+        'keys': ('r.RequestDate', 'r.RequestID'),
+        'descending': False
+    },
+    'all_help_requests': {
+        'query': """
+            SELECT r.RequestID, r.RequestDate, m.FirstName || ' ' || m.LastName as MemberName,
+                   r.Description, r.Status, s.FirstName || ' ' || s.LastName as StaffName
+            FROM HelpRequest r
+            JOIN Member m ON r.MemberID = m.MemberID
+            LEFT JOIN Staff s ON r.StaffID = s.StaffID
+            WHERE {seek}
+        """,
+        'keys': ('r.RequestDate', 'r.RequestID'),
+        'descending': True
+    },
+    'pending_acquisitions': {
+        'query': """
+            SELECT r.RequestID, r.Title, r.AuthorCreator, r.PublicationType, 
+                   r.RequestDate, m.FirstName || ' ' || m.LastName as MemberName
+            FROM AcquisitionRequest r
+            JOIN Member m ON r.MemberID = m.MemberID
+            WHERE r.Status = 'Pending' AND {seek}
+        """,
+        'keys': ('r.RequestDate', 'r.RequestID'),
+        'descending': False
+    },
+    'all_acquisitions': {
+        'query': """
+            SELECT r.RequestID, r.Title, r.AuthorCreator, r.PublicationType, 
+                   r.RequestDate, r.Status, m.FirstName || ' ' || m.LastName as MemberName
+            FROM AcquisitionRequest r
+            JOIN Member m ON r.MemberID = m.MemberID
+            WHERE {seek}
+        """,
+        'keys': ('r.RequestDate', 'r.RequestID'),
+        'descending': True
+    },
+    'active_volunteers': {
+        'query': """
+            SELECT v.VolunteerID, m.FirstName || ' ' || m.LastName as MemberName,
+                   m.Email, m.Phone, v.SkillsInterests, v.AvailabilityHours, v.StartDate
+            FROM Volunteer v
+            JOIN Member m ON v.MemberID = m.MemberID
+            WHERE v.Status = 'Active' AND {seek}
+        """,
+        'keys': ('v.StartDate', 'v.VolunteerID'),
+        'descending': True
+    },
+    'all_volunteers': {
+        'query': """
+            SELECT v.VolunteerID, m.FirstName || ' ' || m.LastName as MemberName,
+                   m.Email, m.Phone, v.SkillsInterests, v.Status, v.StartDate
+            FROM Volunteer v
+            JOIN Member m ON v.MemberID = m.MemberID
+            WHERE {seek}
+        """,
+        'keys': ('v.StartDate', 'v.VolunteerID'),
+        'descending': True
+    }
+}
+
+class PoolTimeout(sqlite3.OperationalError):
+    """No pooled connection came free in time
+
+    A sqlite3.Error, so callers that already handle database errors report
+    it the same way.
+    """
+
+class ConnectionLease:
+    """Held only in a thread's local data, so it is freed when the thread exits
+
+    A weakref.finalize on it returns the thread's pooled connection.
+    """
+
+class ConnectionPool:
+    """A small checkout/return pool of pre-configured SQLite connections"""
+    def __init__(self, db_file, size=POOL_SIZE):
+        """Create an empty pool; connections are opened on demand"""
+        self.db_file = db_file
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._connections = []
+        
+    def _open_connection(self):
+        """Open a connection configured for concurrent readers and one writer"""
+        conn = sqlite3.connect(
+            self.db_file,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            check_same_thread=False  # Connections move between threads via the pool
+        )
+        conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+        
+    def acquire(self, timeout=POOL_TIMEOUT_SECONDS):
+        """Check out a connection, opening a new one if the pool isn't full
+
+        Raises PoolTimeout if none comes free within timeout seconds.
+        """
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+            
+        with self._lock:
+            if len(self._connections) < self.size:
+                conn = self._open_connection()
+                self._connections.append(conn)
+                return conn
+                
+        # Pool is at capacity, so wait for another thread to return one
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise PoolTimeout(
+                f"no database connection free after {timeout}s; "
+                f"all {self.size} are checked out by other threads"
+            ) from None
+        
+    def release(self, conn):
+        """Return a connection to the pool"""
+        with self._lock:
+            if conn not in self._connections:
+                return  # Closed by close_all, e.g. released by an exiting thread after shutdown
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+        
+    @contextmanager
+    def connection(self, timeout=POOL_TIMEOUT_SECONDS):
+        """Check out a connection for the duration of a with-block"""
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+            
+    def close_all(self):
+        """Close every connection the pool has opened"""
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+            self._idle = queue.LifoQueue()
+
+class GroupCommitWriter:
+    """A single writer thread that commits queued writes in groups
+
+    Writes queued within GROUP_COMMIT_WINDOW_MS of each other run in one
+    BEGIN IMMEDIATE transaction, each inside its own savepoint so a failed
+    write is undone alone. Every caller's future resolves only once the
+    whole group has committed.
+    """
+    def __init__(self, service, window_ms=GROUP_COMMIT_WINDOW_MS, max_batch=GROUP_COMMIT_MAX_BATCH):
+        """Create a stopped writer for a connected LibraryService"""
+        self.service = service
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = None
+        self.stats = {'writes': 0, 'batches': 0, 'largest_batch': 0}
+        
+    def start(self):
+        """Start the writer thread"""
+        self._thread = threading.Thread(target=self._run, name="group-commit-writer", daemon=True)
+        self._thread.start()
+        
+    def stop(self):
+        """Commit whatever is queued, then stop the writer thread"""
+        if self._thread:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+            
+    def owns_current_thread(self):
+        """True when called from the writer thread itself"""
+        return threading.current_thread() is self._thread
+        
+    def pending(self):
+        """Number of writes waiting for the next group"""
+        return self._queue.qsize()
+        
+    def submit(self, fn, *args, **kwargs):
+        """Queue fn(*args, **kwargs) for the writer and return its Future"""
+        future = Future()
+        self._queue.put((future, fn, args, kwargs))
+        return future
+        
+    def _run(self):
+        """Writer loop: gather a group, run it, commit it, resolve it"""
+        self.service.conn.execute(f"PRAGMA synchronous = {GROUP_COMMIT_SYNCHRONOUS}")
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            self._commit_group(self._gather(job))
+        self.service.conn.execute("PRAGMA synchronous = NORMAL")
+        self.service.release_connection()
+        
+    def _gather(self, first):
+        """Collect writes until the window closes or the batch is full"""
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                job = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                self._queue.put(None)  # Stop after this group
+                break
+            batch.append(job)
+        return batch
+        
+    def _commit_group(self, batch):
+        """Run a group of writes in one transaction and resolve their futures"""
+        batch = [job for job in batch if job[0].set_running_or_notify_cancel()]
+        outcomes = []
+        try:
+            with self.service.transaction():
+                for future, fn, args, kwargs in batch:
+                    try:
+                        with self.service.transaction():  # A savepoint inside the group
+                            outcomes.append((future, fn(*args, **kwargs), None))
+                    except Exception as e:
+                        outcomes.append((future, None, e))
+        except sqlite3.Error as e:
+            # BEGIN or COMMIT failed, so nothing in the group was written
+            log.error("Group commit of %d writes failed: %s", len(batch), e)
+            for future, *_ in batch:
+                future.set_exception(e)
+            return
+            
+        self.stats['writes'] += len(batch)
+        self.stats['batches'] += 1
+        self.stats['largest_batch'] = max(self.stats['largest_batch'], len(batch))
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+class DashboardCache:
+    """Per-member AccountSummary cache with a TTL and LRU eviction
+
+    Writers invalidate the members they touch. A summary loaded while an
+    invalidation happened is not stored, so a reader that raced a write
+    never caches the rows from before it.
+    """
+    def __init__(self, max_entries=DASHBOARD_CACHE_SIZE, ttl=DASHBOARD_CACHE_TTL):
+        """Create an empty cache; max_entries=0 disables it"""
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # member_id -> (expires, summary), oldest first
+        self._lock = threading.Lock()
+        self._invalidations = 0
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'invalidations': 0}
+        
+    def get(self, member_id):
+        """Return the cached summary, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(member_id)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[member_id]
+                self.stats['expired'] += 1
+                entry = None
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(member_id)
+            self.stats['hits'] += 1
+            return entry[1]
+            
+    def token(self):
+        """Mark the start of a load; pass the token to put()"""
+        return self._invalidations
+        
+    def put(self, member_id, summary, token):
+        """Store a freshly loaded summary unless an invalidation happened since token"""
+        if not self.max_entries:
+            return
+        with self._lock:
+            if token != self._invalidations:
+                return
+            self._entries[member_id] = (time.monotonic() + self.ttl, summary)
+            self._entries.move_to_end(member_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+                
+    def invalidate(self, member_ids):
+        """Drop the summaries of these members; None among them drops every summary"""
+        with self._lock:
+            self._invalidations += 1
+            if None in member_ids:
+                self.stats['invalidations'] += len(self._entries)
+                self._entries.clear()
+                return
+            for member_id in member_ids:
+                if self._entries.pop(member_id, None) is not None:
+                    self.stats['invalidations'] += 1
+                    
+    def get_stats(self):
+        """Counters plus current size and hit rate"""
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return dict(
+                self.stats,
+                size=len(self._entries),
+                hit_rate=self.stats['hits'] / lookups if lookups else 0.0
+            )
+
+class PasswordHasher:
+    """Salted password hashes with a tunable KDF and a cache of recent logins
+
+    Hashes are stored as 'kdf$params$salt$hash' (hex), so the KDF or its
+    cost can change later: needs_rehash() tells the caller to store a new
+    hash at the next successful login. Any other value in a password column
+    is a plaintext password from before hashing.
+
+    A successful verification is remembered under the stored hash, as a
+    digest keyed with a per-process secret, for cache_ttl seconds. Failed
+    attempts are never cached, so guessing always pays the full KDF.
+    """
+    def __init__(self, kdf=PASSWORD_KDF, scrypt_n=SCRYPT_N, scrypt_r=SCRYPT_R, scrypt_p=SCRYPT_P,
+                 pbkdf2_iterations=PBKDF2_ITERATIONS, cache_size=LOGIN_CACHE_SIZE,
+                 cache_ttl=LOGIN_CACHE_TTL):
+        """Hash new passwords with kdf ('scrypt' or 'pbkdf2_sha256') at the given cost"""
+        if kdf not in ('scrypt', 'pbkdf2_sha256'):
+            raise ValueError(f"unknown password KDF {kdf!r}")
+        self.kdf = kdf
+        self.params = (scrypt_n, scrypt_r, scrypt_p) if kdf == 'scrypt' else (pbkdf2_iterations,)
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self._secret = os.urandom(32)
+        self._verified = OrderedDict()  # stored hash -> (expires, keyed digest of the password)
+        self._lock = threading.Lock()
+        self.stats = {'kdf_runs': 0, 'cache_hits': 0, 'failures': 0}
+        
+    @staticmethod
+    def derive(kdf, params, password, salt):
+        """Run the KDF over a password"""
+        if kdf == 'scrypt':
+            n, r, p = params
+            return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, dklen=32,
+                                  maxmem=128 * r * (n + p + 2) + 1024 * 1024)
+        return hashlib.pbkdf2_hmac('sha256', password.encode(), salt, params[0])
+        
+    @staticmethod
+    def parse(stored):
+        """Split a stored hash into (kdf, params, salt, hash), or None for plaintext"""
+        parts = stored.split('$')
+        if len(parts) != 4 or parts[0] not in ('scrypt', 'pbkdf2_sha256'):
+            return None
+        try:
+            params = tuple(int(value) for value in parts[1].split(','))
+            return parts[0], params, bytes.fromhex(parts[2]), bytes.fromhex(parts[3])
+        except ValueError:
+            return None
+            
+    def hash(self, password):
+        """A new salted hash of password, ready to store"""
+        salt = os.urandom(PASSWORD_SALT_BYTES)
+        derived = self.derive(self.kdf, self.params, password, salt)
+        return f"{self.kdf}${','.join(map(str, self.params))}${salt.hex()}${derived.hex()}"
+        
+    def needs_rehash(self, stored):
+        """Whether stored is plaintext or uses another KDF or cost than new hashes"""
+        parsed = self.parse(stored)
+        return parsed is None or parsed[:2] != (self.kdf, self.params)
+        
+    def verify(self, password, stored):
+        """Check password against a stored hash (or legacy plaintext)"""
+        parsed = self.parse(stored)
+        if parsed is None:
+            return hmac.compare_digest(password.encode(), stored.encode())
+            
+        digest = hmac.new(self._secret, password.encode(), 'sha256').digest()
+        with self._lock:
+            entry = self._verified.get(stored)
+            if entry and entry[0] > time.monotonic() and hmac.compare_digest(entry[1], digest):
+                self._verified.move_to_end(stored)
+                self.stats['cache_hits'] += 1
+                return True
+                
+        kdf, params, salt, expected = parsed
+        ok = hmac.compare_digest(self.derive(kdf, params, password, salt), expected)
+        with self._lock:
+            self.stats['kdf_runs'] += 1
+            if not ok:
+                self.stats['failures'] += 1
+        if ok:
+            self.remember(password, stored)
+        return ok
+        
+    def remember(self, password, stored):
+        """Cache password as verified against stored, e.g. a hash just made from it"""
+        if not self.cache_size:
+            return
+        digest = hmac.new(self._secret, password.encode(), 'sha256').digest()
+        with self._lock:
+            self._verified[stored] = (time.monotonic() + self.cache_ttl, digest)
+            self._verified.move_to_end(stored)
+            while len(self._verified) > self.cache_size:
+                self._verified.popitem(last=False)
+                
+    
+    def get_stats(self):
+        """KDF runs, cache hits and failed verifications, plus the cache size"""
+        with self._lock:
+            return dict(self.stats, cached=len(self._verified))
+
+class ReportSnapshot:
+    """A read-only copy of the database for long reports
+
+    The copy is made with the sqlite3 backup API, which reads the live
+    database in one WAL read transaction, so checkouts and returns carry on
+    while it is taken. Reports then run on a mode=ro connection to the copy
+    and never touch the connections circulation uses.
+
+    A refresh swaps in a connection to the new copy without closing the old
+    one: reader threads and report generators still holding it read the old
+    copy to the end, and it closes once the last of them lets go.
+    """
+    def __init__(self, db_file, max_age=REPORT_SNAPSHOT_MAX_AGE, path=None):
+        """Describe a snapshot of db_file; nothing is copied until first use"""
+        root, ext = os.path.splitext(db_file)
+        self.db_file = db_file
+        self.max_age = max_age
+        self.path = path or f"{root}-report{ext or '.db'}"
+        self.taken_at = None
+        self._conn = None
+        self._lock = threading.Lock()
+        
+    def refresh(self):
+        """Copy the live database and open a read-only connection on the copy"""
+        temp_path = self.path + ".tmp"
+        source = sqlite3.connect(self.db_file, timeout=BUSY_TIMEOUT_MS / 1000)
+        copy = sqlite3.connect(temp_path)
+        try:
+            source.backup(copy)
+            # A rollback journal lets the copy be opened read-only without -wal/-shm files
+            copy.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            copy.close()
+            source.close()
+            
+        # Connections already open keep reading the file they opened
+        os.replace(temp_path, self.path)
+        conn = sqlite3.connect(
+            f"file:{quote(os.path.abspath(self.path))}?mode=ro",
+            uri=True,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        self._conn = conn  # The old connection is closed when its last user drops it
+        self.taken_at = datetime.datetime.now()
+        
+    def connection(self):
+        """The read-only connection, refreshing the copy first if it is stale"""
+        with self._lock:
+            age = (datetime.datetime.now() - self.taken_at).total_seconds() if self.taken_at else None
+            if age is None or age > self.max_age:
+                self.refresh()
+            return self._conn
+            
+    def close(self):
+        """Close the read-only connection; the copy stays on disk for next time"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+                self.taken_at = None
+
+class KeysetPaginator:
+    """Page through one of the PAGED_LISTINGS with keyset (seek) pagination
+
+    Each page seeks past the sort key of the previous page's last row instead
+    of using OFFSET, so every page costs the same however deep it is, and
+    only page_size + 1 rows are read per page.
+    """
+    
+    def __init__(self, library, name, params=(), page_size=PAGE_SIZE, report=False):
+        listing = PAGED_LISTINGS[name]
+        self.library = library
+        self.name = name
+        self.params = tuple(params)
+        self.page_size = page_size
+        self.report = report  # Read from the report snapshot when reporting mode is on
+        self.columns = [key.split('.')[-1] for key in listing['keys']]
+        
+        direction = " DESC" if listing['descending'] else ""
+        order_by = "\nORDER BY " + ", ".join(key + direction for key in listing['keys'])
+        seek = "({}) {} ({})".format(
+            ", ".join(listing['keys']),
+            "<" if listing['descending'] else ">",
+            ", ".join("?" for _ in listing['keys'])
+        )
+        self._first_query = listing['query'].format(seek="1") + order_by + "\nLIMIT ?"
+        self._seek_query = listing['query'].format(seek=seek) + order_by + "\nLIMIT ?"
+        
+        self._starts = []  # Seek keys of the pages before the current one
+        self._start = None
+        self.rows = []
+        self.has_next = False
+        
+    @property
+    def has_prev(self):
+        return bool(self._starts)
+        
+    def first_page(self):
+        """Load and return the first page"""
+        self._starts = []
+        return self._load_page(None)
+        
+    def next_page(self):
+        """Load and return the page after the current one"""
+        if not self.has_next:
+            return self.rows
+        self._starts.append(self._start)
+        return self._load_page(tuple(self.rows[-1][column] for column in self.columns))
+        
+    def prev_page(self):
+        """Load and return the page before the current one"""
+        if not self._starts:
+            return self.rows
+        return self._load_page(self._starts.pop())
+        
+    def _load_page(self, start):
+        if start is None:
+            query, params = self._first_query, self.params + (self.page_size + 1,)
+        else:
+            query, params = self._seek_query, self.params + start + (self.page_size + 1,)
+            
+        begin = time.perf_counter()
+        conn = self.library.report_connection() if self.report else self.library.conn
+        cursor = conn.execute(query, params)
+        try:
+            # One extra row tells us whether there is a next page
+            rows = cursor.fetchmany(self.page_size + 1)
+        finally:
+            cursor.close()
+        elapsed = time.perf_counter() - begin
+        
+        self.library.record_statement(self.name, elapsed)
+        if self.library.instrument:
+            self.library.record_query(query, params, elapsed, len(rows))
+            
+        self._start = start
+        self.has_next = len(rows) > self.page_size
+        self.rows = rows[:self.page_size]
+        return self.rows
+        
+def get_slow_query_logger(log_file=SLOW_QUERY_LOG):
+    """Get the rotating slow-query logger, configuring it on first use"""
+    logger = logging.getLogger("library.slow_queries")
+    if not logger.handlers:
+        handler = RotatingFileHandler(
+            log_file,
+            maxBytes=SLOW_QUERY_LOG_BYTES,
+            backupCount=SLOW_QUERY_LOG_BACKUPS
+        )
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+# Methods skipped when attributing a query to the menu action that issued it
+QUERY_HELPERS = (
+    'record_query', 'execute_query', 'run_query', 'run_many', 'iter_query',
+    'execute_statement', 'run_statement', 'run_statement_many',
+    'first_page', 'next_page', 'prev_page', '_load_page', 'browse_pages',
+    'fetch_record', 'apply_statement'
+)
+
+log = logging.getLogger("library")
+
+class ActionResult(NamedTuple):
+    """Outcome of one LibraryService operation
+
+    outcome is a short code such as 'added', 'not_found' or 'error';
+    record holds the affected row as a dict when there is one.
+    """
+    outcome: str
+    record: Optional[dict] = None
+    error: Optional[str] = None
+
+class BatchResult(NamedTuple):
+    """Outcome of a checkout or check-in covering several items
+
+    results holds one dict per item, or None if the whole batch failed.
+    """
+    results: Optional[list]
+    due_date: Optional[datetime.date] = None
+    error: Optional[str] = None
+
+class AccountSummary(NamedTuple):
+    """A member's open borrowings, unpaid fines, upcoming events and help requests"""
+    borrowings: list
+    fines: list
+    events: list
+    help_requests: list
+
+class FinePolicy:
+    """Per-item-type fine rates, grace periods and caps, with the holiday calendar
+
+    A loan is charged DailyRate for every day between its due date and its
+    return, less LibraryHoliday dates and the first GraceDays, up to MaxFine.
+    amounts() prices whole batches of loans at once: with NumPy it works on
+    datetime64 arrays (busday_count skips the holidays); without it, it falls
+    back to a loop.
+    """
+    def __init__(self, rules, holidays=()):
+        """rules maps ItemType to (DailyRate, GraceDays, MaxFine or None)"""
+        self.rules = dict(rules)
+        self.holidays = sorted(
+            day if isinstance(day, datetime.date) else datetime.date.fromisoformat(day)
+            for day in holidays
+        )
+        
+    @classmethod
+    def load(cls, library):
+        """Read the policy from the FinePolicy and LibraryHoliday tables"""
+        rules = {
+            row['ItemType']: (row['DailyRate'], row['GraceDays'], row['MaxFine'])
+            for row in library.run_statement('fine_policy_rules')
+        }
+        holidays = [row['HolidayDate'] for row in library.run_statement('library_holidays')]
+        return cls(rules, holidays)
+        
+    def amounts(self, item_types, due_dates, return_dates):
+        """Fines for parallel sequences of item types and ISO due/return dates
+
+        Returns a list of amounts rounded to cents (half up, as SQLite's
+        ROUND does); 0 means no fine.
+        """
+        if np is None:
+            return [
+                self.amount(item_type, due, returned)
+                for item_type, due, returned in zip(item_types, due_dates, return_dates)
+            ]
+            
+        item_types = np.asarray(item_types, dtype=object)
+        one_day = np.timedelta64(1, 'D')
+        # Days in (due, returned] that are not holidays
+        days = np.busday_count(
+            np.asarray(due_dates, dtype='datetime64[D]') + one_day,
+            np.asarray(return_dates, dtype='datetime64[D]') + one_day,
+            weekmask='1111111',
+            holidays=np.asarray(self.holidays, dtype='datetime64[D]')
+        )
+        
+        rate = np.zeros(len(days))
+        grace = np.zeros(len(days))
+        cap = np.full(len(days), np.inf)
+        for item_type, (daily_rate, grace_days, max_fine) in self.rules.items():
+            rows = item_types == item_type
+            rate[rows] = daily_rate
+            grace[rows] = grace_days
+            cap[rows] = np.inf if max_fine is None else max_fine
+            
+        fines = np.minimum(np.maximum(days - grace, 0) * rate, cap)
+        return (np.floor(fines * 100 + 0.5) / 100).tolist()
+        
+    def amount(self, item_type, due_date, return_date):
+        """Fine for one loan, by the same rules as amounts()"""
+        if item_type not in self.rules:
+            return 0.0
+        daily_rate, grace_days, max_fine = self.rules[item_type]
+        due = datetime.date.fromisoformat(str(due_date))
+        returned = datetime.date.fromisoformat(str(return_date))
+        holidays = bisect_right(self.holidays, returned) - bisect_right(self.holidays, due)
+        fine = max((returned - due).days - holidays - grace_days, 0) * daily_rate
+        if max_fine is not None:
+            fine = min(fine, max_fine)
+        return math.floor(fine * 100 + 0.5) / 100
+
+def write_operation(method):
+    """Route a LibraryService write through the group-commit writer when one is running"""
+    @functools.wraps(method)
+    def submit_write(self, *args, **kwargs):
+        writer = self.writer
+        if writer is None or writer.owns_current_thread():
+            return method(self, *args, **kwargs)
+        return writer.submit(method, self, *args, **kwargs).result()
+    return submit_write
+
+class LibraryService:
+    """Headless library operations: queries, circulation and record keeping
+
+    Nothing here prompts, prints or clears the screen, so batch jobs,
+    benchmarks and servers can call it directly. Lookups return rows or
+    dicts; writes return an ActionResult or BatchResult.
+    """
+    def __init__(self, db_file, pool_size=POOL_SIZE, instrument=False, slow_query_ms=None,
+                 group_commit=False, report_snapshot_age=None, demo_staff_login=False):
+        """Initialize the service with its connection pool settings"""
         self.db_file = db_file
-        self.conn = None
-        self.cursor = None
-        self.current_user = None
-        self.user_type = None
+        self.pool_size = pool_size
+        self.pool = None
+        self.group_commit = group_commit
+        self.writer = None  # GroupCommitWriter, started by connect_db when group_commit is set
+        self.dashboard_cache = DashboardCache()
+        self.passwords = PasswordHasher()
+        self.demo_staff_login = demo_staff_login  # Let staff with no password in by email
+        # Reporting mode: report reads go to a ReportSnapshot refreshed at this age
+        self.report_snapshot = (
+            ReportSnapshot(db_file, report_snapshot_age) if report_snapshot_age is not None else None
+        )
+        self._local = threading.local()  # Each thread gets its own pooled connection
+        self.search_enabled = False
+        self._stats_lock = threading.Lock()
+        self.statement_stats = {}  # name -> [executions, cumulative seconds]
+        
+        # Optional per-query instrumentation
+        self.slow_query_ms = slow_query_ms
+        self.instrument = instrument or slow_query_ms is not None
+        self.query_profile = {}  # calling method -> [queries, seconds, rows]
+        self.recent_queries = deque(maxlen=RECENT_QUERY_HISTORY)
+        self.slow_query_logger = get_slow_query_logger() if slow_query_ms is not None else None
+        
+    @property
+    def conn(self):
+        """The calling thread's connection, checked out from the pool on first use
+
+        It goes back to the pool on release_connection(), or when the thread
+        exits and its thread-local data is freed.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self.pool.acquire()
+            self._local.conn = conn
+            self._local.cursor = conn.cursor()
+            self._local.lease = ConnectionLease()
+            self._local.returned = weakref.finalize(self._local.lease, self.pool.release, conn)
+        return conn
+        
+    @property
+    def cursor(self):
+        """The calling thread's cursor"""
+        self.conn
+        return self._local.cursor
         
     def connect_db(self):
         """Connect to the SQLite database"""
         try:
-            self.conn = sqlite3.connect(self.db_file)
-            self.conn.row_factory = sqlite3.Row  # Return rows as dictionaries
-            self.cursor = self.conn.cursor()
+            self.pool = ConnectionPool(self.db_file, self.pool_size)
+            self.search_enabled = self.has_search_index()
+            if self.group_commit:
+                self.writer = GroupCommitWriter(self)
+                self.writer.start()
             return True
         except sqlite3.Error as e:
             print(f"Database connection error: {e}")
             return False
             
+    def release_connection(self):
+        """Return the calling thread's connection to the pool"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.conn = None
+            self._local.cursor = None
+            self._local.returned()  # Releases now; the finalizer runs only once
+            self._local.lease = None
+            
+    def has_search_index(self):
+        """Check whether the FTS5 search index exists and is usable"""
+        try:
+            self.cursor.execute("SELECT rowid FROM ItemSearch LIMIT 0")
+            return True
+        except sqlite3.Error:
+            # Either the index was never built or FTS5 isn't compiled in
+            return False
+            
     def close_db(self):
         """Close the database connection"""
-        if self.conn:
-            self.conn.close()
+        if self.writer:
+            self.writer.stop()
+            self.writer = None
+        if self.report_snapshot:
+            self.report_snapshot.close()
+        if self.pool:
+            self.pool.close_all()
+            self._local = threading.local()
             
     def execute_query(self, query, params=(), fetch=True, commit=False):
         """Execute a SQL query with parameters"""
         try:
-            self.cursor.execute(query, params)
+            result = self.run_query(query, params, fetch, commit)
+            return result if fetch else True
+        except sqlite3.Error as e:
+            log.error("Query execution error: %s\nQuery: %s\nParams: %r", e, query, params)
+            return None
+            
+    def run_query(self, query, params=(), fetch=True, commit=False):
+        """Execute a SQL query, letting database errors propagate to the caller
+
+        Returns the fetched rows, or the affected row count when fetch is False.
+        """
+        start = time.perf_counter() if self.instrument else None
+        self.cursor.execute(query, params)
+        
+        if commit:
+            self.conn.commit()
+            
+        if fetch:
+            result = self.cursor.fetchall()
+            rows = len(result)
+        else:
+            result = rows = self.cursor.rowcount
             
-            if commit:
-                self.conn.commit()
+        if start is not None:
+            self.record_query(query, params, time.perf_counter() - start, rows)
+        return result
+        
+    def iter_query(self, query, params=(), chunk_size=STREAM_CHUNK_ROWS, report=False):
+        """Yield the rows of a query, reading them chunk_size at a time
+
+        Uses its own cursor, so other queries can run while the rows are
+        being consumed. With report set, reads the report snapshot.
+        """
+        start = time.perf_counter() if self.instrument else None
+        conn = self.report_connection() if report else self.conn
+        cursor = conn.execute(query, params)
+        rows = 0
+        try:
+            while True:
+                chunk = cursor.fetchmany(chunk_size)
+                if not chunk:
+                    break
+                rows += len(chunk)
+                yield from chunk
+        finally:
+            cursor.close()
+            if start is not None:
+                self.record_query(query, params, time.perf_counter() - start, rows)
                 
-            if fetch:
-                return self.cursor.fetchall()
-            return True
+    def run_many(self, query, seq_of_params, commit=False):
+        """Execute one statement for every parameter set with executemany
+
+        Returns the total number of affected rows.
+        """
+        seq_of_params = list(seq_of_params)
+        start = time.perf_counter() if self.instrument else None
+        self.cursor.executemany(query, seq_of_params)
+        
+        if commit:
+            self.conn.commit()
+            
+        rows = self.cursor.rowcount
+        if start is not None and seq_of_params:
+            self.record_query(query, seq_of_params[0], time.perf_counter() - start, rows)
+        return rows
+        
+    @contextmanager
+    def transaction(self, immediate=True):
+        """Run a block of statements as one transaction on this thread's connection
+
+        BEGIN IMMEDIATE takes the write lock up front, so checks made inside the
+        block still hold when the writes happen.
+        Nested inside another transaction (such as a group commit), the block
+        runs in a savepoint instead, so a failure undoes only its own writes.
+        """
+        conn = self.conn
+        depth = getattr(self._local, 'depth', 0)
+        if depth:
+            savepoint = f"nested_{depth}"
+            conn.execute(f"SAVEPOINT {savepoint}")
+            self._local.depth = depth + 1
+            try:
+                yield self.cursor
+            except BaseException:
+                conn.execute(f"ROLLBACK TO {savepoint}")
+                conn.execute(f"RELEASE {savepoint}")
+                raise
+            else:
+                conn.execute(f"RELEASE {savepoint}")
+            finally:
+                self._local.depth = depth
+            return
+            
+        if conn.in_transaction:
+            conn.commit()
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        self._local.depth = 1
+        self._local.touched = set()
+        try:
+            yield self.cursor
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            try:
+                conn.commit()
+            except sqlite3.Error:
+                # A failed COMMIT (e.g. a deferred constraint) leaves the transaction open
+                conn.rollback()
+                raise
+            if self._local.touched:
+                self.dashboard_cache.invalidate(self._local.touched)
+        finally:
+            self._local.depth = 0
+            self._local.touched = None
+            
+    def report_connection(self):
+        """Connection for report reads: the snapshot in reporting mode, else this thread's"""
+        if self.report_snapshot is None:
+            return self.conn
+        return self.report_snapshot.connection()
+        
+    def touch_member(self, *member_ids):
+        """Invalidate the cached account summaries of members a write changed
+
+        Inside a transaction the summaries are dropped once it commits, so no
+        reader can cache the old rows in between. None stands for every
+        member, for batch jobs.
+        """
+        if getattr(self._local, 'depth', 0):
+            self._local.touched.update(member_ids)
+        else:
+            self.dashboard_cache.invalidate(member_ids)
+            
+    def touch_member_of(self, name, key):
+        """touch_member for the member found by a single-ID lookup statement"""
+        rows = self.execute_statement(name, (key,))
+        if rows:
+            self.touch_member(rows[0][0])
+            
+    def record_query(self, query, params, elapsed, rows):
+        """Record timing for one statement and log it if it was slow"""
+        # Attribute the query to the first caller outside the query helpers
+        frame = sys._getframe(1)
+        while frame and frame.f_code.co_name in QUERY_HELPERS:
+            frame = frame.f_back
+        caller = frame.f_code.co_name if frame else 'unknown'
+        
+        with self._stats_lock:
+            profile = self.query_profile.setdefault(caller, [0, 0.0, 0])
+            profile[0] += 1
+            profile[1] += elapsed
+            profile[2] += max(rows, 0)
+            self.recent_queries.append((caller, elapsed, rows, query))
+            
+        elapsed_ms = elapsed * 1000
+        if self.slow_query_logger and elapsed_ms >= self.slow_query_ms:
+            self.slow_query_logger.info(
+                "slow query %.1f ms in %s (rows=%d)\nSQL: %s\nParams: %r\nPlan:\n%s",
+                elapsed_ms, caller, rows, " ".join(query.split()), params,
+                self.explain_query(query, params)
+            )
+            
+    def query_plan(self, query, params=()):
+        """Return the EXPLAIN QUERY PLAN rows for a statement"""
+        # Use a separate cursor so the caller's cursor state is untouched
+        return self.conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+        
+    def explain_query(self, query, params=()):
+        """Return the EXPLAIN QUERY PLAN output for a statement as text"""
+        try:
+            plan = self.query_plan(query, params)
+        except sqlite3.Error as e:
+            return f"  (plan unavailable: {e})"
+            
+        depth = {0: 0}
+        lines = []
+        for node_id, parent, _, detail in plan:
+            depth[node_id] = depth.get(parent, 0) + 1
+            lines.append("  " * depth[node_id] + detail)
+        return "\n".join(lines)
+        
+    def get_query_profile(self):
+        """Summarize query count, time and rows per calling method, slowest first"""
+        with self._stats_lock:
+            profile = [
+                {'caller': caller, 'queries': count, 'total_seconds': total, 'rows': rows}
+                for caller, (count, total, rows) in self.query_profile.items()
+            ]
+        return sorted(profile, key=lambda entry: entry['total_seconds'], reverse=True)
+        
+    def execute_statement(self, name, params=(), fetch=True, commit=False):
+        """Execute a named statement from the registry and record its timing"""
+        start = time.perf_counter()
+        result = self.execute_query(STATEMENTS[name], params, fetch, commit)
+        self.record_statement(name, time.perf_counter() - start)
+        return result
+        
+    def run_statement(self, name, params=(), fetch=True, commit=False):
+        """Run a named statement, letting database errors propagate to the caller"""
+        start = time.perf_counter()
+        try:
+            return self.run_query(STATEMENTS[name], params, fetch, commit)
+        finally:
+            self.record_statement(name, time.perf_counter() - start)
+            
+    def run_statement_many(self, name, seq_of_params, commit=False):
+        """Run a named statement once per parameter set with executemany"""
+        start = time.perf_counter()
+        try:
+            return self.run_many(STATEMENTS[name], seq_of_params, commit)
+        finally:
+            self.record_statement(name, time.perf_counter() - start)
+            
+    def record_statement(self, name, elapsed):
+        """Add one execution of a named statement to its counters"""
+        with self._stats_lock:
+            stats = self.statement_stats.setdefault(name, [0, 0.0])
+            stats[0] += 1
+            stats[1] += elapsed
+            
+    def get_statement_stats(self):
+        """Report execution count and cumulative time for each named statement"""
+        with self._stats_lock:
+            return {
+                name: {'executions': count, 'total_seconds': total}
+                for name, (count, total) in self.statement_stats.items()
+            }
+            
+    def reset_statement_stats(self):
+        """Clear the per-statement counters"""
+        with self._stats_lock:
+            self.statement_stats = {}
+            
+    def fetch_record(self, name, params=()):
+        """Run a named single-row lookup and return the row as a dict, or None"""
+        rows = self.execute_statement(name, params)
+        return dict(rows[0]) if rows else None
+
+    @write_operation
+    def apply_statement(self, name, params=(), outcome='updated'):
+        """Run one named write in its own transaction
+
+        Returns ActionResult(outcome), or 'not_found' when no row matched.
+        """
+        try:
+            with self.transaction():
+                changed = self.run_statement(name, params, fetch=False)
+        except sqlite3.Error as e:
+            return ActionResult('error', error=str(e))
+        return ActionResult(outcome if changed else 'not_found')
+
+    def listing(self, name, params=(), page_size=PAGE_SIZE, report=False):
+        """A KeysetPaginator over one of the PAGED_LISTINGS
+
+        report pages it from the report snapshot when reporting mode is on.
+        """
+        return KeysetPaginator(self, name, params, page_size, report)
+
+    # --- Accounts ---
+
+    def verify_login(self, kind, record, password):
+        """Check password for a 'member' or 'staff' row, upgrading its stored hash if needed
+
+        Removes Password from record, so the hash never leaves the service.
+        Plaintext passwords and hashes at an older cost are replaced by a
+        fresh hash on the first successful login, which is cached as verified
+        so the next login does not pay the KDF again.
+        """
+        stored = record.pop('Password')
+        if not self.passwords.verify(password, stored):
+            return False
+        if self.passwords.needs_rehash(stored):
+            new_hash = self.passwords.hash(password)
+            outcome, _, _ = self.apply_statement(
+                f'rehash_{kind}_password',
+                (new_hash, record[f'{kind.capitalize()}ID'], stored)
+            )
+            if outcome == 'updated':
+                self.passwords.remember(password, new_hash)
+        return True
+
+    def authenticate_member(self, email, password):
+        """Return the member with these credentials as a dict, or None"""
+        member = self.fetch_record('member_login', (email,))
+        if member and self.verify_login('member', member, password):
+            return member
+        return None
+
+    def authenticate_staff(self, email, password=None):
+        """Return the staff member with these credentials as a dict, or None
+
+        Staff who have no password set yet (Password is NULL) are refused,
+        unless demo_staff_login is on: then they log in with their email
+        alone, as in the demo data.
+        """
+        staff = self.fetch_record('staff_by_email', (email,))
+        if not staff:
+            return None
+        if staff.get('Password') is None:  # Also before the Staff.Password migration
+            if not self.demo_staff_login:
+                return None
+            staff.pop('Password', None)
+            return staff
+        return staff if self.verify_login('staff', staff, password or '') else None
+
+    def set_staff_password(self, staff_id, password):
+        """Store a new salted hash of a staff member's password"""
+        return self.apply_statement('set_staff_password', (self.passwords.hash(password), staff_id))
+
+    def member_by_email(self, email):
+        """Return the member with this email as a dict, or None"""
+        return self.fetch_record('member_by_email', (email,))
+
+    def account_summary(self, member_id):
+        """Everything the member account screen shows, as an AccountSummary
+
+        Served from the dashboard cache when possible; a miss loads all four
+        sections with the single member_dashboard query. Treat the rows as
+        read-only, since they are shared with later callers.
+        """
+        summary = self.dashboard_cache.get(member_id)
+        if summary is not None:
+            return summary
+            
+        token = self.dashboard_cache.token()
+        rows = self.execute_statement('member_dashboard', {'member_id': member_id})
+        if not rows:
+            return AccountSummary([], [], [], [])
+        summary = AccountSummary(*(json.loads(section) for section in rows[0]))
+        self.dashboard_cache.put(member_id, summary, token)
+        return summary
+        
+    def get_dashboard_stats(self):
+        """Hit, miss, eviction and invalidation counts of the account summary cache"""
+        return self.dashboard_cache.get_stats()
+
+    # --- Catalog ---
+
+    def search_items(self, field, search_term, limit=None):
+        """Search items by title or creator, ranked by relevance, at most limit rows"""
+        match_query = build_match_query(field, search_term)
+        limit = -1 if limit is None else limit  # A negative LIMIT means no limit
+        
+        if self.search_enabled and match_query:
+            return self.execute_statement('search_items_fts', (match_query, limit))
+            
+        # Fall back to substring matching when FTS5 is unavailable
+        name = 'search_title_like' if field == 'Title' else 'search_creator_like'
+        return self.execute_statement(name, (f'%{search_term}%', limit))
+        
+    def items_by_type(self, item_type, limit=None):
+        """List the catalog entries of one item type, at most limit rows"""
+        return self.execute_statement('catalog_by_type', (item_type, -1 if limit is None else limit))
+
+    @write_operation
+    def add_item(self, item_type, title, publication_date=None, **details):
+        """Add a new item and its subtype row in a single write transaction
+
+        details holds the subtype columns listed in ITEM_SUBTYPE_COLUMNS;
+        missing ones are stored as NULL. Returns ActionResult('added') with
+        the new ItemID, or 'invalid_type'.
+        """
+        if item_type not in ITEM_SUBTYPE_COLUMNS:
+            return ActionResult('invalid_type')
+
+        subtype_row = tuple(details.get(column) for column in ITEM_SUBTYPE_COLUMNS[item_type])
+
+        try:
+            with self.transaction():
+                self.run_statement('insert_library_item', (title, publication_date, item_type), fetch=False)
+                item_id = self.cursor.lastrowid
+                self.run_statement(f'insert_{item_type.lower()}', (item_id,) + subtype_row, fetch=False)
+        except sqlite3.Error as e:
+            return ActionResult('error', error=str(e))
+
+        return ActionResult('added', {'ItemID': item_id, 'Title': title, 'ItemType': item_type})
+
+    # --- Circulation ---
+
+    def active_borrowings(self, member_id):
+        """List a member's open borrowings, soonest due first"""
+        return self.execute_statement('member_active_borrowings', (member_id,))
+
+    def active_borrowings_by_email(self, email):
+        """List the open borrowings of the member with this email"""
+        return self.execute_statement('member_active_borrowings_by_email', (email,))
+
+    def open_borrowing_for_item(self, item_id):
+        """Return the open borrowing of an item as a dict, or None"""
+        return self.fetch_record('open_borrowing_for_item', (item_id,))
+
+    def checkout_item(self, member_id, item_id):
+        """Check out one item in a single write transaction
+
+        Returns an ActionResult whose outcome is 'borrowed', 'not_found',
+        'unavailable' or 'already_borrowed' and whose record is the item,
+        with its DueDate once borrowed.
+        """
+        if not str(item_id).strip().isdigit():
+            return ActionResult('not_found')
+            
+        checkout = self.checkout_items(member_id, [item_id])
+        if checkout.results is None:
+            return ActionResult('error', error=checkout.error)
+            
+        item = checkout.results[0]
+        if item['Outcome'] == 'not_found':
+            return ActionResult('not_found')
+        if item['Outcome'] == 'borrowed':
+            item['DueDate'] = checkout.due_date
+        return ActionResult(item['Outcome'], item)
+        
+    @write_operation
+    def checkout_items(self, member_id, item_ids):
+        """Check out several items for one member in a single write transaction
+
+        Every requested ID is validated with one IN query and the Borrowing
+        rows are inserted with one executemany; the borrow trigger marks the
+        items as borrowed. Returns a BatchResult with one result dict per
+        distinct item ID whose Outcome is 'borrowed', 'not_found' (also for
+        IDs that are not numbers), 'unavailable' or 'already_borrowed';
+        results is None on failure.
+        """
+        borrow_date = datetime.date.today()
+        due_date = borrow_date + datetime.timedelta(days=LOAN_PERIOD_DAYS)
+        requested = distinct_ids(item_ids)
+        item_ids = [item_id for item_id in requested.values() if item_id is not None]
+        
+        try:
+            # BEGIN IMMEDIATE holds the write lock from the availability check
+            # through the inserts, so no other desk can claim these items
+            with self.transaction():
+                items = {
+                    row['ItemID']: dict(row)
+                    for row in self.run_statement('items_for_checkout', (member_id, json.dumps(item_ids)))
+                }
+                
+                results = []
+                for requested_id, item_id in requested.items():
+                    item = items.get(item_id)
+                    if item is None:
+                        results.append({'ItemID': requested_id, 'Outcome': 'not_found'})
+                        continue
+                    # An item the member has out is also not Available, so check that first
+                    if item['AlreadyBorrowed']:
+                        item['Outcome'] = 'already_borrowed'
+                    elif item['Status'] != 'Available':
+                        item['Outcome'] = 'unavailable'
+                    else:
+                        item['Outcome'] = 'borrowed'
+                    results.append(item)
+                    
+                self.run_statement_many(
+                    'insert_borrowing',
+                    (
+                        (member_id, item['ItemID'], borrow_date, due_date)
+                        for item in results if item['Outcome'] == 'borrowed'
+                    )
+                )
+                self.touch_member(member_id)
+        except sqlite3.Error as e:
+            return BatchResult(None, error=str(e))
+            
+        return BatchResult(results, due_date)
+        
+    @write_operation
+    def return_borrowing(self, borrow_id, staff_id=None, member_id=None, return_date=None):
+        """Return one borrowed item in a single write transaction
+
+        Only ReturnDate (and the receiving staff member) is written here; the
+        update_item_status_returned and create_fine_for_late_return triggers
+        free the item and issue any late fine in the same transaction.
+        Returns an ActionResult whose outcome is 'returned' or 'not_open';
+        once returned, its record holds the due date, days late and fine.
+        """
+        return_date = return_date or datetime.date.today()
+        
+        try:
+            with self.transaction():
+                updated = self.run_statement(
+                    'return_borrowing',
+                    (return_date, staff_id, borrow_id, member_id, member_id),
+                    fetch=False
+                )
+                if updated == 0:
+                    return ActionResult('not_open')
+                summary = dict(self.run_statement('return_summary', (borrow_id,))[0])
+                self.touch_member(summary['MemberID'])
+        except sqlite3.Error as e:
+            return ActionResult('error', error=str(e))
+            
+        return ActionResult('returned', summary)
+        
+    @write_operation
+    def return_items(self, item_ids, staff_id, return_date=None):
+        """Check in a batch of items in a single write transaction
+
+        Open borrowings for all IDs are found with one query and closed with
+        one executemany; the return triggers free each item and issue fines.
+        Returns a BatchResult with one result dict per distinct item ID, in
+        the order given, whose Outcome is 'returned', 'not_borrowed' or
+        'not_found' for IDs that are not numbers; results is None on failure.
+        """
+        return_date = return_date or datetime.date.today()
+        requested = distinct_ids(item_ids)
+        item_ids = [item_id for item_id in requested.values() if item_id is not None]
+        
+        try:
+            with self.transaction():
+                open_borrowings = {
+                    row['ItemID']: dict(row)
+                    for row in self.run_statement('open_borrowings_for_items', (json.dumps(item_ids),))
+                }
+                borrow_ids = [borrow['BorrowID'] for borrow in open_borrowings.values()]
+                self.run_statement_many(
+                    'batch_return_borrowing',
+                    ((return_date, staff_id, borrow_id) for borrow_id in borrow_ids)
+                )
+                fines = dict(
+                    self.run_statement('unpaid_fines_for_borrowings', (json.dumps(borrow_ids),))
+                )
+                self.touch_member(*(borrow['MemberID'] for borrow in open_borrowings.values()))
+        except sqlite3.Error as e:
+            return BatchResult(None, error=str(e))
+            
+        results = []
+        for requested_id, item_id in requested.items():
+            if item_id is None:
+                results.append({'ItemID': requested_id, 'Outcome': 'not_found'})
+                continue
+            borrow = open_borrowings.get(item_id)
+            if borrow is None:
+                results.append({'ItemID': item_id, 'Outcome': 'not_borrowed'})
+                continue
+            due_date = datetime.date.fromisoformat(borrow['DueDate'])
+            borrow.update(
+                Outcome='returned',
+                DaysLate=max((return_date - due_date).days, 0),
+                FineAmount=fines.get(borrow['BorrowID'])
+            )
+            results.append(borrow)
+        return BatchResult(results)
+        
+    # --- Events ---
+
+    def upcoming_events(self, event_type=None, title=None, today=None):
+        """List upcoming events, optionally of one type or matching a title"""
+        today = today or datetime.date.today()
+        if event_type:
+            return self.execute_statement('upcoming_events_by_type', (event_type, today))
+        if title is not None:
+            return self.execute_statement('upcoming_events_by_title', (f'%{title}%', today))
+        return self.execute_statement('upcoming_events', (today,))
+
+    def events_between(self, start_date, end_date):
+        """List the events between two YYYY-MM-DD dates, inclusive"""
+        return self.execute_statement('events_in_range', (start_date, end_date))
+
+    def event(self, event_id):
+        """Return an event with its room and registration count as a dict, or None"""
+        return self.fetch_record('event_with_count', (event_id,))
+
+    def event_detail(self, event_id):
+        """Return an event with its room and organizer as a dict, or None"""
+        return self.fetch_record('event_detail', (event_id,))
+
+    def event_attendees(self, event_id):
+        """List everyone registered for an event"""
+        return self.execute_statement('event_attendees', (event_id,))
+
+    def available_rooms(self):
+        """List the rooms that can be booked for events"""
+        return self.execute_statement('available_rooms')
+
+    @write_operation
+    def create_event(self, staff_id, title, description, event_date, start_time, end_time,
+                     max_attendees, event_type, target_audience, room_id):
+        """Create an event organized by staff_id; returns ActionResult('created')"""
+        try:
+            with self.transaction():
+                self.run_statement(
+                    'insert_event',
+                    (title, description, event_date, start_time, end_time, max_attendees,
+                     event_type, target_audience, staff_id, room_id),
+                    fetch=False
+                )
+                event_id = self.cursor.lastrowid
+        except sqlite3.Error as e:
+            return ActionResult('error', error=str(e))
+        return ActionResult('created', {'EventID': event_id, 'Title': title})
+
+    @write_operation
+    def register_attendee(self, event_id, member_id, allow_past=False, today=None):
+        """Register a member for an event in a single write transaction
+
+        A cancelled registration is reinstated rather than duplicated. Staff
+        may pass allow_past to record attendance after the event. Returns an
+        ActionResult whose record is the event and whose outcome is
+        'registered', 'reregistered', 'not_found', 'past', 'full' or
+        'already_registered'.
+        """
+        today = today or datetime.date.today()
+
+        try:
+            with self.transaction():
+                event = self.run_statement('event_with_count', (event_id,))
+                if not event:
+                    return ActionResult('not_found')
+                event = dict(event[0])
+
+                event_date = datetime.datetime.strptime(event['EventDate'], '%Y-%m-%d').date()
+                if event_date < today and not allow_past:
+                    return ActionResult('past', event)
+
+                existing = self.run_statement('member_event_attendance', (event_id, member_id))
+                if existing and existing[0]['AttendanceStatus'] != 'Cancelled':
+                    return ActionResult('already_registered', event)
+
+                if event['RegisteredAttendees'] >= event['MaxAttendees']:
+                    return ActionResult('full', event)
+
+                self.touch_member(member_id)
+                if existing:
+                    self.run_statement('reregister_attendance', (today, event_id, member_id), fetch=False)
+                    return ActionResult('reregistered', event)
+
+                self.run_statement('insert_attendance', (event_id, member_id, today), fetch=False)
+        except sqlite3.Error as e:
+            return ActionResult('error', error=str(e))
+
+        return ActionResult('registered', event)
+
+    def attendance_record(self, attendance_id, event_id):
+        """Return one registration for an event as a dict, or None"""
+        return self.fetch_record('attendance_detail', (attendance_id, event_id))
+
+    def set_attendance_status(self, attendance_id, status):
+        """Mark a registration Registered, Attended or Cancelled"""
+        result = self.apply_statement('set_attendance_status', (status, attendance_id))
+        if result.outcome == 'updated':
+            self.touch_member_of('attendance_member', attendance_id)
+        return result
+
+    # --- Help requests ---
+
+    def member_help_requests(self, member_id):
+        """List a member's unresolved help requests with the assigned staff"""
+        return self.execute_statement('member_open_help_requests_with_staff', (member_id,))
+
+    @write_operation
+    def submit_help_request(self, member_id, description, today=None):
+        """Open a help request for a member; returns ActionResult('submitted')"""
+        today = today or datetime.date.today()
+        try:
+            with self.transaction():
+                self.run_statement('insert_help_request', (member_id, today, description), fetch=False)
+                request_id = self.cursor.lastrowid
+                self.touch_member(member_id)
+        except sqlite3.Error as e:
+            return ActionResult('error', error=str(e))
+        return ActionResult('submitted', {'RequestID': request_id})
+
+    def help_request(self, request_id):
+        """Return a help request with member and staff names as a dict, or None"""
+        return self.fetch_record('help_request_detail', (request_id,))
+
+    def assign_help_request(self, request_id, staff_id):
+        """Assign a help request to staff_id, moving it from Open to InProgress"""
+        result = self.apply_statement('assign_help_request', (staff_id, request_id), 'assigned')
+        if result.outcome == 'assigned':
+            self.touch_member_of('help_request_member', request_id)
+        return result
+
+    def set_help_request_status(self, request_id, status, today=None):
+        """Set a help request's status; Resolved also records the closing date"""
+        closed_date = (today or datetime.date.today()) if status == 'Resolved' else None
+        result = self.apply_statement('set_help_request_status', (status, closed_date, request_id))
+        if result.outcome == 'updated':
+            self.touch_member_of('help_request_member', request_id)
+        return result
+
+    def resolve_help_request(self, request_id, resolution, today=None):
+        """Record a resolution and close the help request"""
+        result = self.apply_statement(
+            'resolve_help_request',
+            (resolution, today or datetime.date.today(), request_id),
+            'resolved'
+        )
+        if result.outcome == 'resolved':
+            self.touch_member_of('help_request_member', request_id)
+        return result
+
+    # --- Acquisitions ---
+
+    def acquisition_request(self, request_id):
+        """Return an acquisition request with member and staff names as a dict, or None"""
+        return self.fetch_record('acquisition_detail', (request_id,))
+
+    def decide_acquisition(self, request_id, staff_id, approve, notes=""):
+        """Approve or reject a pending acquisition request
+
+        Empty notes keep any notes already on the request. Returns
+        'approved' or 'rejected', or 'not_found' if no pending request matched.
+        """
+        status = 'Approved' if approve else 'Rejected'
+        return self.apply_statement(
+            'decide_acquisition', (status, staff_id, notes, request_id), status.lower()
+        )
+
+    def add_acquisition_notes(self, request_id, notes):
+        """Append a line of notes to an acquisition request"""
+        return self.apply_statement('append_acquisition_notes', (notes, notes, request_id))
+
+    # --- Volunteers ---
+
+    def volunteer_for_member(self, member_id):
+        """Return a member's volunteer record as a dict, or None"""
+        return self.fetch_record('volunteer_by_member', (member_id,))
+
+    def volunteer_detail(self, volunteer_id):
+        """Return a volunteer with their member contact details as a dict, or None"""
+        return self.fetch_record('volunteer_detail', (volunteer_id,))
+
+    @write_operation
+    def register_volunteer(self, member_id, skills, availability, today=None):
+        """Sign a member up as an active volunteer; returns ActionResult('registered')"""
+        today = today or datetime.date.today()
+        try:
+            with self.transaction():
+                self.run_statement('insert_volunteer', (member_id, skills, availability, today), fetch=False)
+        except sqlite3.IntegrityError:
+            return ActionResult('already_volunteer')
+        except sqlite3.Error as e:
+            return ActionResult('error', error=str(e))
+        return ActionResult('registered')
+
+    def reactivate_volunteer(self, volunteer_id, today=None):
+        """Make an inactive volunteer active again from today"""
+        return self.apply_statement(
+            'reactivate_volunteer', (today or datetime.date.today(), volunteer_id), 'reactivated'
+        )
+
+    def update_volunteer(self, volunteer_id, skills=None, availability=None, status=None):
+        """Change any of a volunteer's skills, availability or status"""
+        return self.apply_statement('update_volunteer', (skills, availability, status, volunteer_id))
+
+    # --- Fines ---
+
+    def unpaid_fines_total(self, report=False):
+        """Total amount of all unpaid fines"""
+        if report:
+            return self.report_connection().execute(STATEMENTS['unpaid_fines_total']).fetchone()[0]
+        return self.execute_statement('unpaid_fines_total')[0][0]
+
+    def member_fines(self, email):
+        """List every fine of the member with this email, unpaid first"""
+        return self.execute_statement('member_fines_by_email', (email,))
+
+    def fine_detail(self, fine_id):
+        """Return a fine with its member, item and loan dates as a dict, or None"""
+        return self.fetch_record('fine_detail', (fine_id,))
+
+    def pay_fine(self, fine_id, paid_date=None):
+        """Mark an unpaid fine as paid
+
+        Returns ActionResult('paid'), or 'already_paid' with the fine as its
+        record, or 'loan_open' with the fine if the item is still out (its
+        fine is still accruing), or 'not_found'.
+        """
+        paid_date = paid_date or datetime.date.today()
+        result = self.apply_statement('mark_fine_paid', (paid_date, fine_id), 'paid')
+        if result.outcome == 'not_found':
+            fine = self.fine_detail(fine_id)
+            if fine and fine['Status'] == 'Paid':
+                return ActionResult('already_paid', fine)
+            if fine:
+                return ActionResult('loan_open', fine)
+        elif result.outcome == 'paid':
+            self.touch_member_of('fine_member', fine_id)
+            return ActionResult('paid', {'FineID': fine_id, 'PaidDate': paid_date})
+        return result
+
+    @write_operation
+    def accrue_overdue_fines(self, as_of=None):
+        """Bring the fine of every open overdue loan up to as_of in one set-based pass
+
+        Fines are priced by the FinePolicy tables. New overdue loans get an
+        Unpaid fine and existing unpaid ones are raised to the current
+        amount with a single INSERT ... ON CONFLICT, and the run is recorded
+        in FineAccrualRun. Loans whose fine is paid or capped are skipped
+        and unchanged fines are not rewritten, but every other open overdue
+        loan is still priced on each run, since its fine grows daily; the
+        cost follows the number of open overdue loans, not the loans that
+        became overdue since the last run. The latest recorded
+        AsOfDate is the watermark: a run for that date or an earlier one
+        returns 'up_to_date' without touching Fine. Otherwise returns
+        ActionResult('accrued') with the run record.
+        """
+        as_of = as_of or datetime.date.today()
+        started = datetime.datetime.now()
+        
+        try:
+            with self.transaction():
+                watermark = self.run_statement('fine_accrual_watermark')[0][0]
+                if watermark is not None and watermark >= as_of.isoformat():
+                    return ActionResult('up_to_date', {'AsOfDate': watermark})
+                    
+                # The upsert reports inserts and updates together, so count the
+                # loans about to get their first fine
+                added = self.run_statement('count_unfined_overdue', {'as_of': as_of})[0][0]
+                changed = self.run_statement('accrue_overdue_fines', {'as_of': as_of}, fetch=False)
+                
+                run = {
+                    'AsOfDate': as_of,
+                    'StartedAt': started.isoformat(sep=' ', timespec='seconds'),
+                    'FinishedAt': datetime.datetime.now().isoformat(sep=' ', timespec='seconds'),
+                    'FinesAdded': added,
+                    'FinesUpdated': changed - added
+                }
+                self.run_statement('insert_fine_accrual_run', tuple(run.values()), fetch=False)
+                self.touch_member(None)
+        except sqlite3.Error as e:
+            return ActionResult('error', error=str(e))
+            
+        return ActionResult('accrued', run)
+        
+    def fine_policy(self):
+        """The current FinePolicy"""
+        return FinePolicy.load(self)
+        
+    def set_fine_rule(self, item_type, daily_rate, grace_days=0, max_fine=None):
+        """Set the rate, grace period and cap for one item type
+
+        Takes effect for returns from now on; reprice_fines applies it to
+        past ones.
+        """
+        return self.apply_statement('upsert_fine_rule', (item_type, daily_rate, grace_days, max_fine))
+        
+    def add_holiday(self, holiday_date, name=None):
+        """Mark a day as closed, so it never counts as a day late"""
+        return self.apply_statement('insert_holiday', (holiday_date, name), 'added')
+        
+    def remove_holiday(self, holiday_date):
+        """Count a day as a normal opening day again"""
+        return self.apply_statement('delete_holiday', (holiday_date,), 'removed')
+        
+    @write_operation
+    def reprice_fines(self, start_date, end_date, chunk_size=REPRICE_CHUNK_ROWS):
+        """Re-price the fines of late returns made between two dates under the current policy
+
+        Late returns are read chunk_size at a time with their current fine
+        and priced with FinePolicy.amounts; only the fines that change are
+        written back, with executemany, in one transaction. Unpaid fines are
+        raised, lowered or added; an unpaid fine whose new amount is zero is
+        removed. Paid fines never change. Returns ActionResult('repriced')
+        with the counts.
+        """
+        counts = {'LateReturns': 0, 'FinesChanged': 0, 'FinesRemoved': 0}
+        
+        try:
+            with self.transaction():
+                policy = FinePolicy.load(self)
+                # A separate cursor, since the writes below reuse this thread's cursor
+                loans = self.conn.execute(STATEMENTS['late_returns_between'], (start_date, end_date))
+                try:
+                    while True:
+                        chunk = loans.fetchmany(chunk_size)
+                        if not chunk:
+                            break
+                        borrow_ids, item_types, due_dates, return_dates, fines, statuses = zip(*chunk)
+                        amounts = policy.amounts(item_types, due_dates, return_dates)
+                        
+                        changed, removed = [], []
+                        for borrow_id, returned, fine, status, amount in zip(
+                            borrow_ids, return_dates, fines, statuses, amounts
+                        ):
+                            if status == 'Paid' or fine == amount or (status is None and amount == 0):
+                                continue
+                            if amount > 0:
+                                changed.append((borrow_id, amount, returned))
+                            else:
+                                removed.append((borrow_id,))
+                                
+                        counts['LateReturns'] += len(chunk)
+                        counts['FinesChanged'] += self.run_statement_many('reprice_fine', changed)
+                        counts['FinesRemoved'] += self.run_statement_many('clear_unpaid_fine', removed)
+                finally:
+                    loans.close()
+                self.touch_member(None)
         except sqlite3.Error as e:
-            print(f"Query execution error: {e}")
-            print(f"Query: {query}")
-            print(f"Params: {params}")
+            return ActionResult('error', error=str(e))
+            
+        return ActionResult('repriced', counts)
+        
+    def fines_report_rows(self):
+        """Yield every fine on record, newest first, without loading them all"""
+        return self.iter_query(STATEMENTS['fines_report'], report=True)
+
+class LibrarySystem(LibraryService):
+    """Interactive console menus built on LibraryService"""
+    def __init__(self, db_file, pool_size=POOL_SIZE, instrument=False, slow_query_ms=None,
+                 group_commit=False, report_snapshot_age=None, demo_staff_login=False):
+        """Initialize the library system with database connection"""
+        super().__init__(db_file, pool_size, instrument, slow_query_ms, group_commit, report_snapshot_age,
+                         demo_staff_login)
+        self.current_user = None
+        self.user_type = None
+        
+    def browse_pages(self, paginator, title, headers, format_row, prompt):
+        """Show a paged listing and return the user's answer to the prompt
+
+        'n' and 'p' move between pages; any other answer is returned to the
+        caller. Returns None if the listing is empty.
+        """
+        rows = paginator.first_page()
+        if not rows:
             return None
             
+        page = 1
+        while True:
+            if page > 1 or paginator.has_next:
+                print(f"\n{title} (page {page}):")
+            else:
+                print(f"\n{title}:")
+            if paginator.report:
+                self.print_snapshot_note()
+            print(tabulate([format_row(row) for row in rows], headers=headers, tablefmt="grid"))
+            
+            navigation = []
+            if paginator.has_next:
+                navigation.append("n = next page")
+            if paginator.has_prev:
+                navigation.append("p = previous page")
+            if navigation:
+                print(", ".join(navigation))
+                
+            answer = input(prompt)
+            
+            if answer.lower() == 'n' and paginator.has_next:
+                rows = paginator.next_page()
+                page += 1
+            elif answer.lower() == 'p' and paginator.has_prev:
+                rows = paginator.prev_page()
+                page -= 1
+            else:
+                return answer
+            clear_screen()
+            
+    def print_snapshot_note(self):
+        """Tell staff when a report comes from the snapshot rather than live data"""
+        if self.report_snapshot and self.report_snapshot.taken_at:
+            print(f"(Report snapshot as of {self.report_snapshot.taken_at:%Y-%m-%d %H:%M:%S})")
+            
     def login(self):
         """Handle user login"""
         clear_screen()
@@ -68,11 +2420,10 @@ class LibrarySystem:
             email = input("Enter your email: ")
             password = getpass("Enter your password: ")
             
-            query = "SELECT * FROM Member WHERE Email = ? AND Password = ?"
-            result = self.execute_query(query, (email, password))
+            member = self.authenticate_member(email, password)
             
-            if result and len(result) > 0:
-                self.current_user = dict(result[0])
+            if member:
+                self.current_user = member
                 self.user_type = "member"
                 print(f"\nWelcome, {self.current_user['FirstName']} {self.current_user['LastName']}!")
                 input("Press Enter to continue...")
@@ -86,13 +2437,10 @@ class LibrarySystem:
             email = input("Enter your staff email: ")
             password = getpass("Enter your password: ")
             
-            # In a real application, staff would have passwords too
-            # For demo purposes, we're just checking if the email exists
-            query = "SELECT * FROM Staff WHERE Email = ?"
-            result = self.execute_query(query, (email,))
+            staff = self.authenticate_staff(email, password)
             
-            if result and len(result) > 0:
-                self.current_user = dict(result[0])
+            if staff:
+                self.current_user = staff
                 self.user_type = "staff"
                 print(f"\nWelcome, {self.current_user['FirstName']} {self.current_user['LastName']}!")
                 input("Press Enter to continue...")
@@ -124,52 +2472,11 @@ class LibrarySystem:
         
         if choice == '1':
             search_term = input("Enter title to search for: ")
-            query = """
-            SELECT i.ItemID, i.Title, i.Status, i.ItemType, i.Location, 
-                   CASE 
-                       WHEN i.ItemType = 'Book' THEN b.Author
-                       WHEN i.ItemType = 'Ebook' THEN e.Author
-                       WHEN i.ItemType = 'Magazine' THEN m.Publisher
-                       WHEN i.ItemType = 'Journal' THEN j.Publisher
-                       WHEN i.ItemType = 'Media' THEN md.Artist
-                       ELSE 'Unknown'
-                   END as Creator
-            FROM LibraryItem i
-            LEFT JOIN Book b ON i.ItemID = b.ItemID
-            LEFT JOIN Ebook e ON i.ItemID = e.ItemID
-            LEFT JOIN Magazine m ON i.ItemID = m.ItemID
-            LEFT JOIN Journal j ON i.ItemID = j.ItemID
-            LEFT JOIN Media md ON i.ItemID = md.ItemID
-            WHERE i.Title LIKE ?
-            ORDER BY i.Title
-            """
-            results = self.execute_query(query, (f'%{search_term}%',))
+            results = self.search_items('Title', search_term)
             
         elif choice == '2':
             search_term = input("Enter author/creator to search for: ")
-            query = """
-            SELECT i.ItemID, i.Title, i.Status, i.ItemType, i.Location, 
-                   CASE 
-                       WHEN i.ItemType = 'Book' THEN b.Author
-                       WHEN i.ItemType = 'Ebook' THEN e.Author
-                       WHEN i.ItemType = 'Magazine' THEN m.Publisher
-                       WHEN i.ItemType = 'Journal' THEN j.Publisher
-                       WHEN i.ItemType = 'Media' THEN md.Artist
-                       ELSE 'Unknown'
-                   END as Creator
-            FROM LibraryItem i
-            LEFT JOIN Book b ON i.ItemID = b.ItemID AND i.ItemType = 'Book'
-            LEFT JOIN Ebook e ON i.ItemID = e.ItemID AND i.ItemType = 'Ebook'
-            LEFT JOIN Magazine m ON i.ItemID = m.ItemID AND i.ItemType = 'Magazine'
-            LEFT JOIN Journal j ON i.ItemID = j.ItemID AND i.ItemType = 'Journal'
-            LEFT JOIN Media md ON i.ItemID = md.ItemID AND i.ItemType = 'Media'
-            WHERE b.Author LIKE ? OR e.Author LIKE ? OR m.Publisher LIKE ? 
-                  OR j.Publisher LIKE ? OR md.Artist LIKE ?
-            ORDER BY i.Title
-            """
-            params = (f'%{search_term}%', f'%{search_term}%', f'%{search_term}%', 
-                     f'%{search_term}%', f'%{search_term}%')
-            results = self.execute_query(query, params)
+            results = self.search_items('Creator', search_term)
             
         elif choice == '3':
             print("\nItem Types:")
@@ -190,26 +2497,7 @@ class LibrarySystem:
             
             if type_choice in item_types:
                 item_type = item_types[type_choice]
-                query = """
-                SELECT i.ItemID, i.Title, i.Status, i.ItemType, i.Location, 
-                       CASE 
-                           WHEN i.ItemType = 'Book' THEN b.Author
-                           WHEN i.ItemType = 'Ebook' THEN e.Author
-                           WHEN i.ItemType = 'Magazine' THEN m.Publisher
-                           WHEN i.ItemType = 'Journal' THEN j.Publisher
-                           WHEN i.ItemType = 'Media' THEN md.Artist
-                           ELSE 'Unknown'
-                       END as Creator
-                FROM LibraryItem i
-                LEFT JOIN Book b ON i.ItemID = b.ItemID
-                LEFT JOIN Ebook e ON i.ItemID = e.ItemID
-                LEFT JOIN Magazine m ON i.ItemID = m.ItemID
-                LEFT JOIN Journal j ON i.ItemID = j.ItemID
-                LEFT JOIN Media md ON i.ItemID = md.ItemID
-                WHERE i.ItemType = ?
-                ORDER BY i.Title
-                """
-                results = self.execute_query(query, (item_type,))
+                results = self.items_by_type(item_type)
             else:
                 print("\nInvalid choice.")
                 input("Press Enter to continue...")
@@ -255,7 +2543,7 @@ class LibrarySystem:
         input("\nPress Enter to continue...")
         
     def borrow_item(self, item_id=None):
-        """Borrow an item from the library"""
+        """Borrow one or more items from the library"""
         if self.user_type != "member":
             print("\nYou need to be logged in as a member to borrow items.")
             input("Press Enter to continue...")
@@ -265,65 +2553,78 @@ class LibrarySystem:
         print("\n===== BORROW LIBRARY ITEM =====\n")
         
         if not item_id:
-            item_id = input("Enter the ID of the item you want to borrow: ")
+            item_id = input("Enter the ID of the item you want to borrow (separate several IDs with commas): ")
+            
+        item_ids = re.findall(r'\d+', str(item_id))
+        if len(item_ids) > 1:
+            self.borrow_items(item_ids)
+            return
         
-        # Check if item exists and is available
-        query = "SELECT * FROM LibraryItem WHERE ItemID = ?"
-        item = self.execute_query(query, (item_id,))
+        outcome, item, error = self.checkout_item(self.current_user['MemberID'], item_id)
         
-        if not item or len(item) == 0:
+        if outcome == 'not_found':
             print(f"\nItem with ID {item_id} not found.")
-            input("Press Enter to continue...")
-            return
-            
-        item = dict(item[0])
-        
-        if item['Status'] != 'Available':
+        elif outcome == 'unavailable':
             print(f"\nItem '{item['Title']}' is not available for borrowing (Status: {item['Status']}).")
-            input("Press Enter to continue...")
-            return
+        elif outcome == 'already_borrowed':
+            print(f"\nYou already have borrowed '{item['Title']}' and haven't returned it yet.")
+        elif outcome == 'borrowed':
+            print(f"\nSuccessfully borrowed: {item['Title']}")
+            print(f"Due date: {item['DueDate']}")
+            print("\nPlease return the item by the due date to avoid fines.")
+        else:
+            print(f"\nFailed to borrow the item: {error}. Please try again.")
             
-        # Check if user already has active borrowings for this item
-        query = """
-        SELECT * FROM Borrowing 
-        WHERE MemberID = ? AND ItemID = ? AND ReturnDate IS NULL
-        """
-        existing_borrow = self.execute_query(query, (self.current_user['MemberID'], item_id))
+        input("\nPress Enter to continue...")
         
-        if existing_borrow and len(existing_borrow) > 0:
-            print(f"\nYou already have borrowed '{item['Title']}' and haven't returned it yet.")
-            input("Press Enter to continue...")
+    def borrow_items(self, item_ids):
+        """Borrow several items at once and show the result for each"""
+        results, due_date, error = self.checkout_items(self.current_user['MemberID'], item_ids)
+        
+        if results is None:
+            print(f"\nFailed to borrow the items: {error}. Please try again.")
+            input("\nPress Enter to continue...")
             return
             
-        # Calculate due date (14 days from today)
-        borrow_date = datetime.date.today()
-        due_date = borrow_date + datetime.timedelta(days=14)
-        
-        # Create borrowing record
-        query = """
-        INSERT INTO Borrowing (MemberID, ItemID, BorrowDate, DueDate)
-        VALUES (?, ?, ?, ?)
-        """
-        result = self.execute_query(
-            query, 
-            (self.current_user['MemberID'], item_id, borrow_date, due_date),
-            fetch=False,
-            commit=True
-        )
+        messages = {
+            'borrowed': "Borrowed",
+            'not_found': "Not found",
+            'unavailable': "Not available ({Status})",
+            'already_borrowed': "Already borrowed by you"
+        }
+        headers = ["Item ID", "Title", "Result"]
+        table_data = []
         
-        if result:
-            # Update item status
-            update_query = "UPDATE LibraryItem SET Status = 'Borrowed' WHERE ItemID = ?"
-            self.execute_query(update_query, (item_id,), fetch=False, commit=True)
+        for result in results:
+            table_data.append([
+                result['ItemID'],
+                result.get('Title', ''),
+                messages[result['Outcome']].format(**result)
+            ])
             
-            print(f"\nSuccessfully borrowed: {item['Title']}")
+        print(tabulate(table_data, headers=headers, tablefmt="grid"))
+        
+        borrowed = sum(1 for result in results if result['Outcome'] == 'borrowed')
+        print(f"\nBorrowed {borrowed} of {len(results)} items.")
+        if borrowed:
             print(f"Due date: {due_date}")
-            print("\nPlease return the item by the due date to avoid fines.")
-        else:
-            print("\nFailed to borrow the item. Please try again.")
+            print("\nPlease return the items by the due date to avoid fines.")
             
         input("\nPress Enter to continue...")
         
+    def print_return_result(self, result):
+        """Print the outcome of a return"""
+        summary = result.record
+        if result.outcome == 'returned' and summary['FineAmount'] is not None:
+            print(f"\nItem returned successfully, but it was {summary['DaysLate']} days late.")
+            print(f"A fine of ${summary['FineAmount']:.2f} has been issued.")
+        elif result.outcome == 'returned':
+            print("\nItem returned successfully. Thank you!")
+        elif result.outcome == 'not_open':
+            print("\nThis borrowing is no longer active; it may already have been returned.")
+        else:
+            print(f"\nFailed to return the item: {result.error}. Please try again.")
+            
     def return_item(self):
         """Return a borrowed item"""
         if self.user_type != "member":
@@ -335,14 +2636,7 @@ class LibrarySystem:
         print("\n===== RETURN BORROWED ITEM =====\n")
         
         # Get user's active borrowings
-        query = """
-        SELECT b.BorrowID, i.ItemID, i.Title, i.ItemType, b.BorrowDate, b.DueDate
-        FROM Borrowing b
-        JOIN LibraryItem i ON b.ItemID = i.ItemID
-        WHERE b.MemberID = ? AND b.ReturnDate IS NULL
-        ORDER BY b.DueDate
-        """
-        borrowings = self.execute_query(query, (self.current_user['MemberID'],))
+        borrowings = self.active_borrowings(self.current_user['MemberID'])
         
         if not borrowings or len(borrowings) == 0:
             print("\nYou don't have any active borrowings to return.")
@@ -377,7 +2671,6 @@ class LibrarySystem:
         for borrow in borrowings:
             if str(borrow['BorrowID']) == borrow_id:
                 found = True
-                item_id = borrow['ItemID']
                 break
                 
         if not found:
@@ -385,67 +2678,8 @@ class LibrarySystem:
             input("Press Enter to continue...")
             return
             
-        # Process return
-        return_date = datetime.date.today()
-        
-        # Update borrowing record
-        query = """
-        UPDATE Borrowing
-        SET ReturnDate = ?
-        WHERE BorrowID = ?
-        """
-        result = self.execute_query(query, (return_date, borrow_id), fetch=False, commit=True)
-        
-        if result:
-            # Update item status
-            update_query = "UPDATE LibraryItem SET Status = 'Available' WHERE ItemID = ?"
-            self.execute_query(update_query, (item_id,), fetch=False, commit=True)
-            
-            # Check if return is late and create fine if needed
-            due_date = datetime.datetime.strptime(borrow['DueDate'], '%Y-%m-%d').date()
-            
-            if return_date > due_date:
-                days_late = (return_date - due_date).days
-                fine_amount = days_late * 0.50  # $0.50 per day late
-                
-                # Check if a fine already exists for this borrowing
-                check_query = "SELECT FineID FROM Fine WHERE BorrowID = ?"
-                existing_fine = self.execute_query(check_query, (borrow_id,))
-                
-                if existing_fine and len(existing_fine) > 0:
-                    # Update existing fine
-                    update_query = """
-                    UPDATE Fine
-                    SET Amount = ?, Status = 'Unpaid', IssuedDate = ?
-                    WHERE BorrowID = ?
-                    """
-                    self.execute_query(
-                        update_query,
-                        (fine_amount, return_date, borrow_id),
-                        fetch=False,
-                        commit=True
-                    )
-                    print(f"\nExisting fine updated to ${fine_amount:.2f} ({days_late} days late).")
-                else:
-                    # Create new fine
-                    fine_query = """
-                    INSERT INTO Fine (BorrowID, Amount, Status, IssuedDate)
-                    VALUES (?, ?, ?, ?)
-                    """
-                    self.execute_query(
-                        fine_query, 
-                        (borrow_id, fine_amount, 'Unpaid', return_date),
-                        fetch=False,
-                        commit=True
-                    )
-                    print(f"\nA fine of ${fine_amount:.2f} has been issued ({days_late} days late).")
-                
-                print(f"\nItem returned successfully, but it was {days_late} days late.")
-                print(f"A fine of ${fine_amount:.2f} has been issued.")
-            else:
-                print("\nItem returned successfully. Thank you!")
-        else:
-            print("\nFailed to return the item. Please try again.")
+        result = self.return_borrowing(borrow_id, member_id=self.current_user['MemberID'])
+        self.print_return_result(result)
             
         input("\nPress Enter to continue...")
         
@@ -490,112 +2724,55 @@ class LibrarySystem:
             
         item_type = item_types[item_type_choice]
         
-        # Insert into LibraryItem table first
-        query = """
-        INSERT INTO LibraryItem (Title, PublicationDate, Status, ItemType)
-        VALUES (?, ?, 'Available', ?)
-        """
-        result = self.execute_query(query, (title, pub_date, item_type), fetch=False, commit=True)
-        
-        if not result:
-            print("\nFailed to add item. Please try again.")
-            input("Press Enter to continue...")
-            return
-            
-        # Get the ID of the newly inserted item
-        item_id = self.cursor.lastrowid
-        
         # Collect type-specific information
         if item_type == 'Book':
-            author = input("Enter author name: ")
-            publisher = input("Enter publisher (or press Enter to skip): ")
-            genre = input("Enter genre (or press Enter to skip): ")
-            pages = input("Enter page count (or press Enter to skip): ")
-            format_type = input("Enter format (Hardcover/Paperback/Other): ")
-            
-            # Insert into Book table
-            query = """
-            INSERT INTO Book (ItemID, Author, Publisher, Genre, PageCount, Format)
-            VALUES (?, ?, ?, ?, ?, ?)
-            """
-            self.execute_query(
-                query, 
-                (item_id, author, publisher, genre, pages if pages else None, format_type),
-                fetch=False,
-                commit=True
-            )
+            details = {
+                'Author': input("Enter author name: "),
+                'Publisher': input("Enter publisher (or press Enter to skip): "),
+                'Genre': input("Enter genre (or press Enter to skip): "),
+                'PageCount': input("Enter page count (or press Enter to skip): ") or None,
+                'Format': input("Enter format (Hardcover/Paperback/Other): ")
+            }
             
         elif item_type == 'Ebook':
-            author = input("Enter author name: ")
-            publisher = input("Enter publisher (or press Enter to skip): ")
-            genre = input("Enter genre (or press Enter to skip): ")
-            file_format = input("Enter file format (e.g., EPUB, PDF): ")
-            
-            # Insert into Ebook table
-            query = """
-            INSERT INTO Ebook (ItemID, Author, Publisher, Genre, FileFormat)
-            VALUES (?, ?, ?, ?, ?)
-            """
-            self.execute_query(
-                query, 
-                (item_id, author, publisher, genre, file_format),
-                fetch=False,
-                commit=True
-            )
+            details = {
+                'Author': input("Enter author name: "),
+                'Publisher': input("Enter publisher (or press Enter to skip): "),
+                'Genre': input("Enter genre (or press Enter to skip): "),
+                'FileFormat': input("Enter file format (e.g., EPUB, PDF): ")
+            }
             
         elif item_type == 'Magazine':
-            issue = input("Enter issue number: ")
-            publisher = input("Enter publisher: ")
-            category = input("Enter category (or press Enter to skip): ")
-            
-            # Insert into Magazine table
-            query = """
-            INSERT INTO Magazine (ItemID, IssueNumber, Publisher, Category)
-            VALUES (?, ?, ?, ?)
-            """
-            self.execute_query(
-                query, 
-                (item_id, issue, publisher, category),
-                fetch=False,
-                commit=True
-            )
+            details = {
+                'IssueNumber': input("Enter issue number: "),
+                'Publisher': input("Enter publisher: "),
+                'Category': input("Enter category (or press Enter to skip): ")
+            }
             
         elif item_type == 'Journal':
-            volume = input("Enter volume: ")
-            issue = input("Enter issue: ")
-            publisher = input("Enter publisher: ")
-            field = input("Enter academic field: ")
-            peer_reviewed = input("Is it peer-reviewed? (y/n): ").lower() == 'y'
-            
-            # Insert into Journal table
-            query = """
-            INSERT INTO Journal (ItemID, Volume, Issue, Publisher, Field, PeerReviewed)
-            VALUES (?, ?, ?, ?, ?, ?)
-            """
-            self.execute_query(
-                query, 
-                (item_id, volume, issue, publisher, field, peer_reviewed),
-                fetch=False,
-                commit=True
-            )
+            details = {
+                'Volume': input("Enter volume: "),
+                'Issue': input("Enter issue: "),
+                'Publisher': input("Enter publisher: "),
+                'Field': input("Enter academic field: "),
+                'PeerReviewed': input("Is it peer-reviewed? (y/n): ").lower() == 'y'
+            }
             
-        elif item_type == 'Media':
-            media_type = input("Enter media type (CD/DVD/Record/Other): ")
-            artist = input("Enter artist/creator: ")
-            runtime = input("Enter runtime/duration: ")
-            format_info = input("Enter format information: ")
-            
-            # Insert into Media table
-            query = """
-            INSERT INTO Media (ItemID, MediaType, Artist, Runtime, Format)
-            VALUES (?, ?, ?, ?, ?)
-            """
-            self.execute_query(
-                query, 
-                (item_id, media_type, artist, runtime, format_info),
-                fetch=False,
-                commit=True
-            )
+        else:
+            details = {
+                'MediaType': input("Enter media type (CD/DVD/Record/Other): "),
+                'Artist': input("Enter artist/creator: "),
+                'Runtime': input("Enter runtime/duration: "),
+                'Format': input("Enter format information: ")
+            }
+            
+        # The item and its subtype row are written together or not at all
+        result = self.add_item(item_type, title, pub_date, **details)
+        
+        if result.outcome != 'added':
+            print(f"\nFailed to add item: {result.error}. Please try again.")
+            input("Press Enter to continue...")
+            return
             
         print(f"\nThank you for your donation! '{title}' has been added to our collection.")
         input("\nPress Enter to continue...")
@@ -617,16 +2794,7 @@ class LibrarySystem:
         
         if choice == '1':
             # Find upcoming events
-            query = """
-            SELECT e.EventID, e.Title, e.EventType, e.EventDate, e.StartTime, e.EndTime, 
-                   e.MaxAttendees, e.TargetAudience, r.RoomName,
-                   (SELECT COUNT(*) FROM EventAttendance a WHERE a.EventID = e.EventID AND a.AttendanceStatus != 'Cancelled') as RegisteredAttendees
-            FROM Event e
-            JOIN Room r ON e.RoomID = r.RoomID
-            WHERE e.EventDate >= ?
-            ORDER BY e.EventDate, e.StartTime
-            """
-            results = self.execute_query(query, (today,))
+            results = self.upcoming_events(today=today)
             
         elif choice == '2':
             print("\nEvent Types:")
@@ -647,16 +2815,7 @@ class LibrarySystem:
             
             if type_choice in event_types:
                 event_type = event_types[type_choice]
-                query = """
-                SELECT e.EventID, e.Title, e.EventType, e.EventDate, e.StartTime, e.EndTime, 
-                       e.MaxAttendees, e.TargetAudience, r.RoomName,
-                       (SELECT COUNT(*) FROM EventAttendance a WHERE a.EventID = e.EventID AND a.AttendanceStatus != 'Cancelled') as RegisteredAttendees
-                FROM Event e
-                JOIN Room r ON e.RoomID = r.RoomID
-                WHERE e.EventType = ? AND e.EventDate >= ?
-                ORDER BY e.EventDate, e.StartTime
-                """
-                results = self.execute_query(query, (event_type, today))
+                results = self.upcoming_events(event_type=event_type, today=today)
             else:
                 print("\nInvalid choice.")
                 input("Press Enter to continue...")
@@ -664,16 +2823,7 @@ class LibrarySystem:
                 
         elif choice == '3':
             title = input("Enter event title to search for: ")
-            query = """
-            SELECT e.EventID, e.Title, e.EventType, e.EventDate, e.StartTime, e.EndTime, 
-                   e.MaxAttendees, e.TargetAudience, r.RoomName,
-                   (SELECT COUNT(*) FROM EventAttendance a WHERE a.EventID = e.EventID AND a.AttendanceStatus != 'Cancelled') as RegisteredAttendees
-            FROM Event e
-            JOIN Room r ON e.RoomID = r.RoomID
-            WHERE e.Title LIKE ? AND e.EventDate >= ?
-            ORDER BY e.EventDate, e.StartTime
-            """
-            results = self.execute_query(query, (f'%{title}%', today))
+            results = self.upcoming_events(title=title, today=today)
             
         elif choice == '4':
             start_date = input("Enter start date (YYYY-MM-DD): ")
@@ -684,16 +2834,7 @@ class LibrarySystem:
                 datetime.datetime.strptime(start_date, '%Y-%m-%d')
                 datetime.datetime.strptime(end_date, '%Y-%m-%d')
                 
-                query = """
-                SELECT e.EventID, e.Title, e.EventType, e.EventDate, e.StartTime, e.EndTime, 
-                       e.MaxAttendees, e.TargetAudience, r.RoomName,
-                       (SELECT COUNT(*) FROM EventAttendance a WHERE a.EventID = e.EventID AND a.AttendanceStatus != 'Cancelled') as RegisteredAttendees
-                FROM Event e
-                JOIN Room r ON e.RoomID = r.RoomID
-                WHERE e.EventDate BETWEEN ? AND ?
-                ORDER BY e.EventDate, e.StartTime
-                """
-                results = self.execute_query(query, (start_date, end_date))
+                results = self.events_between(start_date, end_date)
             except ValueError:
                 print("\nInvalid date format. Please use YYYY-MM-DD.")
                 input("Press Enter to continue...")
@@ -754,97 +2895,24 @@ class LibrarySystem:
         if not event_id:
             event_id = input("Enter the ID of the event you want to register for: ")
         
-        # Check if event exists and still has spots available
-        query = """
-        SELECT e.*, r.RoomName,
-               (SELECT COUNT(*) FROM EventAttendance a WHERE a.EventID = e.EventID AND a.AttendanceStatus != 'Cancelled') as RegisteredAttendees
-        FROM Event e
-        JOIN Room r ON e.RoomID = r.RoomID
-        WHERE e.EventID = ?
-        """
-        event = self.execute_query(query, (event_id,))
+        outcome, event, error = self.register_attendee(event_id, self.current_user['MemberID'])
         
-        if not event or len(event) == 0:
+        if outcome == 'not_found':
             print(f"\nEvent with ID {event_id} not found.")
-            input("Press Enter to continue...")
-            return
-            
-        event = dict(event[0])
-        
-        # Check if event date has already passed
-        event_date = datetime.datetime.strptime(event['EventDate'], '%Y-%m-%d').date()
-        today = datetime.date.today()
-        
-        if event_date < today:
+        elif outcome == 'past':
             print(f"\nThis event ({event['Title']}) has already taken place on {event['EventDate']}.")
-            input("Press Enter to continue...")
-            return
-            
-        # Check if spots are available
-        spots_left = event['MaxAttendees'] - event['RegisteredAttendees']
-        
-        if spots_left <= 0:
+        elif outcome == 'full':
             print(f"\nSorry, the event '{event['Title']}' is already at full capacity.")
-            input("Press Enter to continue...")
-            return
-            
-        # Check if user is already registered
-        query = """
-        SELECT * FROM EventAttendance 
-        WHERE EventID = ? AND MemberID = ?
-        """
-        existing_reg = self.execute_query(query, (event_id, self.current_user['MemberID']))
-        
-        if existing_reg and len(existing_reg) > 0:
-            existing_reg = dict(existing_reg[0])
-            if existing_reg['AttendanceStatus'] != 'Cancelled':
-                print(f"\nYou are already registered for '{event['Title']}'.")
-                input("Press Enter to continue...")
-                return
-            else:
-                # If previously cancelled, update registration
-                update_query = """
-                UPDATE EventAttendance
-                SET AttendanceStatus = 'Registered', RegistrationDate = ?
-                WHERE EventID = ? AND MemberID = ?
-                """
-                result = self.execute_query(
-                    update_query, 
-                    (today, event_id, self.current_user['MemberID']),
-                    fetch=False,
-                    commit=True
-                )
-                
-                if result:
-                    print(f"\nYou have successfully re-registered for '{event['Title']}'")
-                    print(f"Date: {event['EventDate']}")
-                    print(f"Time: {event['StartTime']} - {event['EndTime']}")
-                    print(f"Location: {event['RoomName']}")
-                else:
-                    print("\nFailed to register for the event. Please try again.")
-                    
-                input("\nPress Enter to continue...")
-                return
-        
-        # Create registration
-        query = """
-        INSERT INTO EventAttendance (EventID, MemberID, RegistrationDate, AttendanceStatus)
-        VALUES (?, ?, ?, 'Registered')
-        """
-        result = self.execute_query(
-            query, 
-            (event_id, self.current_user['MemberID'], today),
-            fetch=False,
-            commit=True
-        )
-        
-        if result:
-            print(f"\nYou have successfully registered for '{event['Title']}'")
+        elif outcome == 'already_registered':
+            print(f"\nYou are already registered for '{event['Title']}'.")
+        elif outcome in ('registered', 'reregistered'):
+            again = "re-" if outcome == 'reregistered' else ""
+            print(f"\nYou have successfully {again}registered for '{event['Title']}'")
             print(f"Date: {event['EventDate']}")
             print(f"Time: {event['StartTime']} - {event['EndTime']}")
             print(f"Location: {event['RoomName']}")
         else:
-            print("\nFailed to register for the event. Please try again.")
+            print(f"\nFailed to register for the event: {error}. Please try again.")
             
         input("\nPress Enter to continue...")
         
@@ -859,27 +2927,15 @@ class LibrarySystem:
         print("\n===== VOLUNTEER FOR LIBRARY =====\n")
         
         # Check if already registered as volunteer
-        query = "SELECT * FROM Volunteer WHERE MemberID = ?"
-        existing = self.execute_query(query, (self.current_user['MemberID'],))
+        existing = self.volunteer_for_member(self.current_user['MemberID'])
         
-        if existing and len(existing) > 0:
-            existing = dict(existing[0])
+        if existing:
             print(f"You are already registered as a volunteer with status: {existing['Status']}")
             
             if existing['Status'] == 'Inactive':
                 reactivate = input("\nWould you like to reactivate your volunteer status? (y/n): ")
                 if reactivate.lower() == 'y':
-                    update_query = """
-                    UPDATE Volunteer
-                    SET Status = 'Active', StartDate = ?
-                    WHERE MemberID = ?
-                    """
-                    self.execute_query(
-                        update_query, 
-                        (datetime.date.today(), self.current_user['MemberID']),
-                        fetch=False,
-                        commit=True
-                    )
+                    self.reactivate_volunteer(existing['VolunteerID'])
                     print("\nYour volunteer status has been reactivated. Thank you!")
             else:
                 update = input("\nWould you like to update your volunteer information? (y/n): ")
@@ -898,36 +2954,16 @@ class LibrarySystem:
                             break
                         print("Availability hours cannot be empty. Please try again.")
                     
-                    update_query = """
-                    UPDATE Volunteer
-                    SET SkillsInterests = ?, AvailabilityHours = ?
-                    WHERE MemberID = ?
-                    """
-                    self.execute_query(
-                        update_query, 
-                        (skills, availability, self.current_user['MemberID']),
-                        fetch=False,
-                        commit=True
-                    )
+                    self.update_volunteer(existing['VolunteerID'], skills=skills, availability=availability)
                     print("\nYour volunteer information has been updated. Thank you!")
         else:
             # Collect volunteer information
             skills = input("Enter your skills and interests (e.g., reading to children, event assistance): ")
             availability = input("Enter your availability hours (e.g. Tuesday/Thursday: 6PM - 8PM): ")
             
-            # Create volunteer record
-            query = """
-            INSERT INTO Volunteer (MemberID, SkillsInterests, AvailabilityHours, StartDate, Status)
-            VALUES (?, ?, ?, ?, 'Active')
-            """
-            result = self.execute_query(
-                query, 
-                (self.current_user['MemberID'], skills, availability, datetime.date.today()),
-                fetch=False,
-                commit=True
-            )
+            result = self.register_volunteer(self.current_user['MemberID'], skills, availability)
             
-            if result:
+            if result.outcome == 'registered':
                 print("\nThank you for volunteering! A staff member will contact you soon.")
             else:
                 print("\nFailed to register as volunteer. Please try again.")
@@ -945,15 +2981,7 @@ class LibrarySystem:
         print("\n===== ASK FOR LIBRARIAN HELP =====\n")
         
         # Display user's existing open requests
-        query = """
-        SELECT r.RequestID, r.RequestDate, r.Description, r.Status, 
-               s.FirstName || ' ' || s.LastName as StaffName
-        FROM HelpRequest r
-        LEFT JOIN Staff s ON r.StaffID = s.StaffID
-        WHERE r.MemberID = ? AND r.Status != 'Resolved'
-        ORDER BY r.RequestDate DESC
-        """
-        existing = self.execute_query(query, (self.current_user['MemberID'],))
+        existing = self.member_help_requests(self.current_user['MemberID'])
         
         if existing and len(existing) > 0:
             print("Your Current Open Help Requests:")
@@ -978,18 +3006,9 @@ class LibrarySystem:
         if description.lower() == 'cancel':
             return
             
-        query = """
-        INSERT INTO HelpRequest (MemberID, RequestDate, Description, Status)
-        VALUES (?, ?, ?, 'Open')
-        """
-        result = self.execute_query(
-            query, 
-            (self.current_user['MemberID'], datetime.date.today(), description),
-            fetch=False,
-            commit=True
-        )
+        result = self.submit_help_request(self.current_user['MemberID'], description)
         
-        if result:
+        if result.outcome == 'submitted':
             print("\nYour help request has been submitted. A librarian will assist you soon.")
         else:
             print("\nFailed to submit help request. Please try again.")
@@ -1009,9 +3028,10 @@ class LibrarySystem:
             print("4. Process Acquisition Requests")
             print("5. Manage Volunteers")
             print("6. View/Manage Fines")
-            print("7. Log Out")
+            print("7. Batch Check-In")
+            print("8. Log Out")
             
-            choice = input("\nEnter your choice (1-7): ")
+            choice = input("\nEnter your choice (1-8): ")
             
             if choice == '1':
                 self.process_return()
@@ -1026,6 +3046,8 @@ class LibrarySystem:
             elif choice == '6':
                 self.manage_fines()
             elif choice == '7':
+                self.batch_return()
+            elif choice == '8':
                 self.current_user = None
                 self.user_type = None
                 print("\nYou have been logged out.")
@@ -1092,16 +3114,7 @@ class LibrarySystem:
         
         if member_email:
             # Find member's active borrowings
-            query = """
-            SELECT b.BorrowID, m.FirstName || ' ' || m.LastName as MemberName, 
-                   i.ItemID, i.Title, i.ItemType, b.BorrowDate, b.DueDate
-            FROM Borrowing b
-            JOIN Member m ON b.MemberID = m.MemberID
-            JOIN LibraryItem i ON b.ItemID = i.ItemID
-            WHERE m.Email = ? AND b.ReturnDate IS NULL
-            ORDER BY b.DueDate
-            """
-            borrowings = self.execute_query(query, (member_email,))
+            borrowings = self.active_borrowings_by_email(member_email)
             
             if not borrowings or len(borrowings) == 0:
                 print(f"\nNo active borrowings found for member with email: {member_email}")
@@ -1137,7 +3150,6 @@ class LibrarySystem:
             for borrow in borrowings:
                 if str(borrow['BorrowID']) == borrow_id:
                     found = True
-                    item_id = borrow['ItemID']
                     break
                     
             if not found:
@@ -1150,22 +3162,13 @@ class LibrarySystem:
             item_id = input("Enter the ID of the item being returned: ")
             
             # Check if item exists and is borrowed
-            query = """
-            SELECT i.ItemID, i.Title, i.Status, b.BorrowID, b.BorrowDate, b.DueDate,
-                   m.FirstName || ' ' || m.LastName as MemberName
-            FROM LibraryItem i
-            JOIN Borrowing b ON i.ItemID = b.ItemID AND b.ReturnDate IS NULL
-            JOIN Member m ON b.MemberID = m.MemberID
-            WHERE i.ItemID = ?
-            """
-            borrow = self.execute_query(query, (item_id,))
+            borrow = self.open_borrowing_for_item(item_id)
             
-            if not borrow or len(borrow) == 0:
+            if not borrow:
                 print(f"\nItem with ID {item_id} is not currently borrowed or does not exist.")
                 input("Press Enter to continue...")
                 return
                 
-            borrow = dict(borrow[0])
             borrow_id = borrow['BorrowID']
             
             print(f"\nItem: {borrow['Title']}")
@@ -1177,79 +3180,78 @@ class LibrarySystem:
             if confirm.lower() != 'y':
                 return
         
-        # Process return
-        return_date = datetime.date.today()
+        result = self.return_borrowing(borrow_id, staff_id=self.current_user['StaffID'])
+        self.print_return_result(result)
+            
+        input("\nPress Enter to continue...")
+          
+    def batch_return(self):
+        """Check in a batch of returned items, e.g. after emptying the book drop (staff function)"""
+        clear_screen()
+        print("\n===== BATCH CHECK-IN =====\n")
         
-        # Update borrowing record
-        query = """
-        UPDATE Borrowing
-        SET ReturnDate = ?, StaffID = ?
-        WHERE BorrowID = ?
-        """
-        result = self.execute_query(
-            query, 
-            (return_date, self.current_user['StaffID'], borrow_id),
-            fetch=False,
-            commit=True
-        )
+        source = input("Enter a file of item IDs to read, or press Enter to scan/type them: ").strip()
         
-        if result:
-            # Update item status
-            update_query = "UPDATE LibraryItem SET Status = 'Available' WHERE ItemID = ?"
-            self.execute_query(update_query, (item_id,), fetch=False, commit=True)
+        if source:
+            try:
+                with open(source) as id_file:
+                    text = id_file.read()
+            except OSError as e:
+                print(f"\nCould not read {source}: {e}")
+                input("Press Enter to continue...")
+                return
+        else:
+            print("Scan or type item IDs (several per line is fine). Enter a blank line to finish.")
+            lines = []
+            while True:
+                line = input("> ")
+                if not line.strip():
+                    break
+                lines.append(line)
+            text = "\n".join(lines)
             
-            # Get borrowing details to check for late return
-            query = "SELECT BorrowDate, DueDate FROM Borrowing WHERE BorrowID = ?"
-            borrow_details = self.execute_query(query, (borrow_id,))
-            borrow_details = dict(borrow_details[0])
+        item_ids = re.findall(r'\d+', text)
+        
+        if not item_ids:
+            print("\nNo item IDs entered.")
+            input("Press Enter to continue...")
+            return
             
-            due_date = datetime.datetime.strptime(borrow_details['DueDate'], '%Y-%m-%d').date()
+        results, _, error = self.return_items(item_ids, self.current_user['StaffID'])
+        
+        if results is None:
+            print(f"\nBatch check-in failed ({error}); no items were returned. Please try again.")
+            input("Press Enter to continue...")
+            return
             
-            if return_date > due_date:
-                days_late = (return_date - due_date).days
-                fine_amount = days_late * 0.50  # $0.50 per day late
-                
-                # Check if a fine already exists for this borrowing
-                check_query = "SELECT FineID FROM Fine WHERE BorrowID = ?"
-                existing_fine = self.execute_query(check_query, (borrow_id,))
-                
-                if existing_fine and len(existing_fine) > 0:
-                    # Update existing fine
-                    update_query = """
-                    UPDATE Fine
-                    SET Amount = ?, Status = 'Unpaid', IssuedDate = ?
-                    WHERE BorrowID = ?
-                    """
-                    self.execute_query(
-                        update_query,
-                        (fine_amount, return_date, borrow_id),
-                        fetch=False,
-                        commit=True
-                    )
-                    print(f"\nExisting fine updated to ${fine_amount:.2f} ({days_late} days late).")
-                else:
-                    # Create new fine
-                    fine_query = """
-                    INSERT INTO Fine (BorrowID, Amount, Status, IssuedDate)
-                    VALUES (?, ?, ?, ?)
-                    """
-                    self.execute_query(
-                        fine_query, 
-                        (borrow_id, fine_amount, 'Unpaid', return_date),
-                        fetch=False,
-                        commit=True
-                    )
-                    print(f"\nA fine of ${fine_amount:.2f} has been issued ({days_late} days late).")
-                
-                print(f"\nItem returned successfully, but it was {days_late} days late.")
-                print(f"A fine of ${fine_amount:.2f} has been issued.")
+        headers = ["Item ID", "Title", "Member", "Due Date", "Days Late", "Fine", "Result"]
+        table_data = []
+        
+        for result in results:
+            if result['Outcome'] == 'returned':
+                fine = result['FineAmount']
+                table_data.append([
+                    result['ItemID'],
+                    result['Title'],
+                    result['MemberName'],
+                    result['DueDate'],
+                    result['DaysLate'],
+                    f"${fine:.2f}" if fine is not None else "",
+                    "Returned"
+                ])
             else:
-                print("\nItem returned successfully. Thank you!")
-        else:
-            print("\nFailed to return the item. Please try again.")
-            
+                outcome = "Not found" if result['Outcome'] == 'not_found' else "Not borrowed"
+                table_data.append([result['ItemID'], "", "", "", "", "", outcome])
+                
+        print(tabulate(table_data, headers=headers, tablefmt="grid"))
+        
+        returned = [result for result in results if result['Outcome'] == 'returned']
+        fined = [result['FineAmount'] for result in returned if result['FineAmount'] is not None]
+        print(f"\nReturned: {len(returned)}   Not borrowed: {len(results) - len(returned)}")
+        print(f"Fines issued: {len(fined)} totalling ${sum(fined):.2f}")
+        
         input("\nPress Enter to continue...")
-          
+        
     def view_account(self):
         """View member account details"""
         if self.user_type != "member":
@@ -1261,19 +3263,10 @@ class LibrarySystem:
         print(f"Email: {self.current_user['Email']}")
         print(f"Member since: {self.current_user['MembershipDate']}")
         
+        account = self.account_summary(self.current_user['MemberID'])
+        
         # Active borrowings
-        query = """
-        SELECT b.BorrowID, i.Title, i.ItemType, b.BorrowDate, b.DueDate,
-               CASE 
-                   WHEN b.DueDate < date('now') THEN 'Overdue'
-                   ELSE 'On time' 
-               END as Status
-        FROM Borrowing b
-        JOIN LibraryItem i ON b.ItemID = i.ItemID
-        WHERE b.MemberID = ? AND b.ReturnDate IS NULL
-        ORDER BY b.DueDate
-        """
-        borrowings = self.execute_query(query, (self.current_user['MemberID'],))
+        borrowings = account.borrowings
         
         print("\n--- Active Borrowings ---")
         if borrowings and len(borrowings) > 0:
@@ -1295,15 +3288,7 @@ class LibrarySystem:
             print("You have no active borrowings.")
         
         # Unpaid fines
-        query = """
-        SELECT f.FineID, f.Amount, f.IssuedDate, i.Title, b.BorrowDate, b.DueDate, b.ReturnDate
-        FROM Fine f
-        JOIN Borrowing b ON f.BorrowID = b.BorrowID
-        JOIN LibraryItem i ON b.ItemID = i.ItemID
-        WHERE b.MemberID = ? AND f.Status = 'Unpaid'
-        ORDER BY f.IssuedDate
-        """
-        fines = self.execute_query(query, (self.current_user['MemberID'],))
+        fines = account.fines
         
         print("\n--- Unpaid Fines ---")
         if fines and len(fines) > 0:
@@ -1327,15 +3312,7 @@ class LibrarySystem:
             print("You have no unpaid fines.")
         
         # Upcoming event registrations
-        query = """
-        SELECT e.Title, e.EventDate, e.StartTime, e.EndTime, r.RoomName
-        FROM EventAttendance a
-        JOIN Event e ON a.EventID = e.EventID
-        JOIN Room r ON e.RoomID = r.RoomID
-        WHERE a.MemberID = ? AND a.AttendanceStatus = 'Registered' AND e.EventDate >= date('now')
-        ORDER BY e.EventDate, e.StartTime
-        """
-        events = self.execute_query(query, (self.current_user['MemberID'],))
+        events = account.events
         
         print("\n--- Upcoming Event Registrations ---")
         if events and len(events) > 0:
@@ -1355,13 +3332,7 @@ class LibrarySystem:
             print("You have no upcoming event registrations.")
         
         print("\n--- Help Requests ---")
-        query = """
-        SELECT RequestID, RequestDate, Description, Status
-        FROM HelpRequest
-        WHERE MemberID = ? AND Status != 'Resolved'
-        ORDER BY RequestDate DESC
-        """
-        requests = self.execute_query(query, (self.current_user['MemberID'],))
+        requests = account.help_requests
         
         if requests and len(requests) > 0:
             headers = ["ID", "Date", "Description", "Status"]
@@ -1400,94 +3371,57 @@ class LibrarySystem:
             return
             
         if choice == '1':
-            query = """
-            SELECT r.RequestID, r.RequestDate, m.FirstName || ' ' || m.LastName as MemberName,
-                   r.Description, r.Status, s.FirstName || ' ' || s.LastName as StaffName
-            FROM HelpRequest r
-            JOIN Member m ON r.MemberID = m.MemberID
-            LEFT JOIN Staff s ON r.StaffID = s.StaffID
-            WHERE r.Status = 'Open'
-            ORDER BY r.RequestDate
-            """
             title = "Open Help Requests"
-            requests = self.execute_query(query)
+            paginator = self.listing('open_help_requests')
             
         elif choice == '2':
-            query = """
-            SELECT r.RequestID, r.RequestDate, m.FirstName || ' ' || m.LastName as MemberName,
-                   r.Description, r.Status, s.FirstName || ' ' || s.LastName as StaffName
-            FROM HelpRequest r
-            JOIN Member m ON r.MemberID = m.MemberID
-            LEFT JOIN Staff s ON r.StaffID = s.StaffID
-            WHERE r.StaffID = ? AND r.Status != 'Resolved'
-            ORDER BY r.RequestDate
-            """
             title = "My Assigned Help Requests"
-            requests = self.execute_query(query, (self.current_user['StaffID'],))
+            paginator = self.listing('staff_help_requests', (self.current_user['StaffID'],))
             
         elif choice == '3':
-            query = """
-            SELECT r.RequestID, r.RequestDate, m.FirstName || ' ' || m.LastName as MemberName,
-                   r.Description, r.Status, s.FirstName || ' ' || s.LastName as StaffName
-            FROM HelpRequest r
-            JOIN Member m ON r.MemberID = m.MemberID
-            LEFT JOIN Staff s ON r.StaffID = s.StaffID
-            ORDER BY r.Status, r.RequestDate DESC
-            """
             title = "All Help Requests"
-            requests = self.execute_query(query)
+            paginator = self.listing('all_help_requests')
             
         else:
             print("\nInvalid choice. Please try again.")
             input("Press Enter to continue...")
             return
             
-        if not requests or len(requests) == 0:
-            print(f"\nNo help requests found.")
-            input("Press Enter to continue...")
-            return
-            
         # Display requests
         headers = ["ID", "Date", "Member", "Description", "Status", "Assigned To"]
-        table_data = []
         
-        for req in requests:
-            table_data.append([
+        def format_row(req):
+            return [
                 req['RequestID'],
                 req['RequestDate'],
                 req['MemberName'],
                 req['Description'][:30] + ('...' if len(req['Description']) > 30 else ''),
                 req['Status'],
                 req['StaffName'] if req['StaffName'] else 'Not assigned'
-            ])
-        
-        print(f"\n{title}:")
-        print(tabulate(table_data, headers=headers, tablefmt="grid"))
-        
+            ]
+            
         # Ask which request to manage
-        request_id = input("\nEnter Request ID to manage (or 0 to go back): ")
+        request_id = self.browse_pages(
+            paginator, title, headers, format_row,
+            "\nEnter Request ID to manage (or 0 to go back): "
+        )
         
+        if request_id is None:
+            print(f"\nNo help requests found.")
+            input("Press Enter to continue...")
+            return
+            
         if request_id == '0':
             return
             
         # Get specific request
-        query = """
-        SELECT r.*, m.FirstName || ' ' || m.LastName as MemberName,
-               s.FirstName || ' ' || s.LastName as StaffName
-        FROM HelpRequest r
-        JOIN Member m ON r.MemberID = m.MemberID
-        LEFT JOIN Staff s ON r.StaffID = s.StaffID
-        WHERE r.RequestID = ?
-        """
-        request = self.execute_query(query, (request_id,))
+        request = self.help_request(request_id)
         
-        if not request or len(request) == 0:
+        if not request:
             print(f"\nRequest ID {request_id} not found.")
             input("Press Enter to continue...")
             return
             
-        request = dict(request[0])
-        
         clear_screen()
         print(f"\n===== HELP REQUEST #{request['RequestID']} =====")
         print(f"Date: {request['RequestDate']}")
@@ -1509,17 +3443,7 @@ class LibrarySystem:
         
         if action == '1':
             # Assign to current staff
-            update_query = """
-            UPDATE HelpRequest
-            SET StaffID = ?, Status = CASE WHEN Status = 'Open' THEN 'InProgress' ELSE Status END
-            WHERE RequestID = ?
-            """
-            self.execute_query(
-                update_query,
-                (self.current_user['StaffID'], request_id),
-                fetch=False,
-                commit=True
-            )
+            self.assign_help_request(request_id, self.current_user['StaffID'])
             print("\nRequest has been assigned to you.")
             
         elif action == '2':
@@ -1538,19 +3462,7 @@ class LibrarySystem:
             
             if status_choice in status_options:
                 new_status = status_options[status_choice]
-                closed_date = datetime.date.today() if new_status == 'Resolved' else None
-                
-                update_query = """
-                UPDATE HelpRequest
-                SET Status = ?, ClosedDate = ?
-                WHERE RequestID = ?
-                """
-                self.execute_query(
-                    update_query,
-                    (new_status, closed_date, request_id),
-                    fetch=False,
-                    commit=True
-                )
+                self.set_help_request_status(request_id, new_status)
                 print(f"\nStatus updated to '{new_status}'.")
             else:
                 print("\nInvalid choice.")
@@ -1558,18 +3470,7 @@ class LibrarySystem:
         elif action == '3':
             # Add resolution
             resolution = input("\nEnter resolution details: ")
-            
-            update_query = """
-            UPDATE HelpRequest
-            SET Resolution = ?, Status = 'Resolved', ClosedDate = ?
-            WHERE RequestID = ?
-            """
-            self.execute_query(
-                update_query,
-                (resolution, datetime.date.today(), request_id),
-                fetch=False,
-                commit=True
-            )
+            self.resolve_help_request(request_id, resolution)
             print("\nResolution added and request marked as Resolved.")
             
         input("\nPress Enter to continue...")
@@ -1599,85 +3500,51 @@ class LibrarySystem:
             # View events
             if choice == '1':
                 # Upcoming events
-                query = """
-                SELECT e.EventID, e.Title, e.EventType, e.EventDate, e.StartTime, e.EndTime,
-                       e.MaxAttendees, r.RoomName,
-                       (SELECT COUNT(*) FROM EventAttendance a WHERE a.EventID = e.EventID AND a.AttendanceStatus != 'Cancelled') as RegisteredCount,
-                       s.FirstName || ' ' || s.LastName as OrganizerName
-                FROM Event e
-                JOIN Room r ON e.RoomID = r.RoomID
-                LEFT JOIN Staff s ON e.StaffID = s.StaffID
-                WHERE e.EventDate >= ?
-                ORDER BY e.EventDate, e.StartTime
-                """
                 title = "Upcoming Events"
-                events = self.execute_query(query, (today,))
+                paginator = self.listing('upcoming_events_with_organizer', (today,))
             else:
                 # Past events
-                query = """
-                SELECT e.EventID, e.Title, e.EventType, e.EventDate, e.StartTime, e.EndTime,
-                       e.MaxAttendees, r.RoomName,
-                       (SELECT COUNT(*) FROM EventAttendance a WHERE a.EventID = e.EventID AND a.AttendanceStatus != 'Cancelled') as RegisteredCount,
-                       s.FirstName || ' ' || s.LastName as OrganizerName
-                FROM Event e
-                JOIN Room r ON e.RoomID = r.RoomID
-                LEFT JOIN Staff s ON e.StaffID = s.StaffID
-                WHERE e.EventDate < ?
-                ORDER BY e.EventDate DESC, e.StartTime
-                LIMIT 20
-                """
-                title = "Past Events (Last 20)"
-                events = self.execute_query(query, (today,))
-                
-            if not events or len(events) == 0:
-                print(f"\nNo {title.lower()} found.")
-                input("Press Enter to continue...")
-                return
+                title = "Past Events"
+                paginator = self.listing('past_events_with_organizer', (today,), report=True)
                 
             # Display events
             headers = ["ID", "Title", "Type", "Date", "Time", "Room", "Attendance", "Organizer"]
-            table_data = []
             
-            for event in events:
-                attendance = f"{event['RegisteredCount']}/{event['MaxAttendees']}"
-                table_data.append([
+            def format_row(event):
+                return [
                     event['EventID'],
                     event['Title'],
                     event['EventType'],
                     event['EventDate'],
                     f"{event['StartTime']} - {event['EndTime']}",
                     event['RoomName'],
-                    attendance,
+                    f"{event['RegisteredCount']}/{event['MaxAttendees']}",
                     event['OrganizerName']
-                ])
-            
-            print(f"\n{title}:")
-            print(tabulate(table_data, headers=headers, tablefmt="grid"))
-            
+                ]
+                
             # Ask which event to manage
-            event_id = input("\nEnter Event ID to view longer description (or 0 to go back): ")
+            event_id = self.browse_pages(
+                paginator, title, headers, format_row,
+                "\nEnter Event ID to view longer description (or 0 to go back): "
+            )
             
+            if event_id is None:
+                print(f"\nNo {title.lower()} found.")
+                input("Press Enter to continue...")
+                return
+                
             if event_id == '0':
                 return
                 
             # Get specific event
-            query = """
-            SELECT e.*, r.RoomName, s.FirstName || ' ' || s.LastName as OrganizerName,
-                   (SELECT COUNT(*) FROM EventAttendance a WHERE a.EventID = e.EventID AND a.AttendanceStatus != 'Cancelled') as RegisteredCount
-            FROM Event e
-            JOIN Room r ON e.RoomID = r.RoomID
-            LEFT JOIN Staff s ON e.StaffID = s.StaffID
-            WHERE e.EventID = ?
-            """
-            event = self.execute_query(query, (event_id,))
+            event = self.event_detail(event_id)
             
-            if not event or len(event) == 0:
+            if not event:
                 print(f"\nEvent ID {event_id} not found.")
                 input("Press Enter to continue...")
                 return
                 
-            event = dict(event[0])
-            
+
             clear_screen()
             print(f"\n===== EVENT DETAILS: {event['Title']} =====")
             print(f"Date: {event['EventDate']}")
@@ -1690,15 +3557,7 @@ class LibrarySystem:
             print(f"\nDescription: {event['Description']}")
             
             # Display event attendees
-            query = """
-            SELECT a.AttendanceID, m.FirstName || ' ' || m.LastName as MemberName,
-                   m.Email, a.RegistrationDate, a.AttendanceStatus
-            FROM EventAttendance a
-            JOIN Member m ON a.MemberID = m.MemberID
-            WHERE a.EventID = ?
-            ORDER BY a.RegistrationDate
-            """
-            attendees = self.execute_query(query, (event_id,))
+            attendees = self.event_attendees(event_id)
             
             if attendees and len(attendees) > 0:
                 headers = ["ID", "Member", "Email", "Registration Date", "Status"]
@@ -1776,13 +3635,7 @@ class LibrarySystem:
             event_type = event_types.get(type_choice, 'Other')
             
             # Room selection
-            query = """
-            SELECT r.RoomID, r.RoomName, r.Capacity, r.Location
-            FROM Room r
-            WHERE r.AvailabilityStatus = 'Available'
-            ORDER BY r.RoomName
-            """
-            rooms = self.execute_query(query)
+            rooms = self.available_rooms()
             
             if not rooms or len(rooms) == 0:
                 print("\nNo available rooms found.")
@@ -1806,20 +3659,12 @@ class LibrarySystem:
             room_id = input("\nSelect Room ID: ")
             
             # Create event
-            query = """
-            INSERT INTO Event (Title, Description, EventDate, StartTime, EndTime, MaxAttendees, 
-                               EventType, TargetAudience, StaffID, RoomID)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-            result = self.execute_query(
-                query,
-                (title, description, event_date, start_time, end_time, max_attendees,
-                 event_type, target_audience, self.current_user['StaffID'], room_id),
-                fetch=False,
-                commit=True
+            result = self.create_event(
+                self.current_user['StaffID'], title, description, event_date, start_time, end_time,
+                max_attendees, event_type, target_audience, room_id
             )
             
-            if result:
+            if result.outcome == 'created':
                 print("\nEvent created successfully!")
             else:
                 print("\nFailed to create event. Please try again.")
@@ -1833,28 +3678,19 @@ class LibrarySystem:
             
             event_id = input("Enter Event ID: ")
             
-            # Get event details
-            query = """
-            SELECT e.EventID, e.Title, e.EventDate, e.StartTime, e.EndTime, e.MaxAttendees,
-                   r.RoomName,
-                   (SELECT COUNT(*) FROM EventAttendance a WHERE a.EventID = e.EventID AND a.AttendanceStatus != 'Cancelled') as RegisteredCount
-            FROM Event e
-            JOIN Room r ON e.RoomID = r.RoomID
-            WHERE e.EventID = ?
-            """
-            event = self.execute_query(query, (event_id,))
+            # Get event details
+            event = self.event(event_id)
             
-            if not event or len(event) == 0:
+            if not event:
                 print(f"\nEvent ID {event_id} not found.")
                 input("Press Enter to continue...")
                 return
                 
-            event = dict(event[0])
-            
+
             print(f"\nEvent: {event['Title']}")
             print(f"Date: {event['EventDate']} ({event['StartTime']} - {event['EndTime']})")
             print(f"Location: {event['RoomName']}")
-            print(f"Attendance: {event['RegisteredCount']}/{event['MaxAttendees']}")
+            print(f"Attendance: {event['RegisteredAttendees']}/{event['MaxAttendees']}")
             
             print("\n1. View and Manage Attendees")
             print("2. Add Attendee")
@@ -1864,15 +3700,7 @@ class LibrarySystem:
             
             if action == '1':
                 # View attendees
-                query = """
-                SELECT a.AttendanceID, m.FirstName || ' ' || m.LastName as MemberName,
-                       m.Email, a.RegistrationDate, a.AttendanceStatus
-                FROM EventAttendance a
-                JOIN Member m ON a.MemberID = m.MemberID
-                WHERE a.EventID = ?
-                ORDER BY a.RegistrationDate
-                """
-                attendees = self.execute_query(query, (event_id,))
+                attendees = self.event_attendees(event_id)
                 
                 if attendees and len(attendees) > 0:
                     headers = ["ID", "Member", "Email", "Registration Date", "Status"]
@@ -1899,21 +3727,14 @@ class LibrarySystem:
                     return
                 
                 # Get attendance record
-                query = """
-                SELECT a.*, m.FirstName || ' ' || m.LastName as MemberName
-                FROM EventAttendance a
-                JOIN Member m ON a.MemberID = m.MemberID
-                WHERE a.AttendanceID = ? AND a.EventID = ?
-                """
-                attendance = self.execute_query(query, (attendance_id, event_id))
+                attendance = self.attendance_record(attendance_id, event_id)
                 
-                if not attendance or len(attendance) == 0:
+                if not attendance:
                     print(f"\nAttendance ID {attendance_id} not found for this event.")
                     input("Press Enter to continue...")
                     return
                     
-                attendance = dict(attendance[0])
-                
+
                 print(f"\nMember: {attendance['MemberName']}")
                 print(f"Current Status: {attendance['AttendanceStatus']}")
                 
@@ -1931,20 +3752,12 @@ class LibrarySystem:
                 
                 if status_choice in status_options:
                     new_status = status_options[status_choice]
+                    result = self.set_attendance_status(attendance_id, new_status)
                     
-                    update_query = """
-                    UPDATE EventAttendance
-                    SET AttendanceStatus = ?
-                    WHERE AttendanceID = ?
-                    """
-                    self.execute_query(
-                        update_query,
-                        (new_status, attendance_id),
-                        fetch=False,
-                        commit=True
-                    )
-                    
-                    print(f"\nAttendance status updated to: {new_status}")
+                    if result.outcome == 'updated':
+                        print(f"\nAttendance status updated to: {new_status}")
+                    else:
+                        print(f"\nFailed to update attendance: {result.error}")
                 else:
                     print("\nInvalid choice.")
                     
@@ -1953,62 +3766,26 @@ class LibrarySystem:
                 member_email = input("\nEnter member email to add: ")
                 
                 # Check if member exists
-                query = "SELECT MemberID, FirstName, LastName FROM Member WHERE Email = ?"
-                member = self.execute_query(query, (member_email,))
+                member = self.member_by_email(member_email)
                 
-                if not member or len(member) == 0:
+                if not member:
                     print(f"\nNo member found with email: {member_email}")
                     input("Press Enter to continue...")
                     return
                     
-                member = dict(member[0])
-                
-                # Check if already registered
-                query = """
-                SELECT * FROM EventAttendance 
-                WHERE EventID = ? AND MemberID = ?
-                """
-                existing = self.execute_query(query, (event_id, member['MemberID']))
+                name = f"{member['FirstName']} {member['LastName']}"
+                outcome, _, error = self.register_attendee(event_id, member['MemberID'], allow_past=True)
                 
-                if existing and len(existing) > 0:
-                    existing = dict(existing[0])
-                    if existing['AttendanceStatus'] != 'Cancelled':
-                        print(f"\nMember {member['FirstName']} {member['LastName']} is already registered for this event.")
-                    else:
-                        # Update from cancelled to registered
-                        update_query = """
-                        UPDATE EventAttendance
-                        SET AttendanceStatus = 'Registered', RegistrationDate = ?
-                        WHERE EventID = ? AND MemberID = ?
-                        """
-                        self.execute_query(
-                            update_query,
-                            (datetime.date.today(), event_id, member['MemberID']),
-                            fetch=False,
-                            commit=True
-                        )
-                        print(f"\nMember {member['FirstName']} {member['LastName']} has been re-registered for this event.")
+                if outcome == 'already_registered':
+                    print(f"\nMember {name} is already registered for this event.")
+                elif outcome == 'reregistered':
+                    print(f"\nMember {name} has been re-registered for this event.")
+                elif outcome == 'full':
+                    print("\nThis event has reached maximum capacity.")
+                elif outcome == 'registered':
+                    print(f"\nMember {name} has been registered for this event.")
                 else:
-                    # Check capacity
-                    if event['RegisteredCount'] >= event['MaxAttendees']:
-                        print("\nThis event has reached maximum capacity.")
-                    else:
-                        # Add attendance record
-                        query = """
-                        INSERT INTO EventAttendance (EventID, MemberID, RegistrationDate, AttendanceStatus)
-                        VALUES (?, ?, ?, 'Registered')
-                        """
-                        result = self.execute_query(
-                            query,
-                            (event_id, member['MemberID'], datetime.date.today()),
-                            fetch=False,
-                            commit=True
-                        )
-                        
-                        if result:
-                            print(f"\nMember {member['FirstName']} {member['LastName']} has been registered for this event.")
-                        else:
-                            print("\nFailed to register member. Please try again.")
+                    print(f"\nFailed to register member: {error}. Please try again.")
                     
             input("\nPress Enter to continue...")
             
@@ -2034,46 +3811,24 @@ class LibrarySystem:
             return
             
         if choice == '1':
-            query = """
-            SELECT r.RequestID, r.Title, r.AuthorCreator, r.PublicationType, 
-                   r.RequestDate, m.FirstName || ' ' || m.LastName as MemberName
-            FROM AcquisitionRequest r
-            JOIN Member m ON r.MemberID = m.MemberID
-            WHERE r.Status = 'Pending'
-            ORDER BY r.RequestDate
-            """
             title = "Pending Acquisition Requests"
+            paginator = self.listing('pending_acquisitions')
             
         elif choice == '2':
-            query = """
-            SELECT r.RequestID, r.Title, r.AuthorCreator, r.PublicationType, 
-                   r.RequestDate, r.Status, m.FirstName || ' ' || m.LastName as MemberName
-            FROM AcquisitionRequest r
-            JOIN Member m ON r.MemberID = m.MemberID
-            ORDER BY r.Status, r.RequestDate DESC
-            """
             title = "All Acquisition Requests"
+            paginator = self.listing('all_acquisitions', report=True)
             
         else:
             print("\nInvalid choice. Please try again.")
             input("Press Enter to continue...")
             return
             
-        requests = self.execute_query(query)
-        
-        if not requests or len(requests) == 0:
-            print(f"\nNo acquisition requests found.")
-            input("Press Enter to continue...")
-            return
-            
         # Display requests
         headers = ["ID", "Title", "Author/Creator", "Type", "Date", "Requested By"]
         if choice == '2':
             headers.insert(5, "Status")
             
-        table_data = []
-        
-        for req in requests:
+        def format_row(req):
             row = [
                 req['RequestID'],
                 req['Title'],
@@ -2084,36 +3839,31 @@ class LibrarySystem:
             ]
             if choice == '2':
                 row.insert(5, req['Status'])
-                
-            table_data.append(row)
-        
-        print(f"\n{title}:")
-        print(tabulate(table_data, headers=headers, tablefmt="grid"))
-        
+            return row
+            
         # Ask which request to process
-        request_id = input("\nEnter Request ID to process (or 0 to go back): ")
+        request_id = self.browse_pages(
+            paginator, title, headers, format_row,
+            "\nEnter Request ID to process (or 0 to go back): "
+        )
         
+        if request_id is None:
+            print(f"\nNo acquisition requests found.")
+            input("Press Enter to continue...")
+            return
+            
         if request_id == '0':
             return
             
         # Get specific request
-        query = """
-        SELECT r.*, m.FirstName || ' ' || m.LastName as MemberName,
-               s.FirstName || ' ' || s.LastName as StaffName
-        FROM AcquisitionRequest r
-        JOIN Member m ON r.MemberID = m.MemberID
-        LEFT JOIN Staff s ON r.StaffID = s.StaffID
-        WHERE r.RequestID = ?
-        """
-        request = self.execute_query(query, (request_id,))
+        request = self.acquisition_request(request_id)
         
-        if not request or len(request) == 0:
+        if not request:
             print(f"\nRequest ID {request_id} not found.")
             input("Press Enter to continue...")
             return
             
-        request = dict(request[0])
-        
+
         clear_screen()
         print(f"\n===== ACQUISITION REQUEST #{request['RequestID']} =====")
         print(f"Title: {request['Title']}")
@@ -2143,26 +3893,16 @@ class LibrarySystem:
         action = input("\nEnter your choice (1-4): ")
         
         if action == '1' or action == '2':
-            # Update request status
-            new_status = 'Approved' if action == '1' else 'Rejected'
+            # Update request status; empty notes keep the existing ones
             notes = input("\nAdd any notes (optional): ")
-            
-            if not notes and request['Notes']:
-                notes = request['Notes']
-                
-            update_query = """
-            UPDATE AcquisitionRequest
-            SET Status = ?, StaffID = ?, Notes = ?
-            WHERE RequestID = ?
-            """
-            self.execute_query(
-                update_query,
-                (new_status, self.current_user['StaffID'], notes, request_id),
-                fetch=False,
-                commit=True
+            result = self.decide_acquisition(
+                request_id, self.current_user['StaffID'], approve=(action == '1'), notes=notes
             )
             
-            print(f"\nRequest has been {new_status.lower()}.")
+            if result.outcome in ('approved', 'rejected'):
+                print(f"\nRequest has been {result.outcome}.")
+            else:
+                print("\nThis request has already been processed.")
             
         elif action == '3':
             # Add notes
@@ -2170,19 +3910,7 @@ class LibrarySystem:
             print(f"Current notes: {current_notes}")
             
             new_notes = input("\nEnter additional notes: ")
-            combined_notes = current_notes + "\n" + new_notes if current_notes else new_notes
-            
-            update_query = """
-            UPDATE AcquisitionRequest
-            SET Notes = ?
-            WHERE RequestID = ?
-            """
-            self.execute_query(
-                update_query,
-                (combined_notes, request_id),
-                fetch=False,
-                commit=True
-            )
+            self.add_acquisition_notes(request_id, new_notes)
             
             print("\nNotes have been updated.")
             
@@ -2206,93 +3934,55 @@ class LibrarySystem:
             return
             
         if choice == '1':
-            query = """
-            SELECT v.VolunteerID, m.FirstName || ' ' || m.LastName as MemberName,
-                   m.Email, m.Phone, v.SkillsInterests, v.AvailabilityHours, v.StartDate
-            FROM Volunteer v
-            JOIN Member m ON v.MemberID = m.MemberID
-            WHERE v.Status = 'Active'
-            ORDER BY v.StartDate DESC
-            """
             title = "Active Volunteers"
+            paginator = self.listing('active_volunteers')
+            headers = ["ID", "Name", "Email", "Phone", "Skills/Interests", "Availability", "Start Date"]
             
         elif choice == '2':
-            query = """
-            SELECT v.VolunteerID, m.FirstName || ' ' || m.LastName as MemberName,
-                   m.Email, m.Phone, v.SkillsInterests, v.Status, v.StartDate
-            FROM Volunteer v
-            JOIN Member m ON v.MemberID = m.MemberID
-            ORDER BY v.Status, v.StartDate DESC
-            """
             title = "All Volunteers"
+            paginator = self.listing('all_volunteers')
+            headers = ["ID", "Name", "Email", "Phone", "Skills/Interests", "Status", "Start Date"]
             
         else:
             print("\nInvalid choice. Please try again.")
             input("Press Enter to continue...")
             return
             
-        volunteers = self.execute_query(query)
+        # Display volunteers
+        def format_row(vol):
+            return [
+                vol['VolunteerID'],
+                vol['MemberName'],
+                vol['Email'],
+                vol['Phone'],
+                vol['SkillsInterests'][:30] + ('...' if len(vol['SkillsInterests']) > 30 else ''),
+                vol['AvailabilityHours'] if choice == '1' else vol['Status'],
+                vol['StartDate']
+            ]
+            
+        # Ask which volunteer to manage
+        volunteer_id = self.browse_pages(
+            paginator, title, headers, format_row,
+            "\nEnter Volunteer ID to manage (or 0 to go back): "
+        )
         
-        if not volunteers or len(volunteers) == 0:
+        if volunteer_id is None:
             print(f"\nNo volunteers found.")
             input("Press Enter to continue...")
             return
             
-        # Display volunteers
-        if choice == '1':
-            headers = ["ID", "Name", "Email", "Phone", "Skills/Interests", "Availability", "Start Date"]
-        else:
-            headers = ["ID", "Name", "Email", "Phone", "Skills/Interests", "Status", "Start Date"]
-            
-        table_data = []
-        
-        for vol in volunteers:
-            if choice == '1':
-                table_data.append([
-                    vol['VolunteerID'],
-                    vol['MemberName'],
-                    vol['Email'],
-                    vol['Phone'],
-                    vol['SkillsInterests'][:30] + ('...' if len(vol['SkillsInterests']) > 30 else ''),
-                    vol['AvailabilityHours'],
-                    vol['StartDate']
-                ])
-            else:
-                table_data.append([
-                    vol['VolunteerID'],
-                    vol['MemberName'],
-                    vol['Email'],
-                    vol['Phone'],
-                    vol['SkillsInterests'][:30] + ('...' if len(vol['SkillsInterests']) > 30 else ''),
-                    vol['Status'],
-                    vol['StartDate']
-                ])
-        
-        print(f"\n{title}:")
-        print(tabulate(table_data, headers=headers, tablefmt="grid"))
-        
-        # Ask which volunteer to manage
-        volunteer_id = input("\nEnter Volunteer ID to manage (or 0 to go back): ")
-        
         if volunteer_id == '0':
             return
             
         # Get specific volunteer
-        query = """
-        SELECT v.*, m.FirstName || ' ' || m.LastName as MemberName, m.Email, m.Phone
-        FROM Volunteer v
-        JOIN Member m ON v.MemberID = m.MemberID
-        WHERE v.VolunteerID = ?
-        """
-        volunteer = self.execute_query(query, (volunteer_id,))
+        volunteer = self.volunteer_detail(volunteer_id)
         
-        if not volunteer or len(volunteer) == 0:
+        if not volunteer:
             print(f"\nVolunteer ID {volunteer_id} not found.")
             input("Press Enter to continue...")
             return
             
-        volunteer = dict(volunteer[0])
-        
+
         clear_screen()
         print(f"\n===== VOLUNTEER DETAILS =====")
         print(f"Name: {volunteer['MemberName']}")
@@ -2319,17 +4009,7 @@ class LibrarySystem:
             confirm = input(f"\nChange status from {current_status} to {new_status}? (y/n): ")
             
             if confirm.lower() == 'y':
-                update_query = """
-                UPDATE Volunteer
-                SET Status = ?
-                WHERE VolunteerID = ?
-                """
-                self.execute_query(
-                    update_query,
-                    (new_status, volunteer_id),
-                    fetch=False,
-                    commit=True
-                )
+                self.update_volunteer(volunteer_id, status=new_status)
                 
                 print(f"\nVolunteer status updated to: {new_status}")
                 
@@ -2337,18 +4017,7 @@ class LibrarySystem:
             # Update skills/interests
             print(f"Current Skills/Interests: {volunteer['SkillsInterests']}")
             new_skills = input("\nEnter new Skills/Interests: ")
-            
-            update_query = """
-            UPDATE Volunteer
-            SET SkillsInterests = ?
-            WHERE VolunteerID = ?
-            """
-            self.execute_query(
-                update_query,
-                (new_skills, volunteer_id),
-                fetch=False,
-                commit=True
-            )
+            self.update_volunteer(volunteer_id, skills=new_skills)
             
             print("\nSkills/Interests updated successfully.")
             
@@ -2356,18 +4025,7 @@ class LibrarySystem:
             # Update availability
             print(f"Current Availability: {volunteer['AvailabilityHours']}")
             new_availability = input("\nEnter new Availability: ")
-            
-            update_query = """
-            UPDATE Volunteer
-            SET AvailabilityHours = ?
-            WHERE VolunteerID = ?
-            """
-            self.execute_query(
-                update_query,
-                (new_availability, volunteer_id),
-                fetch=False,
-                commit=True
-            )
+            self.update_volunteer(volunteer_id, availability=new_availability)
             
             print("\nAvailability updated successfully.")
             
@@ -2384,92 +4042,77 @@ class LibrarySystem:
         print("1. View Unpaid Fines")
         print("2. View All Fines")
         print("3. Search Fines by Member")
-        print("4. Return to Staff Menu")
+        print("4. Full Fines Report")
+        print("5. Return to Staff Menu")
         
-        choice = input("\nEnter your choice (1-4): ")
+        choice = input("\nEnter your choice (1-5): ")
         
+        if choice == '5':
+            return
+            
         if choice == '4':
+            self.fines_report()
             return
             
         if choice == '1':
-            query = """
-            SELECT f.FineID, f.Amount, f.IssuedDate, f.Status,
-                   m.FirstName || ' ' || m.LastName as MemberName, m.Email,
-                   i.Title, b.DueDate, b.ReturnDate
-            FROM Fine f
-            JOIN Borrowing b ON f.BorrowID = b.BorrowID
-            JOIN Member m ON b.MemberID = m.MemberID
-            JOIN LibraryItem i ON b.ItemID = i.ItemID
-            WHERE f.Status = 'Unpaid'
-            ORDER BY f.IssuedDate
-            """
             title = "Unpaid Fines"
-            fines = self.execute_query(query)
+            total_unpaid = self.unpaid_fines_total(report=True)
+            headers = ["ID", "Amount", "Issued Date", "Member", "Item", "Due Date", "Return Date"]
+            
+            def format_row(fine):
+                return [
+                    fine['FineID'],
+                    f"${fine['Amount']:.2f}",
+                    fine['IssuedDate'],
+                    fine['MemberName'],
+                    fine['Title'],
+                    fine['DueDate'],
+                    fine['ReturnDate'] if fine['ReturnDate'] else 'Not returned'
+                ]
+                
+            print(f"Total unpaid: ${total_unpaid:.2f}")
+            fine_id = self.browse_pages(
+                self.listing('unpaid_fines', report=True), title, headers, format_row,
+                "\nEnter Fine ID to process payment (or 0 to go back): "
+            )
             
         elif choice == '2':
-            query = """
-            SELECT f.FineID, f.Amount, f.IssuedDate, f.Status, f.PaidDate,
-                   m.FirstName || ' ' || m.LastName as MemberName,
-                   i.Title, b.DueDate, b.ReturnDate
-            FROM Fine f
-            JOIN Borrowing b ON f.BorrowID = b.BorrowID
-            JOIN Member m ON b.MemberID = m.MemberID
-            JOIN LibraryItem i ON b.ItemID = i.ItemID
-            ORDER BY f.Status, f.IssuedDate DESC
-            LIMIT 30
-            """
-            title = "All Fines (Last 30)"
-            fines = self.execute_query(query)
+            title = "All Fines"
+            headers = ["ID", "Amount", "Issued Date", "Status", "Paid Date", "Member", "Item"]
+            
+            def format_row(fine):
+                return [
+                    fine['FineID'],
+                    f"${fine['Amount']:.2f}",
+                    fine['IssuedDate'],
+                    fine['Status'],
+                    fine['PaidDate'] if fine['PaidDate'] else 'N/A',
+                    fine['MemberName'],
+                    fine['Title']
+                ]
+                
+            fine_id = self.browse_pages(
+                self.listing('all_fines', report=True), title, headers, format_row,
+                "\nEnter Fine ID to process payment (or 0 to go back): "
+            )
             
         elif choice == '3':
             member_email = input("\nEnter member email: ")
             
-            query = """
-            SELECT f.FineID, f.Amount, f.IssuedDate, f.Status, f.PaidDate,
-                   m.FirstName || ' ' || m.LastName as MemberName,
-                   i.Title, b.DueDate, b.ReturnDate
-            FROM Fine f
-            JOIN Borrowing b ON f.BorrowID = b.BorrowID
-            JOIN Member m ON b.MemberID = m.MemberID
-            JOIN LibraryItem i ON b.ItemID = i.ItemID
-            WHERE m.Email = ?
-            ORDER BY f.Status, f.IssuedDate DESC
-            """
             title = f"Fines for Member: {member_email}"
-            fines = self.execute_query(query, (member_email,))
-            
-        else:
-            print("\nInvalid choice. Please try again.")
-            input("Press Enter to continue...")
-            return
-            
-        if not fines or len(fines) == 0:
-            print(f"\nNo fines found.")
-            input("Press Enter to continue...")
-            return
+            fines = self.member_fines(member_email)
             
-        # Display fines
-        if choice == '1':
-            headers = ["ID", "Amount", "Issued Date", "Member", "Item", "Due Date", "Return Date"]
-        else:
+            if not fines or len(fines) == 0:
+                print(f"\nNo fines found.")
+                input("Press Enter to continue...")
+                return
+                
+            # Display fines
             headers = ["ID", "Amount", "Issued Date", "Status", "Paid Date", "Member", "Item"]
+            table_data = []
+            total_unpaid = 0
             
-        table_data = []
-        total_unpaid = 0
-        
-        for fine in fines:
-            if choice == '1':
-                table_data.append([
-                    fine['FineID'],
-                    f"${fine['Amount']:.2f}",
-                    fine['IssuedDate'],
-                    fine['MemberName'],
-                    fine['Title'],
-                    fine['DueDate'],
-                    fine['ReturnDate'] if fine['ReturnDate'] else 'Not returned'
-                ])
-                total_unpaid += fine['Amount']
-            else:
+            for fine in fines:
                 table_data.append([
                     fine['FineID'],
                     f"${fine['Amount']:.2f}",
@@ -2481,43 +4124,47 @@ class LibrarySystem:
                 ])
                 if fine['Status'] == 'Unpaid':
                     total_unpaid += fine['Amount']
-        
-        print(f"\n{title}:")
-        print(tabulate(table_data, headers=headers, tablefmt="grid"))
-        
-        if choice == '1' or choice == '3':
+            
+            print(f"\n{title}:")
+            print(tabulate(table_data, headers=headers, tablefmt="grid"))
             print(f"Total unpaid: ${total_unpaid:.2f}")
             
-        # Ask which fine to manage
-        fine_id = input("\nEnter Fine ID to process payment (or 0 to go back): ")
-        
+            # Ask which fine to manage
+            fine_id = input("\nEnter Fine ID to process payment (or 0 to go back): ")
+            
+        else:
+            print("\nInvalid choice. Please try again.")
+            input("Press Enter to continue...")
+            return
+            
+        if fine_id is None:
+            print(f"\nNo fines found.")
+            input("Press Enter to continue...")
+            return
+            
         if fine_id == '0':
             return
             
         # Get specific fine
-        query = """
-        SELECT f.*, m.FirstName || ' ' || m.LastName as MemberName, m.Email,
-               i.Title, b.DueDate, b.ReturnDate
-        FROM Fine f
-        JOIN Borrowing b ON f.BorrowID = b.BorrowID
-        JOIN Member m ON b.MemberID = m.MemberID
-        JOIN LibraryItem i ON b.ItemID = i.ItemID
-        WHERE f.FineID = ?
-        """
-        fine = self.execute_query(query, (fine_id,))
+        fine = self.fine_detail(fine_id)
         
-        if not fine or len(fine) == 0:
+        if not fine:
             print(f"\nFine ID {fine_id} not found.")
             input("Press Enter to continue...")
             return
             
-        fine = dict(fine[0])
-        
+
         if fine['Status'] == 'Paid':
             print(f"\nThis fine has already been paid on {fine['PaidDate']}.")
             input("Press Enter to continue...")
             return
             
+        if fine['ReturnDate'] is None:
+            print("\nThis item is still out, so its fine is still growing.")
+            print("It can be paid once the item has been returned.")
+            input("Press Enter to continue...")
+            return
+            
         clear_screen()
         print(f"\n===== PROCESS FINE PAYMENT =====")
         print(f"Fine ID: {fine['FineID']}")
@@ -2531,40 +4178,361 @@ class LibrarySystem:
         confirm = input("\nMark this fine as paid? (y/n): ")
         
         if confirm.lower() == 'y':
-            paid_date = datetime.date.today()
-            
-            update_query = """
-            UPDATE Fine
-            SET Status = 'Paid', PaidDate = ?
-            WHERE FineID = ?
-            """
-            self.execute_query(
-                update_query,
-                (paid_date, fine_id),
-                fetch=False,
-                commit=True
-            )
-            
-            print(f"\nFine has been marked as paid on {paid_date}.")
+            outcome, fine, error = self.pay_fine(fine_id)
+            
+            if outcome == 'paid':
+                print(f"\nFine has been marked as paid on {fine['PaidDate']}.")
+            elif outcome == 'already_paid':
+                print(f"\nThis fine has already been paid on {fine['PaidDate']}.")
+            elif outcome == 'loan_open':
+                print("\nThis item is still out; the fine can be paid once it has been returned.")
+            else:
+                print(f"\nFailed to record the payment: {error}. Please try again.")
             
         input("\nPress Enter to continue...")
         
+    def fines_report(self):
+        """Print every fine on record, streaming rows as they are read"""
+        clear_screen()
+        print("\n===== FULL FINES REPORT =====\n")
+        
+        headers = ["ID", "Amount", "Issued Date", "Status", "Paid Date", "Member", "Item"]
+        totals = {'count': 0, 'unpaid': 0, 'paid': 0}
+        
+        def report_rows():
+            for fine in self.fines_report_rows():
+                totals['count'] += 1
+                totals['unpaid' if fine['Status'] == 'Unpaid' else 'paid'] += fine['Amount']
+                yield [
+                    fine['FineID'],
+                    f"${fine['Amount']:.2f}",
+                    fine['IssuedDate'],
+                    fine['Status'],
+                    fine['PaidDate'] if fine['PaidDate'] else 'N/A',
+                    fine['MemberName'],
+                    fine['Title']
+                ]
+                
+        # Dates have a known width; the sample might only contain 'N/A'
+        widths = [None, None, 10, None, 10, None, None]
+        print_table_stream(report_rows(), headers, widths)
+        
+        print(f"\nFines: {totals['count']}")
+        print(f"Total paid: ${totals['paid']:.2f}")
+        print(f"Total unpaid: ${totals['unpaid']:.2f}")
+        self.print_snapshot_note()
+        
+        input("\nPress Enter to continue...")
+        
 
 def clear_screen():
     """Clear the terminal screen"""
+    if not sys.stdout.isatty():
+        return  # Piped or captured output has no screen to clear
     if os.name == 'nt':  # For Windows
         os.system('cls')
-    else:  # For Mac and Linux
-        os.system('clear')
+    else:  # For Mac and Linux, an ANSI escape instead of spawning clear(1)
+        sys.stdout.write("\033[H\033[2J")
+        sys.stdout.flush()
+
+def build_match_query(field, search_term):
+    """Build an FTS5 prefix query restricted to one column"""
+    tokens = re.findall(r'\w+', search_term)
+    if not tokens:
+        return None
+    terms = " ".join(f'"{token}"*' for token in tokens)
+    return f"{field} : ({terms})"
+
+def distinct_ids(values):
+    """Map each distinct requested ID to its integer value, in the order given
+
+    Values that are not whole numbers map to None, so batch operations can
+    report them per item instead of failing the whole batch.
+    """
+    ids = {}
+    for value in values:
+        try:
+            item_id = int(value)
+        except (TypeError, ValueError):
+            item_id = None
+        ids.setdefault(value if item_id is None else item_id, item_id)
+    return ids
+
+def print_table_stream(rows, headers, widths=None, sample_size=STREAM_SAMPLE_ROWS, out=None):
+    """Print rows as a grid table without holding them all in memory
+
+    Columns with a fixed entry in widths use it; the rest are sized from
+    the headers and the first sample_size rows, and longer cells further
+    down are truncated to fit. Output is flushed every sample_size rows.
+    Returns the number of rows printed.
+    """
+    out = out or sys.stdout
+    rows = iter(rows)
+    sample = []
+    for row in rows:
+        sample.append(row)
+        if len(sample) >= sample_size:
+            break
+            
+    if not sample:
+        return 0
+        
+    fixed = widths or [None] * len(headers)
+    widths = [len(str(header)) for header in headers]
+    for row in sample:
+        for column, cell in enumerate(row):
+            widths[column] = max(widths[column], len(str(cell)))
+    widths = [width if size is None else max(size, len(str(header)))
+              for width, size, header in zip(widths, fixed, headers)]
+            
+    def separator(fill):
+        return "+" + "+".join(fill * (width + 2) for width in widths) + "+\n"
+        
+    def format_line(row):
+        cells = []
+        for cell, width in zip(row, widths):
+            text = str(cell)
+            if len(text) > width:
+                # Too narrow for an ellipsis: just cut the text at the column width
+                text = text[:width - 3] + '...' if width >= 4 else text[:width]
+            # Right-align numbers, as tabulate does
+            if isinstance(cell, (int, float)):
+                cells.append(text.rjust(width))
+            else:
+                cells.append(text.ljust(width))
+        return "| " + " | ".join(cells) + " |\n"
+        
+    line = separator("-")
+    out.write(line + format_line(headers) + separator("="))
+    
+    count = 0
+    for row in sample:
+        out.write(format_line(row) + line)
+        count += 1
+    out.flush()
+    
+    for row in rows:
+        out.write(format_line(row) + line)
+        count += 1
+        if count % sample_size == 0:
+            out.flush()
+    out.flush()
+    return count
+    
+def advise_indexes(library):
+    """Find full table scans and temp B-trees in the plans of the app's statements
+
+    Covers the STATEMENTS registry and both forms of every PAGED_LISTINGS
+    query. Returns a list of (statement, issue, plan detail) tuples.
+    """
+    queries = [(name, query) for name, query in STATEMENTS.items()]
+    for name in PAGED_LISTINGS:
+        paginator = KeysetPaginator(library, name)
+        queries.append((name, paginator._first_query))
+        queries.append((f"{name} (next page)", paginator._seek_query))
+        
+    findings = []
+    for name, query in queries:
+        # Planning does not need real values; NULL stands in for every parameter
+        names = re.findall(r"(?<![\w:]):([A-Za-z_]\w*)", query)
+        params = dict.fromkeys(names) if names else (None,) * query.count('?')
+        try:
+            plan = library.query_plan(query, params)
+        except sqlite3.Error as e:
+            findings.append((name, "error", str(e)))
+            continue
+            
+        for _, _, _, detail in plan:
+            if detail.startswith("SCAN") and "VIRTUAL TABLE" not in detail and "CONSTANT ROW" not in detail:
+                issue = "full scan" if " USING " not in detail else "index scan"
+                findings.append((name, issue, detail))
+            elif "TEMP B-TREE" in detail:
+                findings.append((name, "temp b-tree", detail))
+    return findings
+    
+def print_index_advice(library):
+    """Print the plan problems found by advise_indexes"""
+    findings = advise_indexes(library)
+    
+    if not findings:
+        print("No full scans or temp B-trees found in the statement registry.")
+        return
+        
+    print(tabulate(findings, headers=["Statement", "Issue", "Plan Detail"], tablefmt="grid"))
+    print(f"\n{len(findings)} plan issues found. Index scans that walk an ORDER BY index "
+          "under a LIMIT (the paged listings) are expected.")
+    
+def print_query_profile(library):
+    """Print time spent in SQL per menu action"""
+    profile = library.get_query_profile()
+    if not profile:
+        return
+        
+    headers = ["Method", "Queries", "Total ms", "Avg ms", "Rows"]
+    table_data = []
+    
+    for entry in profile:
+        table_data.append([
+            entry['caller'],
+            entry['queries'],
+            f"{entry['total_seconds'] * 1000:.1f}",
+            f"{entry['total_seconds'] * 1000 / entry['queries']:.2f}",
+            entry['rows']
+        ])
+        
+    print("\nQuery Profile:")
+    print(tabulate(table_data, headers=headers, tablefmt="grid"))
+    
+    cache = library.get_dashboard_stats()
+    print(f"Account summary cache: {cache['hits']} hits, {cache['misses']} misses "
+          f"({cache['hit_rate']:.0%}), {cache['invalidations']} invalidated, "
+          f"{cache['evictions']} evicted")
+    logins = library.passwords.get_stats()
+    print(f"Password checks: {logins['kdf_runs']} hashed, {logins['cache_hits']} from the login cache, "
+          f"{logins['failures']} failed")
+    print(f"Slow queries are logged to {SLOW_QUERY_LOG}")
+
+def run_fine_accrual(library, as_of):
+    """Run the overdue-fine accrual for as_of ('today' or YYYY-MM-DD) and print a summary"""
+    try:
+        as_of = datetime.date.today() if as_of == "today" else datetime.date.fromisoformat(as_of)
+    except ValueError:
+        print(f"Invalid date {as_of!r}; use YYYY-MM-DD.")
+        return False
+        
+    start = time.perf_counter()
+    outcome, run, error = library.accrue_overdue_fines(as_of)
+    
+    if outcome == 'up_to_date':
+        print(f"Fines are already accrued through {run['AsOfDate']}.")
+    elif outcome == 'accrued':
+        print(f"Accrued overdue fines as of {as_of}: {run['FinesAdded']} added, "
+              f"{run['FinesUpdated']} updated ({time.perf_counter() - start:.2f}s).")
+    else:
+        print(f"Fine accrual failed: {error}")
+        return False
+    return True
 
+def print_fine_policy(library):
+    """Print the fine rules per item type and the holiday calendar"""
+    policy = library.fine_policy()
+    rows = [
+        [item_type, f"${rate:.2f}", grace, f"${cap:.2f}" if cap is not None else "None"]
+        for item_type, (rate, grace, cap) in sorted(policy.rules.items())
+    ]
+    print(tabulate(rows, headers=["Item Type", "Per Day", "Grace Days", "Cap"], tablefmt="grid"))
+    
+    holidays = library.execute_statement('library_holidays')
+    if holidays:
+        print("\nHolidays (not counted as days late):")
+        print(tabulate([[row['HolidayDate'], row['Name'] or ''] for row in holidays],
+                       headers=["Date", "Name"], tablefmt="grid"))
+    else:
+        print("\nNo holidays defined.")
+    print(f"\nVectorized pricing: {'NumPy ' + np.__version__ if np is not None else 'off (NumPy not installed)'}")
+    
+def run_fine_repricing(library, start_date, end_date):
+    """Re-price late-return fines between two YYYY-MM-DD dates and print a summary"""
+    try:
+        start_date, end_date = (datetime.date.fromisoformat(day) for day in (start_date, end_date))
+    except ValueError as e:
+        print(f"Invalid date: {e}; use YYYY-MM-DD.")
+        return False
+        
+    start = time.perf_counter()
+    outcome, counts, error = library.reprice_fines(start_date, end_date)
+    
+    if outcome != 'repriced':
+        print(f"Re-pricing failed: {error}")
+        return False
+    print(f"Re-priced {counts['LateReturns']} late returns from {start_date} to {end_date}: "
+          f"{counts['FinesChanged']} fines changed, {counts['FinesRemoved']} removed "
+          f"({time.perf_counter() - start:.2f}s).")
+    return True
+    
+def run_set_staff_password(library, email):
+    """Prompt for and store a new password for the staff member with this email"""
+    staff = library.fetch_record('staff_by_email', (email,))
+    if not staff:
+        print(f"No staff member with email {email!r}.")
+        return False
+        
+    password = getpass("New password: ")
+    if not password or password != getpass("Repeat the new password: "):
+        print("Passwords are empty or do not match; nothing changed.")
+        return False
+        
+    outcome, _, error = library.set_staff_password(staff['StaffID'], password)
+    if outcome != 'updated':
+        print(f"Could not set the password: {error or outcome}")
+        return False
+    print(f"Password set for {staff['FirstName']} {staff['LastName']}; they now log in with it.")
+    return True
+    
 def main():
     """Main function to run the library system"""
+    parser = argparse.ArgumentParser(description="Library Management System")
+    parser.add_argument("--advise-indexes", action="store_true",
+                        help="report full scans and temp B-trees in the app's query plans and exit")
+    parser.add_argument("--accrue-fines", nargs="?", const="today", metavar="YYYY-MM-DD",
+                        help="bring fines on overdue open loans up to date (default: today) and exit")
+    parser.add_argument("--fine-policy", action="store_true",
+                        help="print the fine rates, grace periods, caps and holidays and exit")
+    parser.add_argument("--reprice-fines", nargs=2, metavar=("START", "END"),
+                        help="re-price fines for late returns between two YYYY-MM-DD dates and exit")
+    parser.add_argument("--group-commit", action="store_true",
+                        help="send every write through one writer that commits them in groups")
+    parser.add_argument("--report-snapshot", type=float, nargs="?", const=REPORT_SNAPSHOT_MAX_AGE,
+                        metavar="SECONDS",
+                        help="run staff reports on a read-only snapshot refreshed after SECONDS "
+                             f"(default: {REPORT_SNAPSHOT_MAX_AGE})")
+    parser.add_argument("--set-staff-password", metavar="EMAIL",
+                        help="prompt for a new password for this staff member and exit")
+    parser.add_argument("--demo-staff-login", action="store_true",
+                        help="let staff with no password set log in with their email alone (demo data only)")
+    args = parser.parse_args()
+    
+    # Optional slow-query logging, e.g. LIBRARY_SLOW_QUERY_MS=50
+    slow_query_ms = os.environ.get("LIBRARY_SLOW_QUERY_MS")
+    slow_query_ms = float(slow_query_ms) if slow_query_ms else None
+    
     # Create database connection
-    library = LibrarySystem(DB_FILE)
+    library = LibrarySystem(
+        DB_FILE,
+        slow_query_ms=slow_query_ms,
+        group_commit=args.group_commit,
+        report_snapshot_age=args.report_snapshot,
+        demo_staff_login=args.demo_staff_login
+    )
     if not library.connect_db():
         print("Failed to connect to the database. Exiting...")
         sys.exit(1)
         
+    if args.advise_indexes:
+        print_index_advice(library)
+        library.close_db()
+        return
+        
+    if args.accrue_fines:
+        ok = run_fine_accrual(library, args.accrue_fines)
+        library.close_db()
+        sys.exit(0 if ok else 1)
+        
+    if args.fine_policy:
+        print_fine_policy(library)
+        library.close_db()
+        return
+        
+    if args.reprice_fines:
+        ok = run_fine_repricing(library, *args.reprice_fines)
+        library.close_db()
+        sys.exit(0 if ok else 1)
+        
+    if args.set_staff_password:
+        ok = run_set_staff_password(library, args.set_staff_password)
+        library.close_db()
+        sys.exit(0 if ok else 1)
+        
     # Main application loop
     while True:
         # If not logged in, show login screen
@@ -2582,6 +4550,9 @@ def main():
         elif library.user_type == "staff":
             library.staff_menu()
             
+    if library.instrument:
+        print_query_profile(library)
+        
     # Close database connection
     library.close_db()
     print("Thank you for using the Library Management System. Goodbye!")
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+# Library Benchmark - drives the app's hot paths against generated databases
+
+import sqlite3
+import os
+import io
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import datetime
+import platform
+import subprocess
+import contextlib
+import importlib.util
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_FILE = os.path.join(SCRIPT_DIR, "library-app.py")
+INIT_FILE = os.path.join(SCRIPT_DIR, "initialize-db.py")
+DATA_DIR = "benchmark-data"
+ITERATIONS = 200
+WARMUP = 10
+REGRESSION_THRESHOLD = 20  # percent slower at p95 before --compare flags an operation
+PERCENTILES = (50, 95, 99)
+SAMPLE_ATTEMPTS = 50  # random probes per sample before giving up on sparse data
+
+
+class ScriptError(Exception):
+    """An operation asked for more input than its script provides"""
+
+
+class ScriptedInput:
+    """Stands in for input()/getpass() and answers prompts from a list"""
+
+    def __init__(self):
+        self.answers = []
+
+    def load(self, answers):
+        self.answers = list(answers)
+
+    def __call__(self, prompt=""):
+        if not self.answers:
+            raise ScriptError(f"no scripted answer for prompt {prompt.strip()!r}")
+        return self.answers.pop(0)
+
+
+def load_app():
+    """Import library-app.py as a module with its prompts scripted"""
+    spec = importlib.util.spec_from_file_location("library_app", APP_FILE)
+    app = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app)
+
+    # Module globals shadow the builtins, so the screens read from the script.
+    # Screens are not cleared either, so clearing never lands in the timings,
+    # even when the benchmark runs in a terminal.
+    app.input = app.getpass = ScriptedInput()
+    app.clear_screen = lambda: None
+    return app
+
+
+def scale_volumes(members):
+    """Generator volumes for a benchmark scale, keyed by member count"""
+    return {
+        'members': members,
+        'items': members * 5,
+        'borrowings': members * 50,
+        'events': max(members // 50, 10)
+    }
+
+
+def ensure_database(members, data_dir, seed):
+    """Generate the database for a scale unless it already exists"""
+    os.makedirs(data_dir, exist_ok=True)
+    db_file = os.path.join(data_dir, f"bench-{members}.db")
+    if os.path.exists(db_file):
+        return db_file
+
+    command = [sys.executable, INIT_FILE, "--generate", "--db", db_file, "--seed", str(seed)]
+    for name, count in scale_volumes(members).items():
+        command += [f"--{name}", str(count)]
+    print(f"Generating {db_file}...")
+    subprocess.run(command, check=True)
+    return db_file
+
+
+def table_counts(conn):
+    """Row counts of the tables that drive query cost"""
+    return {
+        table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        for table in ('Member', 'LibraryItem', 'Borrowing', 'Fine', 'Event')
+    }
+
+
+def sample_rows(conn, rng, query, count):
+    """Probe random rowids with query until count distinct rows are found"""
+    table = re.search(r"FROM (\w+)", query).group(1)
+    low, high = conn.execute(f"SELECT MIN(rowid), MAX(rowid) FROM {table}").fetchone()
+    if low is None:
+        return []
+
+    rows = {}
+    attempts = 0
+    while len(rows) < count and attempts < count * SAMPLE_ATTEMPTS:
+        attempts += 1
+        row = conn.execute(query, (rng.randint(low, high),)).fetchone()
+        if row is not None:
+            rows[row[0]] = row
+    return list(rows.values())
+
+
+def search_word(text):
+    """The longest word of a title or name, which makes a selective search term"""
+    words = re.findall(r"[A-Za-z]{3,}", text or "")
+    return max(words, key=len) if words else None
+
+
+def build_workload(db_file, count, seed):
+    """Sample search terms, members and items for every operation up front"""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_file)
+    conn.row_factory = sqlite3.Row
+
+    catalog = sample_rows(
+        conn, rng, "SELECT ItemID, Title, Creator FROM CatalogEntry WHERE ItemID >= ? LIMIT 1", count
+    )
+    members = sample_rows(conn, rng, "SELECT * FROM Member WHERE MemberID >= ? LIMIT 1", count)
+    available = sample_rows(
+        conn, rng,
+        "SELECT ItemID FROM LibraryItem WHERE ItemID >= ? AND Status = 'Available' LIMIT 1",
+        count
+    )
+    staff = conn.execute("SELECT * FROM Staff ORDER BY StaffID LIMIT 1").fetchone()
+    workload = {
+        'counts': table_counts(conn),
+        'titles': [term for term in (search_word(row['Title']) for row in catalog) if term],
+        'creators': [term for term in (search_word(row['Creator']) for row in catalog) if term],
+        'members': [dict(row) for row in members],
+        'items': [row['ItemID'] for row in available],
+        'staff': dict(staff)
+    }
+    conn.close()
+    return workload
+
+
+def as_member(library, member):
+    library.current_user = member
+    library.user_type = "member"
+
+
+def as_staff(library, staff):
+    library.current_user = staff
+    library.user_type = "staff"
+
+
+def build_operations(workload):
+    """Each operation is (name, setups) where a setup returns (method, args, answers, expect)
+
+    Borrowed items are handed from borrow_item to process_return, so a run
+    returns everything it checks out and the database keeps its shape.
+    """
+    staff = workload['staff']
+    members = workload['members']
+    borrowed = []
+
+    def find_title(library, i):
+        as_staff(library, staff)
+        return library.find_item, (), ['1', workload['titles'][i % len(workload['titles'])], ''], "Search Results"
+
+    def find_creator(library, i):
+        as_staff(library, staff)
+        return library.find_item, (), ['2', workload['creators'][i % len(workload['creators'])], ''], "Search Results"
+
+    def view_account(library, i):
+        as_member(library, members[i % len(members)])
+        return library.view_account, (), [''], "MY ACCOUNT"
+
+    def borrow(library, i):
+        member = members[i % len(members)]
+        item_id = workload['items'][i]
+        as_member(library, member)
+        borrowed.append(item_id)
+        return library.borrow_item, (str(item_id),), [''], "Successfully borrowed"
+
+    def process_return(library, i):
+        as_staff(library, staff)
+        return library.process_return, (), ['', str(borrowed[i]), 'y', ''], "returned successfully"
+
+    def unpaid_fines(library, i):
+        as_staff(library, staff)
+        return library.manage_fines, (), ['1', '0'], "Unpaid Fines"
+
+    def all_fines(library, i):
+        as_staff(library, staff)
+        return library.manage_fines, (), ['2', '0'], "All Fines"
+
+    return [
+        ('find_item_title', find_title),
+        ('find_item_creator', find_creator),
+        ('view_account', view_account),
+        ('borrow_item', borrow),
+        ('process_return', process_return),
+        ('manage_fines_unpaid', unpaid_fines),
+        ('manage_fines_all', all_fines)
+    ]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    rank = max(int(round(pct / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(latencies, elapsed, failures):
+    """Latency percentiles (ms) and throughput for one operation"""
+    latencies = sorted(latencies)
+    summary = {
+        'count': len(latencies),
+        'failures': failures,
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3) if latencies else None,
+        'ops_per_sec': round(len(latencies) / elapsed, 1) if elapsed else None
+    }
+    for pct in PERCENTILES:
+        summary[f'p{pct}_ms'] = round(percentile(latencies, pct) * 1000, 3) if latencies else None
+    return summary
+
+
+def run_operation(library, script, setup, iterations, warmup):
+    """Time one operation; warmup iterations run first and are not recorded"""
+    latencies = []
+    failures = 0
+    started = None
+
+    for i in range(warmup + iterations):
+        if i == warmup:
+            started = time.perf_counter()
+        method, args, answers, expect = setup(library, i)
+        script.load(answers)
+        output = io.StringIO()
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(output):
+            method(*args)
+        elapsed = time.perf_counter() - start
+
+        if i >= warmup:
+            latencies.append(elapsed)
+            if script.answers or expect not in output.getvalue():
+                failures += 1
+
+    return summarize(latencies, time.perf_counter() - started, failures)
+
+
+def benchmark_database(app, db_file, iterations, warmup, seed):
+    """Run every operation against one database and return its results"""
+    workload = build_workload(db_file, iterations + warmup, seed)
+    if len(workload['items']) < iterations + warmup or not workload['members']:
+        raise ValueError(f"{db_file} has too few members or available items for {iterations + warmup} iterations")
+
+    library = app.LibrarySystem(db_file)
+    if not library.connect_db():
+        raise sqlite3.OperationalError(f"could not open {db_file}")
+
+    results = {}
+    try:
+        for name, setup in build_operations(workload):
+            results[name] = run_operation(library, app.input, setup, iterations, warmup)
+            stats = results[name]
+            print(f"  {name:<20} p50 {stats['p50_ms']:>9.3f} ms   p95 {stats['p95_ms']:>9.3f} ms   "
+                  f"p99 {stats['p99_ms']:>9.3f} ms   {stats['ops_per_sec']:>9.1f} ops/s"
+                  + (f"   {stats['failures']} failed" if stats['failures'] else ""))
+    finally:
+        library.close_db()
+
+    return {'db': db_file, 'rows': workload['counts'], 'operations': results}
+
+
+def git_revision():
+    """The commit being benchmarked, if this is a git checkout"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPT_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_results(baseline, current, threshold):
+    """Print p95 changes against a baseline run; returns the number of regressions"""
+    baseline_runs = {os.path.basename(run['db']): run for run in baseline['databases']}
+    regressions = 0
+
+    print(f"\nComparison with {baseline.get('revision') or 'baseline'} (p95, threshold {threshold}%):")
+    for run in current['databases']:
+        old_run = baseline_runs.get(os.path.basename(run['db']))
+        if old_run is None:
+            continue
+        for name, stats in run['operations'].items():
+            old = old_run['operations'].get(name)
+            if not old or not old['p95_ms'] or stats['p95_ms'] is None:
+                continue
+            change = (stats['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100
+            flag = ""
+            if change > threshold:
+                flag = "  REGRESSION"
+                regressions += 1
+            print(f"  {os.path.basename(run['db'])} {name:<20} {old['p95_ms']:>9.3f} -> "
+                  f"{stats['p95_ms']:>9.3f} ms ({change:+.1f}%){flag}")
+    return regressions
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the library app's circulation, search and reporting paths. "
+                    "Each run borrows and then returns items, so use generated databases."
+    )
+    parser.add_argument("--db", nargs="+", default=[], help="existing database files to benchmark")
+    parser.add_argument("--scales", nargs="+", type=int, default=[],
+                        help="member counts to benchmark; missing databases are generated")
+    parser.add_argument("--data-dir", default=DATA_DIR,
+                        help=f"where generated databases are kept (default: {DATA_DIR})")
+    parser.add_argument("--iterations", type=int, default=ITERATIONS, help="timed runs per operation")
+    parser.add_argument("--warmup", type=int, default=WARMUP, help="untimed runs per operation")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for data and workload")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="p95 slowdown in percent that counts as a regression")
+    args = parser.parse_args()
+
+    databases = list(args.db)
+    for members in sorted(args.scales):
+        databases.append(ensure_database(members, args.data_dir, args.seed))
+    if not databases:
+        parser.error("give --db files or --scales to benchmark")
+
+    app = load_app()
+    results = {
+        'revision': git_revision(),
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'iterations': args.iterations,
+        'databases': []
+    }
+
+    for db_file in databases:
+        print(f"\nBenchmarking {db_file}...")
+        results['databases'].append(
+            benchmark_database(app, db_file, args.iterations, args.warmup, args.seed)
+        )
+
+    if args.output:
+        with open(args.output, "w") as out:
+            json.dump(results, out, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        if compare_results(baseline, results, args.threshold):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+# Library Server - many desk sessions over one LibraryService
+
+import os
+import json
+import stat
+import socket
+import asyncio
+import logging
+import argparse
+import datetime
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_FILE = os.path.join(SCRIPT_DIR, "library-app.py")
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 7878
+MAX_LINE_BYTES = 64 * 1024
+WRITE_QUEUE_SIZE = 1000  # Writes in flight before sessions wait for the writer
+LISTEN_BACKLOG = 1024  # Desks connecting at once, e.g. when the branch opens
+RESULT_LIMIT = 100  # Search and browse rows sent per response unless the client asks for more
+
+log = logging.getLogger("library-server")
+
+
+def load_app():
+    """Import library-app.py as a module"""
+    spec = importlib.util.spec_from_file_location("library_app", APP_FILE)
+    app = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app)
+    return app
+
+
+def plain(value):
+    """Convert service results (rows, NamedTuples, dates) to JSON-ready values"""
+    if hasattr(value, '_asdict'):
+        return {key: plain(item) for key, item in value._asdict().items()}
+    if isinstance(value, dict):
+        return {key: plain(item) for key, item in value.items() if key != 'Password'}
+    if isinstance(value, (list, tuple)):
+        return [plain(item) for item in value]
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if hasattr(value, 'keys'):  # sqlite3.Row
+        return {key: plain(value[key]) for key in value.keys() if key != 'Password'}
+    return value
+
+
+class RequestError(Exception):
+    """A request that cannot be served; the message goes back to the client"""
+
+
+def int_arg(args, name, default=None):
+    """A whole-number request argument"""
+    value = args.get(name, default)
+    if value is None:
+        raise RequestError(f"missing argument {name!r}")
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise RequestError(f"{name} must be a whole number")
+    return value
+
+
+def text_arg(args, name, default=None, required=True):
+    """A string request argument; None when it is optional and absent"""
+    value = args.get(name, default)
+    if value is None and not required:
+        return None
+    if value is None:
+        raise RequestError(f"missing argument {name!r}")
+    if not isinstance(value, str):
+        raise RequestError(f"{name} must be a string")
+    return value
+
+
+def ids_arg(args, name):
+    """A list of whole-number IDs"""
+    value = args.get(name)
+    if value is None:
+        raise RequestError(f"missing argument {name!r}")
+    if not isinstance(value, list) or any(isinstance(v, bool) or not isinstance(v, int) for v in value):
+        raise RequestError(f"{name} must be a list of whole numbers")
+    return value
+
+
+class Session:
+    """Login state and open listings of one connected desk"""
+
+    def __init__(self, peer, server):
+        self.peer = peer
+        self.server = server
+        self.user = None
+        self.user_type = None
+        self.listings = {}
+
+    def require(self, role):
+        if role and self.user_type != role:
+            raise RequestError(f"log in as {role} first")
+
+
+# --- Operations ---
+# Each handler runs on a worker thread with the service, the session and the
+# request arguments. Reads share the reader pool; writes run on the service's
+# group-commit writer.
+
+def op_ping(service, session, args):
+    return "pong"
+
+
+def op_login(service, session, args):
+    member = service.authenticate_member(text_arg(args, 'email'), text_arg(args, 'password'))
+    if not member:
+        raise RequestError("invalid credentials")
+    session.user, session.user_type, session.listings = member, "member", {}
+    return member
+
+
+def op_staff_login(service, session, args):
+    staff = service.authenticate_staff(text_arg(args, 'email'), text_arg(args, 'password', required=False))
+    if not staff:
+        raise RequestError("invalid credentials")
+    session.user, session.user_type, session.listings = staff, "staff", {}
+    return staff
+
+
+def op_logout(service, session, args):
+    session.user = session.user_type = None
+    session.listings = {}
+    return None
+
+
+def limited(fetch, args):
+    """Up to 'limit' rows from fetch(n), read with one extra to tell the client whether there are more"""
+    limit = int_arg(args, 'limit', RESULT_LIMIT)
+    if limit < 0:
+        raise RequestError("limit must not be negative")
+    rows = fetch(limit + 1) or []
+    return {'rows': rows[:limit], 'has_more': len(rows) > limit}
+
+
+def op_search(service, session, args):
+    field = args.get('field', 'Title')
+    if field not in ('Title', 'Creator'):
+        raise RequestError("field must be Title or Creator")
+    term = text_arg(args, 'term')
+    return limited(lambda limit: service.search_items(field, term, limit), args)
+
+
+def op_browse(service, session, args):
+    item_type = text_arg(args, 'item_type')
+    return limited(lambda limit: service.items_by_type(item_type, limit), args)
+
+
+def op_events(service, session, args):
+    return service.upcoming_events(event_type=text_arg(args, 'event_type', required=False),
+                                   title=text_arg(args, 'title', required=False))
+
+
+def op_account(service, session, args):
+    return service.account_summary(session.user['MemberID'])
+
+
+def op_borrow(service, session, args):
+    return service.checkout_items(session.user['MemberID'], ids_arg(args, 'item_ids'))
+
+
+def op_return(service, session, args):
+    return service.return_borrowing(int_arg(args, 'borrow_id'), member_id=session.user['MemberID'])
+
+
+def op_register(service, session, args):
+    return service.register_attendee(int_arg(args, 'event_id'), session.user['MemberID'])
+
+
+def op_help(service, session, args):
+    return service.submit_help_request(session.user['MemberID'], text_arg(args, 'description'))
+
+
+def op_checkin(service, session, args):
+    return service.return_items(ids_arg(args, 'item_ids'), session.user['StaffID'])
+
+
+def op_listing(service, session, args):
+    name = text_arg(args, 'name')
+    params = args.get('params', [])
+    if not isinstance(params, list) or any(isinstance(value, (dict, list)) for value in params):
+        raise RequestError("params must be a list of values")
+    params = tuple(params)
+    if name == 'staff_help_requests':
+        params = (session.user['StaffID'],)
+    try:
+        paginator = service.listing(name, params)
+    except KeyError:
+        raise RequestError(f"unknown listing {name!r}")
+    session.listings[name] = paginator
+    return {'rows': paginator.first_page(), 'has_next': paginator.has_next, 'has_prev': False}
+
+
+def op_page(service, session, args):
+    paginator = session.listings.get(text_arg(args, 'name'))
+    if paginator is None:
+        raise RequestError("open the listing first")
+    if args.get('direction', 'next') == 'prev':
+        rows = paginator.prev_page() if paginator.has_prev else paginator.rows
+    else:
+        rows = paginator.next_page() if paginator.has_next else paginator.rows
+    return {'rows': rows, 'has_next': paginator.has_next, 'has_prev': paginator.has_prev}
+
+
+def op_fine(service, session, args):
+    return service.fine_detail(int_arg(args, 'fine_id'))
+
+
+def op_pay_fine(service, session, args):
+    return service.pay_fine(int_arg(args, 'fine_id'))
+
+
+def op_fines_total(service, session, args):
+    return service.unpaid_fines_total()
+
+
+def op_stats(service, session, args):
+    return session.server.report_stats()
+
+
+# name -> (required role, is write, handler)
+OPERATIONS = {
+    'ping': (None, False, op_ping),
+    'login': (None, False, op_login),
+    'staff_login': (None, False, op_staff_login),
+    'logout': (None, False, op_logout),
+    'search': (None, False, op_search),
+    'browse': (None, False, op_browse),
+    'events': (None, False, op_events),
+    'account': ('member', False, op_account),
+    'borrow': ('member', True, op_borrow),
+    'return': ('member', True, op_return),
+    'register': ('member', True, op_register),
+    'help': ('member', True, op_help),
+    'checkin': ('staff', True, op_checkin),
+    'listing': ('staff', False, op_listing),
+    'page': ('staff', False, op_page),
+    'fine': ('staff', False, op_fine),
+    'pay_fine': ('staff', True, op_pay_fine),
+    'fines_total': ('staff', False, op_fines_total),
+    'stats': ('staff', False, op_stats),
+}
+
+
+class LibraryServer:
+    """Serves JSON-lines desk sessions from one process
+
+    Every session is a coroutine, so idle desks cost no threads. Reads run
+    on a pool of reader threads, each with its own pooled connection;
+    writes go to the service's GroupCommitWriter, so SQLite only ever sees
+    one writer and writes from many desks share each commit.
+    """
+
+    def __init__(self, service, readers):
+        self.service = service
+        self.readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="reader")
+        self.write_slots = asyncio.Semaphore(WRITE_QUEUE_SIZE)
+        self.sessions = set()
+        self.stats = {'requests': 0, 'reads': 0, 'writes': 0, 'errors': 0}
+
+    def report_stats(self):
+        """Request, queue and cache counters for the stats operation"""
+        writer = self.service.writer
+        return dict(self.stats, sessions=len(self.sessions), queued_writes=writer.pending(),
+                    write_batches=writer.stats['batches'],
+                    account_cache=self.service.get_dashboard_stats(),
+                    logins=self.service.passwords.get_stats())
+
+    async def dispatch(self, session, request):
+        """Run one request and return its response"""
+        name = request.get('op')
+        if name not in OPERATIONS:
+            raise RequestError(f"unknown operation {name!r}")
+
+        role, is_write, handler = OPERATIONS[name]
+        session.require(role)
+        args = request.get('args') or {}
+        if not isinstance(args, dict):
+            raise RequestError("args must be a JSON object")
+
+        def call():
+            return plain(handler(self.service, session, args))
+
+        if is_write:
+            self.stats['writes'] += 1
+            async with self.write_slots:
+                return await asyncio.wrap_future(self.service.writer.submit(call))
+
+        self.stats['reads'] += 1
+        return await asyncio.get_running_loop().run_in_executor(self.readers, call)
+
+    async def handle_session(self, reader, writer):
+        """Serve one connected desk until it disconnects"""
+        session = Session(writer.get_extra_info('peername') or writer.get_extra_info('sockname'), self)
+        self.sessions.add(session)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    break  # Line longer than MAX_LINE_BYTES
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+
+                self.stats['requests'] += 1
+                request = {}
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise RequestError("requests must be JSON objects")
+                    response = {'ok': True, 'result': await self.dispatch(session, request)}
+                except RequestError as e:
+                    self.stats['errors'] += 1
+                    response = {'ok': False, 'error': str(e)}
+                except json.JSONDecodeError:
+                    self.stats['errors'] += 1
+                    response = {'ok': False, 'error': "requests must be JSON objects"}
+                except Exception:
+                    # The details stay in the server log; clients get a fixed message
+                    self.stats['errors'] += 1
+                    log.exception("Request %r from %s failed", request.get('op'), session.peer)
+                    response = {'ok': False, 'error': "internal error"}
+
+                if 'id' in request:
+                    response['id'] = request['id']
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions.discard(session)
+            writer.close()
+
+    async def serve(self, host=None, port=None, socket_path=None):
+        """Listen on TCP or a Unix socket until cancelled"""
+        if socket_path:
+            server = await asyncio.start_unix_server(
+                self.handle_session, socket_path, limit=MAX_LINE_BYTES, backlog=LISTEN_BACKLOG
+            )
+            where = socket_path
+        else:
+            server = await asyncio.start_server(
+                self.handle_session, host, port, limit=MAX_LINE_BYTES, backlog=LISTEN_BACKLOG
+            )
+            where = f"{host}:{port}"
+
+        print(f"Library server listening on {where}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.readers.shutdown(wait=False)
+            if socket_path and os.path.exists(socket_path):
+                os.unlink(socket_path)
+
+
+def remove_stale_socket(path):
+    """Unlink a Unix socket left behind by a server that is no longer running
+
+    Returns False, leaving the path alone, if another server still answers
+    on it or it is not a socket at all.
+    """
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return True
+    if not stat.S_ISSOCK(mode):
+        print(f"{path} exists and is not a socket.")
+        return False
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        os.unlink(path)
+        return True
+    finally:
+        probe.close()
+    print(f"Another server is already listening on {path}.")
+    return False
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description="Serve many library desk sessions over a JSON-lines socket protocol"
+    )
+    parser.add_argument("--db", default="library.db", help="database file (default: library.db)")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"TCP address (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"TCP port (default: {DEFAULT_PORT})")
+    parser.add_argument("--socket", help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--readers", type=int, default=None,
+                        help="reader threads (default: one less than the connection pool)")
+    args = parser.parse_args()
+    if args.socket and not remove_stale_socket(args.socket):
+        return
+
+    app = load_app()
+    readers = args.readers or app.POOL_SIZE - 1
+    # One pooled connection per reader thread plus one for the writer
+    service = app.LibraryService(args.db, pool_size=readers + 1, group_commit=True)
+    if not service.connect_db():
+        print("Failed to connect to the database. Exiting...")
+        return
+    # connect_db checked out a connection on this thread; the workers need it
+    service.release_connection()
+
+    server = LibraryServer(service, readers)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.socket))
+    except KeyboardInterrupt:
+        print("\nShutting down.")
+    finally:
+        service.close_db()
+
+if __name__ == "__main__":
+    main()
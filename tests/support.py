@@ -0,0 +1,36 @@
+"""Shared helpers: load the hyphenated scripts as modules and build scratch databases"""
+
+import os
+import sys
+import subprocess
+import importlib.util
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_script(filename, name):
+    """Import one of the repo's scripts as a module"""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(REPO_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_app():
+    """Import library-app.py as a module"""
+    return load_script("library-app.py", "library_app")
+
+
+def load_initdb():
+    """Import initialize-db.py as a module"""
+    return load_script("initialize-db.py", "initialize_db")
+
+
+def generate_db(db_file, members=10, items=10, borrowings=0, events=0):
+    """Build a small database with initialize-db.py --generate"""
+    subprocess.run(
+        [sys.executable, os.path.join(REPO_DIR, "initialize-db.py"), "--generate", "--db", db_file,
+         "--members", str(members), "--items", str(items), "--borrowings", str(borrowings),
+         "--events", str(events)],
+        check=True, capture_output=True
+    )
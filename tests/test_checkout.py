@@ -0,0 +1,50 @@
+"""Batch checkout and return outcomes of LibraryService"""
+
+import os
+import tempfile
+import unittest
+
+from support import generate_db, load_app
+
+
+class BatchOutcomeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        db_file = os.path.join(self.tmp.name, "library.db")
+        generate_db(db_file)
+        self.service = load_app().LibraryService(db_file)
+        self.assertTrue(self.service.connect_db())
+        self.available = [
+            row[0] for row in self.service.execute_query(
+                "SELECT ItemID FROM LibraryItem WHERE Status = 'Available' ORDER BY ItemID LIMIT 2"
+            )
+        ]
+
+    def tearDown(self):
+        self.service.close_db()
+        self.tmp.cleanup()
+
+    def outcomes(self, batch):
+        self.assertIsNone(batch.error)
+        return [(result['ItemID'], result['Outcome']) for result in batch.results]
+
+    def test_ids_that_are_not_numbers_are_reported_per_item(self):
+        first, second = self.available
+        batch = self.service.checkout_items(1, [str(first), "abc", first, "", second])
+        self.assertEqual(
+            self.outcomes(batch),
+            [(first, 'borrowed'), ("abc", 'not_found'), ("", 'not_found'), (second, 'borrowed')]
+        )
+        batch = self.service.return_items([first, "x1"], staff_id=1)
+        self.assertEqual(self.outcomes(batch), [(first, 'returned'), ("x1", 'not_found')])
+
+    def test_item_the_member_already_has_is_already_borrowed(self):
+        first, second = self.available
+        self.service.checkout_items(1, [first])
+        self.assertEqual(self.outcomes(self.service.checkout_items(1, [first])), [(first, 'already_borrowed')])
+        self.assertEqual(self.outcomes(self.service.checkout_items(2, [first])), [(first, 'unavailable')])
+
+
+if __name__ == "__main__":
+    unittest.main()
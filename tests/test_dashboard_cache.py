@@ -0,0 +1,77 @@
+"""DashboardCache expiry, eviction and invalidation races"""
+
+import os
+import tempfile
+import unittest
+
+from support import generate_db, load_app
+
+app = load_app()
+
+
+class DashboardCacheTest(unittest.TestCase):
+
+    def test_put_after_invalidation_is_dropped(self):
+        cache = app.DashboardCache()
+        token = cache.token()
+        cache.invalidate([1])  # A write committed while the summary was loading
+        cache.put(1, "stale", token)
+        self.assertIsNone(cache.get(1))
+        cache.put(1, "fresh", cache.token())
+        self.assertEqual(cache.get(1), "fresh")
+
+    def test_expired_summaries_are_dropped(self):
+        cache = app.DashboardCache(ttl=0)
+        cache.put(1, "summary", cache.token())
+        self.assertIsNone(cache.get(1))
+        stats = cache.get_stats()
+        self.assertEqual((stats['expired'], stats['misses'], stats['size']), (1, 1, 0))
+
+    def test_least_recently_used_summary_is_evicted(self):
+        cache = app.DashboardCache(max_entries=2)
+        cache.put(1, "one", cache.token())
+        cache.put(2, "two", cache.token())
+        self.assertEqual(cache.get(1), "one")  # Now 2 is the least recently used
+        cache.put(3, "three", cache.token())
+        self.assertIsNone(cache.get(2))
+        self.assertEqual((cache.get(1), cache.get(3)), ("one", "three"))
+        self.assertEqual(cache.get_stats()['evictions'], 1)
+
+
+class AccountSummaryRaceTest(unittest.TestCase):
+    """A summary read before a checkout commits must not outlive the checkout"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        db_file = os.path.join(self.tmp.name, "library.db")
+        generate_db(db_file)
+        self.service = app.LibraryService(db_file)
+        self.assertTrue(self.service.connect_db())
+        self.item_id = self.service.execute_query(
+            "SELECT ItemID FROM LibraryItem WHERE Status = 'Available' LIMIT 1"
+        )[0][0]
+
+    def tearDown(self):
+        self.service.close_db()
+        self.tmp.cleanup()
+
+    def test_summary_loaded_before_commit_is_not_cached(self):
+        cache = self.service.dashboard_cache
+        put = cache.put
+
+        def put_after_checkout(member_id, summary, token):
+            # The rows are loaded; a checkout commits before they are stored
+            cache.put = put
+            self.assertEqual(self.service.checkout_items(member_id, [self.item_id]).error, None)
+            put(member_id, summary, token)
+
+        before = len(self.service.account_summary(1).borrowings)
+        cache.invalidate([1])
+        cache.put = put_after_checkout
+        self.assertEqual(len(self.service.account_summary(1).borrowings), before)
+        self.assertIsNone(cache.get(1))
+        self.assertEqual(len(self.service.account_summary(1).borrowings), before + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
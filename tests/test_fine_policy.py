@@ -0,0 +1,97 @@
+"""FinePolicy.amounts against the create_fine_for_late_return trigger"""
+
+import os
+import datetime
+import tempfile
+import unittest
+
+from support import generate_db, load_app
+
+# ItemType -> (DailyRate, GraceDays, MaxFine)
+RULES = {
+    'Book': (0.25, 2, 5.0),
+    'Ebook': (0.1, 0, None),
+    'Magazine': (0.35, 3, 2.0),
+    'Journal': (1.0, 0, 10.0),
+    'Media': (0.15, 1, None),
+}
+DUE_DATE = datetime.date(2026, 1, 2)  # A Friday
+
+
+class FinePolicyParityTest(unittest.TestCase):
+    """Fines priced in Python must equal the ones the trigger writes"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        db_file = os.path.join(self.tmp.name, "library.db")
+        generate_db(db_file, items=60)
+        self.app = load_app()
+        self.service = self.app.LibraryService(db_file)
+        self.assertTrue(self.service.connect_db())
+
+        # Every weekend of the first ten weeks is a closed day
+        weekends = [
+            DUE_DATE + datetime.timedelta(days=offset)
+            for offset in range(70) if (DUE_DATE + datetime.timedelta(days=offset)).weekday() >= 5
+        ]
+        with self.service.transaction() as cursor:
+            cursor.executemany(
+                "UPDATE FinePolicy SET DailyRate = ?, GraceDays = ?, MaxFine = ? WHERE ItemType = ?",
+                [(rate, grace, cap, item_type) for item_type, (rate, grace, cap) in RULES.items()]
+            )
+            cursor.execute("DELETE FROM LibraryHoliday")
+            cursor.executemany(
+                "INSERT INTO LibraryHoliday (HolidayDate, Name) VALUES (?, 'Weekend')",
+                [(day.isoformat(),) for day in weekends]
+            )
+
+        items = self.service.execute_query(
+            "SELECT ItemID, ItemType FROM LibraryItem WHERE Status = 'Available' ORDER BY ItemID"
+        )
+        self.loans = []
+        for days_late, (item_id, item_type) in enumerate(items):
+            return_date = DUE_DATE + datetime.timedelta(days=days_late)
+            self.service.execute_query(
+                "INSERT INTO Borrowing (MemberID, ItemID, BorrowDate, DueDate) VALUES (1, ?, ?, ?)",
+                (item_id, DUE_DATE - datetime.timedelta(days=14), DUE_DATE),
+                commit=True
+            )
+            borrow_id = self.service.execute_query("SELECT MAX(BorrowID) FROM Borrowing")[0][0]
+            self.service.execute_query(
+                "UPDATE Borrowing SET ReturnDate = ? WHERE BorrowID = ?", (return_date, borrow_id), commit=True
+            )
+            self.loans.append((borrow_id, item_type, DUE_DATE.isoformat(), return_date.isoformat()))
+        self.assertEqual({loan[1] for loan in self.loans}, set(RULES))
+
+    def tearDown(self):
+        self.service.close_db()
+        self.tmp.cleanup()
+
+    def trigger_fines(self):
+        fines = dict(self.service.execute_query("SELECT BorrowID, Amount FROM Fine"))
+        return [fines.get(borrow_id, 0.0) for borrow_id, *_ in self.loans]
+
+    def policy_fines(self):
+        _, item_types, due_dates, return_dates = zip(*self.loans)
+        return self.app.FinePolicy.load(self.service).amounts(item_types, due_dates, return_dates)
+
+    def test_amounts_match_trigger(self):
+        if self.app.np is None:
+            self.skipTest("NumPy is not installed")
+        expected = self.trigger_fines()
+        self.assertTrue(any(expected) and not all(expected))
+        # Some loans ran into their type's cap
+        self.assertTrue(any(fine == RULES[loan[1]][2] for fine, loan in zip(expected, self.loans)))
+        self.assertEqual(self.policy_fines(), expected)
+
+    def test_amounts_match_trigger_without_numpy(self):
+        numpy = self.app.np
+        self.app.np = None
+        try:
+            self.assertEqual(self.policy_fines(), self.trigger_fines())
+        finally:
+            self.app.np = numpy
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+"""Fine accrual, payment and late returns against a freshly initialized database"""
+
+import os
+import datetime
+import tempfile
+import unittest
+
+from support import generate_db, load_app
+
+
+class PayThenReturnTest(unittest.TestCase):
+    """A fine paid while the item is out must not cap what the late return costs"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        db_file = os.path.join(self.tmp.name, "library.db")
+        generate_db(db_file)
+        self.service = load_app().LibraryService(db_file)
+        self.assertTrue(self.service.connect_db())
+
+        self.today = datetime.date.today()
+        item_id = self.service.execute_query(
+            "SELECT ItemID FROM LibraryItem WHERE Status = 'Available' LIMIT 1"
+        )[0][0]
+        # Borrowed 30 days ago, so it was due 16 days ago
+        self.service.execute_query(
+            "INSERT INTO Borrowing (MemberID, ItemID, BorrowDate, DueDate) VALUES (1, ?, ?, ?)",
+            (item_id, self.today - datetime.timedelta(days=30), self.today - datetime.timedelta(days=16)),
+            commit=True
+        )
+        self.borrow_id = self.service.execute_query("SELECT MAX(BorrowID) FROM Borrowing")[0][0]
+
+    def tearDown(self):
+        self.service.close_db()
+        self.tmp.cleanup()
+
+    def fine(self):
+        return self.service.execute_query(
+            "SELECT FineID, Amount, Status FROM Fine WHERE BorrowID = ?", (self.borrow_id,)
+        )[0]
+
+    def test_accrued_fine_cannot_be_paid_while_item_is_out(self):
+        outcome = self.service.accrue_overdue_fines(self.today - datetime.timedelta(days=10)).outcome
+        self.assertEqual(outcome, 'accrued')
+        fine_id, amount, status = self.fine()
+        self.assertEqual((amount, status), (3.0, 'Unpaid'))  # 6 days at $0.50
+
+        self.assertEqual(self.service.pay_fine(fine_id).outcome, 'loan_open')
+        self.assertEqual(self.fine()[2], 'Unpaid')
+
+        result = self.service.return_borrowing(self.borrow_id)
+        self.assertEqual(result.outcome, 'returned')
+        self.assertEqual(result.record['FineAmount'], 8.0)  # All 16 days
+        self.assertEqual(self.fine()[1:], (8.0, 'Unpaid'))
+
+        self.assertEqual(self.service.pay_fine(fine_id).outcome, 'paid')
+        self.assertEqual(self.fine()[1:], (8.0, 'Paid'))
+        self.assertEqual(self.service.pay_fine(fine_id).outcome, 'already_paid')
+
+
+    def test_accrual_skips_capped_fines(self):
+        # Leave this loan the only one open, so the run counts are its own
+        self.service.execute_query(
+            "UPDATE Borrowing SET ReturnDate = BorrowDate WHERE ReturnDate IS NULL AND BorrowID != ?",
+            (self.borrow_id,), commit=True
+        )
+        self.service.set_fine_rule(self.item_type(), 0.5, 0, 4.0)
+        run = self.service.accrue_overdue_fines(self.today - datetime.timedelta(days=10)).record
+        self.assertEqual((run['FinesAdded'], self.fine()[1]), (1, 3.0))
+        run = self.service.accrue_overdue_fines(self.today - datetime.timedelta(days=5)).record
+        self.assertEqual((run['FinesUpdated'], self.fine()[1]), (1, 4.0))  # 11 days, capped at $4
+        run = self.service.accrue_overdue_fines(self.today).record
+        self.assertEqual((run['FinesAdded'], run['FinesUpdated'], self.fine()[1]), (0, 0, 4.0))
+        self.assertEqual(self.service.accrue_overdue_fines(self.today).outcome, 'up_to_date')
+
+    def item_type(self):
+        return self.service.execute_query(
+            "SELECT i.ItemType FROM Borrowing b JOIN LibraryItem i ON b.ItemID = i.ItemID WHERE b.BorrowID = ?",
+            (self.borrow_id,)
+        )[0][0]
+
+
+if __name__ == "__main__":
+    unittest.main()
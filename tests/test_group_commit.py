@@ -0,0 +1,96 @@
+"""Savepoints and failure handling of GroupCommitWriter"""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from support import generate_db, load_app
+
+
+class GroupCommitTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_file = os.path.join(self.tmp.name, "library.db")
+        generate_db(self.db_file)
+        self.app = load_app()
+        # One pooled connection, so the writer thread runs on the one set up here
+        self.service = self.app.LibraryService(self.db_file, pool_size=1)
+        self.assertTrue(self.service.connect_db())
+        self.writer = self.app.GroupCommitWriter(self.service)
+
+    def tearDown(self):
+        self.writer.stop()
+        self.service.close_db()
+        self.tmp.cleanup()
+
+    def run_group(self, *writes):
+        """Queue the writes before the writer starts, so they share one group"""
+        self.service.release_connection()
+        futures = [self.writer.submit(write) for write in writes]
+        self.writer.start()
+        for future in futures:
+            future.exception(timeout=10)
+        self.writer.stop()
+        return futures
+
+    def add_holiday(self, day, fail=False):
+        def write():
+            self.service.conn.execute("INSERT INTO LibraryHoliday (HolidayDate) VALUES (?)", (day,))
+            if fail:
+                raise ValueError("rejected")
+            return day
+        return write
+
+    def holidays(self):
+        return [row[0] for row in self.service.execute_query(
+            "SELECT HolidayDate FROM LibraryHoliday WHERE HolidayDate >= '2099-01-01' ORDER BY 1"
+        )]
+
+    def test_failed_write_is_undone_alone(self):
+        futures = self.run_group(
+            self.add_holiday('2099-01-01'),
+            self.add_holiday('2099-01-02', fail=True),
+            self.add_holiday('2099-01-03'),
+        )
+        self.assertEqual(futures[0].result(), '2099-01-01')
+        self.assertIsInstance(futures[1].exception(), ValueError)
+        self.assertEqual(futures[2].result(), '2099-01-03')
+        self.assertEqual(self.holidays(), ['2099-01-01', '2099-01-03'])
+        self.assertEqual(self.writer.stats['batches'], 1)
+        self.assertEqual(self.writer.stats['writes'], 3)
+
+    def test_failed_commit_fails_every_write(self):
+        def orphan_fine():
+            # Checked only at COMMIT, after every savepoint has been released
+            self.service.conn.execute("PRAGMA defer_foreign_keys = ON")
+            self.service.conn.execute(
+                "INSERT INTO Fine (BorrowID, Amount, Status, IssuedDate) VALUES (-1, 1, 'Unpaid', '2099-01-01')"
+            )
+
+        futures = self.run_group(self.add_holiday('2099-01-01'), orphan_fine, self.add_holiday('2099-01-03'))
+        for future in futures:
+            self.assertIsInstance(future.exception(), sqlite3.IntegrityError)
+        self.assertEqual(self.holidays(), [])
+        self.assertEqual(self.writer.stats['batches'], 0)
+        # The failed group was rolled back, so the next one commits
+        self.assertIsNone(self.run_group(self.add_holiday('2099-01-04'))[0].exception())
+        self.assertEqual(self.holidays(), ['2099-01-04'])
+
+    def test_failed_begin_fails_every_write(self):
+        self.service.conn.execute("PRAGMA busy_timeout = 0")
+        locker = sqlite3.connect(self.db_file, isolation_level=None)
+        locker.execute("BEGIN IMMEDIATE")
+        try:
+            futures = self.run_group(self.add_holiday('2099-01-01'), self.add_holiday('2099-01-02'))
+        finally:
+            locker.execute("ROLLBACK")
+            locker.close()
+        for future in futures:
+            self.assertIsInstance(future.exception(), sqlite3.OperationalError)
+        self.assertEqual(self.holidays(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+"""Bulk item import: ISBN normalization and the rejects file"""
+
+import os
+import json
+import sqlite3
+import tempfile
+import unittest
+
+from support import generate_db, load_initdb
+
+HEADER = "Title,ItemType,ISBN,Author,Format,PublicationDate,Status\n"
+
+
+class ImportItemsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.initdb = load_initdb()
+        self.initdb.DB_FILE = os.path.join(self.tmp.name, "library.db")
+        generate_db(self.initdb.DB_FILE)
+        self.rejects = os.path.join(self.tmp.name, "rejects.jsonl")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+    def import_files(self, *paths):
+        self.assertTrue(self.initdb.import_items(list(paths), self.rejects))
+        if not os.path.exists(self.rejects):
+            return []
+        with open(self.rejects, encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def query(self, sql, params=()):
+        conn = sqlite3.connect(self.initdb.DB_FILE)
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def test_isbns_are_normalized_before_the_duplicate_checks(self):
+        csv_path = self.write("items.csv", HEADER + (
+            "New Book,Book,978-1-4028-9462-6,An Author,Paperback,,\n"
+            "Same Book,Book,9781402894626,An Author,Paperback,,\n"
+            "Gatsby Again,Book,978-0743273565,F. Scott Fitzgerald,Paperback,,\n"
+            "Spaced,Book,978 0 306 40615 7,An Author,Hardcover,,\n"
+        ))
+        rejects = self.import_files(csv_path)
+        self.assertEqual(
+            [(reject['line'], reject['reason']) for reject in rejects],
+            [(3, "duplicate ISBN 9781402894626 in the import"),
+             (4, "ISBN 9780743273565 is already in the catalog")]
+        )
+        self.assertEqual(
+            self.query("SELECT ISBN FROM Book WHERE ISBN IN ('9781402894626', '9780306406157') ORDER BY 1"),
+            [('9780306406157',), ('9781402894626',)]
+        )
+        self.assertEqual(self.query("SELECT COUNT(*) FROM Book WHERE ISBN LIKE '%-%' OR ISBN LIKE '% %'"), [(0,)])
+
+    def test_rejected_rows_are_written_with_their_reasons(self):
+        csv_path = self.write("items.csv", HEADER + (
+            "Good Book,Book,,An Author,Paperback,2001-02-03,\n"
+            ",Book,,An Author,Paperback,,\n"
+            "Scroll,Scroll,,,,,\n"
+            "No Author,Book,,,Paperback,,\n"
+            "Bad Date,Book,,An Author,Paperback,03/02/2001,\n"
+            "Bad Format,Book,,An Author,Scroll,,\n"
+            "Out Already,Book,,An Author,Paperback,,Borrowed\n"
+        ))
+        jsonl_path = self.write("items.jsonl", (
+            '{"title": "Good Ebook", "itemtype": "Ebook", "author": "An Author"}\n'
+            '["not", "an", "object"]\n'
+            '{"Title": "Bad Pages", "ItemType": "Book", "Author": "An Author", "PageCount": "many"}\n'
+        ))
+        rejects = self.import_files(csv_path, jsonl_path)
+        self.assertEqual(
+            [(os.path.basename(reject['file']), reject['line'], reject['reason']) for reject in rejects],
+            [
+                ("items.csv", 3, "Title is required"),
+                ("items.csv", 4, "ItemType must be one of Book, Ebook, Magazine, Journal, Media"),
+                ("items.csv", 5, "Author is required for a Book"),
+                ("items.csv", 6, "PublicationDate must be a YYYY-MM-DD date"),
+                ("items.csv", 7, "Format must be one of Hardcover, Paperback, Other"),
+                ("items.csv", 8, "Status must be one of Available, Reserved, Maintenance"),
+                ("items.jsonl", 2, "not a JSON object"),
+                ("items.jsonl", 3, "PageCount must be a whole number"),
+            ]
+        )
+        self.assertEqual(rejects[0]['row']['Author'], "An Author")
+        self.assertEqual(
+            self.query("SELECT c.Title, c.Creator FROM CatalogEntry c WHERE c.Title LIKE 'Good %' ORDER BY 1"),
+            [("Good Book", "An Author"), ("Good Ebook", "An Author")]
+        )
+
+    def test_clean_import_leaves_no_rejects_file(self):
+        csv_path = self.write("items.csv", HEADER + "Good Book,Book,,An Author,Paperback,,\n")
+        self.assertEqual(self.import_files(csv_path), [])
+        self.assertFalse(os.path.exists(self.rejects))
+
+
+if __name__ == "__main__":
+    unittest.main()
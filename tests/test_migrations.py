@@ -0,0 +1,76 @@
+"""Schema migrations of initialize-db.py against a fresh initialization"""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from support import REPO_DIR, load_initdb
+
+# SCHEMA_SQL as it stood before the first migration
+BASELINE_SCHEMA = os.path.join(REPO_DIR, "tests", "baseline_schema.sql")
+
+
+class MigrationParityTest(unittest.TestCase):
+    """A baseline database migrated to the latest version must match a fresh build"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        # initialize_database reads schema.sql and sample_data.sql from the working directory
+        os.chdir(self.tmp.name)
+        self.initdb = load_initdb()
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def fresh_database(self):
+        self.initdb.DB_FILE = "fresh.db"
+        self.initdb.extract_schema_sql()
+        self.initdb.extract_sample_data_sql()
+        self.assertTrue(self.initdb.initialize_database())
+        return "fresh.db"
+
+    def migrated_database(self):
+        with open(BASELINE_SCHEMA) as schema_file:
+            baseline_sql = schema_file.read()
+        conn = sqlite3.connect("migrated.db")
+        conn.executescript(baseline_sql)
+        conn.close()
+        self.initdb.DB_FILE = "migrated.db"
+        self.assertTrue(self.initdb.migrate_database())
+        return "migrated.db"
+
+    def schema(self, db_file):
+        """sqlite_master by name, with tables described by their columns
+
+        Columns added by ALTER TABLE are appended to the stored CREATE TABLE
+        text differently from a fresh CREATE, so tables are compared through
+        table_info; indexes, triggers and views are compared as written.
+        """
+        conn = sqlite3.connect(db_file)
+        try:
+            schema = {}
+            for kind, name, table, sql in conn.execute(
+                "SELECT type, name, tbl_name, sql FROM sqlite_master ORDER BY name"
+            ):
+                if kind == 'table':
+                    sql = conn.execute(f"PRAGMA table_info('{name}')").fetchall()
+                schema[name] = (kind, table, sql)
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            return schema, version
+        finally:
+            conn.close()
+
+    def test_migrated_schema_matches_fresh_schema(self):
+        fresh, fresh_version = self.schema(self.fresh_database())
+        migrated, migrated_version = self.schema(self.migrated_database())
+        self.assertEqual(migrated_version, fresh_version)
+        self.assertEqual(sorted(migrated), sorted(fresh))
+        for name in fresh:
+            self.assertEqual(migrated[name], fresh[name], name)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""KeysetPaginator seeks on descending composite keys with tied leading keys"""
+
+import os
+import datetime
+import tempfile
+import unittest
+
+from support import generate_db, load_app
+
+
+class KeysetPaginatorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        db_file = os.path.join(self.tmp.name, "library.db")
+        generate_db(db_file, members=20, items=40, borrowings=300, events=40)
+        self.app = load_app()
+        self.service = self.app.LibraryService(db_file)
+        self.assertTrue(self.service.connect_db())
+        # Half the rows share a leading key, and some share the first two keys
+        self.service.execute_query(
+            "UPDATE Event SET EventDate = '2020-01-01' WHERE EventID % 2 = 0", commit=True
+        )
+        self.service.execute_query(
+            "UPDATE Event SET StartTime = '09:00' WHERE EventID % 4 = 0", commit=True
+        )
+        self.service.execute_query(
+            "UPDATE Fine SET IssuedDate = '2020-01-01' WHERE FineID % 2 = 0", commit=True
+        )
+
+    def tearDown(self):
+        self.service.close_db()
+        self.tmp.cleanup()
+
+    def keys(self, paginator, rows):
+        return [tuple(row[column] for column in paginator.columns) for row in rows]
+
+    def check_listing(self, name, params=(), page_size=3):
+        everything = self.app.KeysetPaginator(self.service, name, params, page_size=10**6)
+        expected = self.keys(everything, everything.first_page())
+        self.assertGreater(len(expected), 4 * page_size)
+        self.assertEqual(len(set(expected)), len(expected))
+
+        paginator = self.app.KeysetPaginator(self.service, name, params, page_size=page_size)
+        pages = [self.keys(paginator, paginator.first_page())]
+        self.assertFalse(paginator.has_prev)
+        while paginator.has_next:
+            pages.append(self.keys(paginator, paginator.next_page()))
+        self.assertEqual([key for page in pages for key in page], expected)
+        self.assertTrue(all(len(page) == page_size for page in pages[:-1]))
+
+        # Walking back returns every earlier page unchanged
+        for page in reversed(pages[:-1]):
+            self.assertEqual(self.keys(paginator, paginator.prev_page()), page)
+            self.assertTrue(paginator.has_next)
+        self.assertFalse(paginator.has_prev)
+        return expected
+
+    def test_descending_three_column_key_with_ties(self):
+        expected = self.check_listing('past_events_with_organizer', (datetime.date.today().isoformat(),))
+        self.assertEqual(expected, sorted(expected, reverse=True))
+        self.assertGreater(sum(1 for key in expected if key[:2] == ('2020-01-01', '09:00')), 3)
+
+    def test_descending_two_column_key_with_ties(self):
+        expected = self.check_listing('all_fines')
+        self.assertEqual(expected, sorted(expected, reverse=True))
+        self.assertGreater(sum(1 for key in expected if key[0] == '2020-01-01'), 3)
+
+    def test_ascending_key_with_ties(self):
+        expected = self.check_listing('unpaid_fines')
+        self.assertEqual(expected, sorted(expected))
+
+
+if __name__ == "__main__":
+    unittest.main()
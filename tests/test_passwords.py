@@ -0,0 +1,83 @@
+"""Member and staff logins: rehashing, the verified-login cache and NULL staff passwords"""
+
+import os
+import tempfile
+import unittest
+
+from support import generate_db, load_app
+
+app = load_app()
+
+
+class LoginTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_file = os.path.join(self.tmp.name, "library.db")
+        generate_db(self.db_file)
+        self.services = []
+        self.service = self.connect()
+        self.member_id, self.email = self.service.execute_query(
+            "SELECT MemberID, Email FROM Member WHERE Password = 'password' LIMIT 1"
+        )[0]
+        self.staff_id, self.staff_email = self.service.execute_query(
+            "SELECT StaffID, Email FROM Staff WHERE Password IS NULL LIMIT 1"
+        )[0]
+
+    def tearDown(self):
+        for service in self.services:
+            service.close_db()
+        self.tmp.cleanup()
+
+    def connect(self, **options):
+        service = app.LibraryService(self.db_file, **options)
+        # A cheap KDF keeps the tests fast; the code paths are the same
+        service.passwords = app.PasswordHasher(kdf='pbkdf2_sha256', pbkdf2_iterations=1000)
+        self.assertTrue(service.connect_db())
+        self.services.append(service)
+        return service
+
+    def stored_password(self):
+        return self.service.execute_query(
+            "SELECT Password FROM Member WHERE MemberID = ?", (self.member_id,)
+        )[0][0]
+
+    def test_plaintext_password_is_rehashed_on_first_login(self):
+        member = self.service.authenticate_member(self.email, 'password')
+        self.assertEqual(member['MemberID'], self.member_id)
+        self.assertNotIn('Password', member)
+        stored = self.stored_password()
+        self.assertTrue(stored.startswith('pbkdf2_sha256$1000$'))
+        self.assertFalse(self.service.passwords.needs_rehash(stored))
+
+    def test_second_login_is_served_from_the_cache(self):
+        self.service.authenticate_member(self.email, 'password')
+        self.assertIsNotNone(self.service.authenticate_member(self.email, 'password'))
+        stats = self.service.passwords.get_stats()
+        self.assertEqual((stats['kdf_runs'], stats['cache_hits']), (0, 1))
+
+    def test_wrong_password_fails(self):
+        self.assertIsNone(self.service.authenticate_member(self.email, 'wrong'))
+        self.assertEqual(self.stored_password(), 'password')  # Never rehashed from a failed login
+        self.service.authenticate_member(self.email, 'password')
+        self.assertIsNone(self.service.authenticate_member(self.email, 'wrong'))
+        stats = self.service.passwords.get_stats()
+        self.assertEqual((stats['kdf_runs'], stats['failures']), (1, 1))
+
+    def test_staff_without_password_need_demo_staff_login(self):
+        self.assertIsNone(self.service.authenticate_staff(self.staff_email))
+        self.assertIsNone(self.service.authenticate_staff(self.staff_email, 'anything'))
+        demo = self.connect(demo_staff_login=True)
+        self.assertEqual(demo.authenticate_staff(self.staff_email)['StaffID'], self.staff_id)
+
+    def test_staff_with_password_must_give_it(self):
+        self.service.set_staff_password(self.staff_id, 's3cret')
+        demo = self.connect(demo_staff_login=True)
+        for service in (self.service, demo):
+            self.assertIsNone(service.authenticate_staff(self.staff_email))
+            self.assertIsNone(service.authenticate_staff(self.staff_email, 'wrong'))
+            self.assertEqual(service.authenticate_staff(self.staff_email, 's3cret')['StaffID'], self.staff_id)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+"""ConnectionPool checkout limits and per-thread connections of LibraryService"""
+
+import os
+import tempfile
+import threading
+import unittest
+
+from support import generate_db, load_app
+
+
+class ThreadConnectionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        db_file = os.path.join(self.tmp.name, "library.db")
+        generate_db(db_file)
+        self.app = load_app()
+        self.service = self.app.LibraryService(db_file, pool_size=2)
+        self.assertTrue(self.service.connect_db())
+        self.service.release_connection()
+
+    def tearDown(self):
+        self.service.close_db()
+        self.tmp.cleanup()
+
+    def run_thread(self, target):
+        thread = threading.Thread(target=target)
+        thread.start()
+        thread.join()
+
+    def test_exiting_threads_return_their_connections(self):
+        for _ in range(5):
+            self.run_thread(lambda: self.service.execute_query("SELECT 1"))
+        self.assertEqual(self.service.pool._idle.qsize(), len(self.service.pool._connections))
+        self.assertLessEqual(len(self.service.pool._connections), 2)
+
+    def test_acquire_times_out_when_every_connection_is_held(self):
+        held = threading.Barrier(3)
+        done = threading.Event()
+
+        def hold():
+            self.service.conn
+            held.wait()
+            done.wait()
+
+        threads = [threading.Thread(target=hold) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        held.wait()
+        try:
+            with self.assertRaises(self.app.PoolTimeout):
+                self.service.pool.acquire(timeout=0.1)
+        finally:
+            done.set()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(self.service.pool._idle.qsize(), 2)
+
+    def test_release_connection_returns_it_once(self):
+        self.service.conn
+        self.service.release_connection()
+        self.service.release_connection()
+        self.assertEqual(self.service.pool._idle.qsize(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()